@@ -19,7 +19,7 @@ if Marshal.SizeOf(Int32()) != Marshal.SizeOf(IntPtr()):
     raise ImportError("Ironclad is currently 32-bit only")
 
 clr.AddReference(Assembly.LoadFile(os.path.join(_dirname, "ironclad.dll")))
-from Ironclad import CPyMarshal, PythonMapper
+from Ironclad import ClassEngine, CPyMarshal, PythonMapper
 from Ironclad.Structs import PyObject, PyVarObject, PyTypeObject
 _mapper = PythonMapper(os.path.join(_dirname, "python27.dll"))
 
@@ -173,18 +173,14 @@ def log_refs():
 
 def set_gc_threshold(value):
     """
-    Set how frequently Ironclad performs tedious bookkeeping tasks. The default value of
-    50,000 gives decent performance at the cost of a noticeably sawtoothed memory usage 
-    graph when lots of objects are being created and destroyed; if you find yourself 
-    running out of memory, you may want to reduce this value.
+    Set how frequently Ironclad performs tedious bookkeeping tasks. The bookkeeping is
+    spread across calls into C code, such that recently-created objects are all checked
+    once every `value` calls (and long-lived ones much less often). The default value of
+    50,000 gives decent performance, but objects released by C code may hang around for
+    a while; if you find yourself running out of memory, you may want to reduce this value.
     
-    For reference, a value of 500 produces a near-enough-flat memory usage graph, with 
-    *average* performance degradation of approximately 50%; however, in the worst case, 
-    the degradation is really really awful, so treat it with some respect.
-    
-    Increasing the value to 5,000,000 produces a performance benefit of maybe 8% on a good 
-    day, and probably isn't worth bothering with, but certain applications could benefit
-    noticeably. YMMV.
+    A value of 0 checks everything on every call, which is thorough but very slow; see
+    get_gc_stats if you want to know what the bookkeeping is costing you.
     """
     _mapper.GCThreshold = value
 
@@ -195,6 +191,231 @@ def get_gc_threshold():
     """
     return _mapper.GCThreshold
 
+def get_gc_stats():
+    """
+    Return a dict describing the work done (and time spent) by the bookkeeping controlled
+    by set_gc_threshold, since startup or the last call to reset_gc_stats. Pause times are
+    in milliseconds.
+    """
+    counters = _mapper.BridgeSweepCounters
+    return {
+        'slices': counters.Slices,
+        'full_sweeps': counters.FullSweeps,
+        'objects_checked': counters.EntriesChecked,
+        'promotions': counters.Promotions,
+        'demotions': counters.Demotions,
+        'last_pause': counters.LastPauseMilliseconds,
+        'max_pause': counters.MaxPauseMilliseconds,
+        'total_pause': counters.TotalPauseMilliseconds,
+    }
+
+def reset_gc_stats():
+    """Reset the counters reported by get_gc_stats."""
+    _mapper.BridgeSweepCounters.Reset()
+
+def set_small_int_cache_range(low, high):
+    """
+    Set the range of ints (inclusive) which are only ever allocated once, and then
+    shared by all C code, as in CPython. The default is -5 to 1024; set high < low
+    to disable the cache entirely.
+    """
+    _mapper.SetSmallIntCacheRange(low, high)
+
+def get_small_int_cache_range():
+    """Get the (low, high) range set by set_small_int_cache_range."""
+    return _mapper.SmallIntCacheMin, _mapper.SmallIntCacheMax
+
+def set_number_free_list_size(value):
+    """
+    Set how many deallocated int, float and complex objects (of each type) are kept
+    around to be reused, rather than returned to the allocator. Defaults to 1000.
+    """
+    for freelist in (_mapper.IntFreeList, _mapper.FloatFreeList, _mapper.ComplexFreeList):
+        freelist.Capacity = value
+
+def get_number_cache_stats():
+    """
+    Return a dict mapping 'small_int', 'int', 'float' and 'complex' to (hits, misses)
+    tuples, describing how effective the small int cache and the number free lists
+    have been since startup or the last call to reset_number_cache_stats.
+    """
+    return {
+        'small_int': (_mapper.SmallIntCacheHits, _mapper.SmallIntCacheMisses),
+        'int': (_mapper.IntFreeList.Hits, _mapper.IntFreeList.Misses),
+        'float': (_mapper.FloatFreeList.Hits, _mapper.FloatFreeList.Misses),
+        'complex': (_mapper.ComplexFreeList.Hits, _mapper.ComplexFreeList.Misses),
+    }
+
+def reset_number_cache_stats():
+    """Reset the counters reported by get_number_cache_stats."""
+    _mapper.ResetNumberCacheCounters()
+
+set_small_int_cache_range(-5, 1024)
+set_number_free_list_size(1000)
+
+def set_switch_interval(value):
+    """
+    Set the switch interval, in seconds. Once a thread has been waiting this long for
+    the GIL, the next thread to release the GIL hands it over directly, rather than
+    letting whoever asks first take it; this stops a thread which keeps calling into C
+    code from starving all the others. Defaults to 0.005; 0 disables handoff entirely.
+    """
+    _mapper.SwitchInterval = value
+
+def get_switch_interval():
+    """Get the value set by set_switch_interval."""
+    return _mapper.SwitchInterval
+
+def get_gil_wait_stats():
+    """
+    Return a dict describing how long threads have had to wait for the GIL since startup
+    or the last call to reset_gil_wait_stats. 'threads' maps each thread's ManagedThreadId
+    to a histogram of its waits (only acquisitions which had to wait are counted); bucket
+    i counts waits shorter than bucket_limits[i] milliseconds, and the last bucket counts
+    everything longer. 'handoffs' counts the times the switch interval kicked in.
+    """
+    return {
+        'bucket_limits': list(_mapper.GILWaitBucketLimits),
+        'handoffs': _mapper.GILHandoffs,
+        'threads': dict((kvp.Key, list(kvp.Value)) for kvp in _mapper.GetGILWaitHistograms()),
+    }
+
+def reset_gil_wait_stats():
+    """Reset the histograms and counters reported by get_gil_wait_stats."""
+    _mapper.ResetGILWaitHistograms()
+
+set_switch_interval(0.005)
+
+def set_code_cache_dir(path):
+    """
+    Set the directory where the code Ironclad generates for each extension module and
+    type is kept between runs, so that later imports of the same .pyd can skip compiling
+    it. Each .pyd gets its own subdirectory, which is thrown away when the .pyd changes;
+    new code is compiled into it when Ironclad shuts down. Defaults to the value of the
+    IRONCLAD_CODE_CACHE_DIR environment variable; None keeps the code in memory only.
+    """
+    _mapper.CodeCache.Directory = path
+
+def get_code_cache_dir():
+    """Get the directory set by set_code_cache_dir."""
+    return _mapper.CodeCache.Directory
+
+def get_code_cache_stats():
+    """
+    Return a dict describing the reuse of compiled snippets of generated code (such as
+    the stub code run for every type Ironclad sees), since startup or the last call to
+    reset_code_cache_stats. 'disk_hits' and 'disk_misses' count the misses which were
+    (or weren't) found in the directory set by set_code_cache_dir.
+    """
+    cache = _mapper.CodeCache
+    return {
+        'snippets': cache.Count,
+        'hits': cache.Hits,
+        'misses': cache.Misses,
+        'disk_hits': cache.DiskHits,
+        'disk_misses': cache.DiskMisses,
+    }
+
+def reset_code_cache_stats():
+    """Reset the counters reported by get_code_cache_stats."""
+    _mapper.CodeCache.ResetCounters()
+
+set_code_cache_dir(os.environ.get('IRONCLAD_CODE_CACHE_DIR'))
+
+def get_temp_object_stats():
+    """
+    Return a dict describing the temporary references released when control returns
+    from C, since startup or the last call to reset_temp_object_stats. 'coalesced' counts
+    references which were merged with an identical one in the same call, and release
+    times are in milliseconds.
+    """
+    temps = _mapper.GetTempObjectCounters()
+    scopes = temps.ScopesReleased
+    return {
+        'calls': scopes,
+        'temps': temps.TempsReleased,
+        'temps_per_call': (float(temps.TempsReleased) / scopes) if scopes else 0.0,
+        'max_temps': temps.MaxTemps,
+        'coalesced': temps.Coalesced,
+        'max_release': temps.MaxReleaseMilliseconds,
+        'total_release': temps.TotalReleaseMilliseconds,
+    }
+
+def reset_temp_object_stats():
+    """Reset the counters reported by get_temp_object_stats."""
+    _mapper.ResetTempObjectCounters()
+
+def set_lazy_string_threshold(value):
+    """
+    Strings at least this long, which C code creates with PyString_FromStringAndSize(NULL,
+    size), are left in unmanaged memory until something actually needs them, and are not
+    copied at all if they're only indexed, sliced, or passed back into C. They are not
+    real strs, though: isinstance(s, str) is False, type(s) is not str, and .NET methods
+    which take a string won't accept them without str(s). Ironclad converts them itself
+    where it needs a real str (dict keys, attribute and module names), but other managed
+    code has to do the same; so this is off (0) by default.
+    """
+    _mapper.LazyStringThreshold = value
+
+def get_lazy_string_threshold():
+    """Get the value set by set_lazy_string_threshold."""
+    return _mapper.LazyStringThreshold
+
+def set_defer_list_appends(value):
+    """
+    If True, PyList_Append only updates the list's unmanaged representation, and the
+    managed list catches up when control returns from C (or when C passes the list to
+    managed code), rather than on every call. This is much faster for extensions which
+    build big lists, but managed code which is called back from C, and which already has
+    a reference to a list being built, will see a stale list; so it's off by default.
+    """
+    _mapper.DeferListAppends = value
+
+def get_defer_list_appends():
+    """Get the value set by set_defer_list_appends."""
+    return _mapper.DeferListAppends
+
+def set_prefer_native_dicts(value):
+    """
+    If True, dicts created by PyDict_New keep their items on the unmanaged side, so
+    that C code which builds and reads str-keyed dicts never touches a managed dict
+    at all. The managed dict is created the first time IronPython code (or a non-str
+    key) needs it. Off by default.
+    """
+    _mapper.PreferNativeDicts = value
+
+def get_prefer_native_dicts():
+    """Get the value set by set_prefer_native_dicts."""
+    return _mapper.PreferNativeDicts
+
+def set_queue_deallocs(value):
+    """
+    If True, ints, floats, complexes and plain objects which C code has finished with
+    are queued up in unmanaged memory, and freed in bulk when control returns from C
+    (or when the queue fills up), rather than calling into managed code once apiece.
+    Extensions which churn through lots of temporary numbers will run faster, but their
+    memory is held a little longer; so it's off by default.
+    """
+    _mapper.QueueDeallocs = value
+
+def get_queue_deallocs():
+    """Get the value set by set_queue_deallocs."""
+    return _mapper.QueueDeallocs
+
+def set_class_engine(name):
+    """
+    Choose how classes are built for extension types Ironclad hasn't seen yet: 'Generated'
+    (the default) generates and execs python source for each type, while 'Direct' builds
+    each class out of managed callables which call straight into the Dispatcher, which is
+    cheaper both at import time and on every method call. Classes which already exist are
+    not affected.
+    """
+    _mapper.ClassEngine = getattr(ClassEngine, name)
+
+def get_class_engine():
+    """Get the name of the engine set by set_class_engine."""
+    return str(_mapper.ClassEngine)
+
 def set_log_errors(value):
     """
     Spam stdout with an unimaginably vast quantity of pointless information. Even if
@@ -62,11 +62,9 @@ METHOD_TEMPLATE = """\
 %(cleanup_objs)s
 %(handle_ret)s
 
-                PythonExceptions.BaseException error = (PythonExceptions.BaseException)this.mapper.LastException;
-                if (error != null)
+                if (this.mapper.HasPendingError)
                 {
-                    this.mapper.LastException = null;
-                    throw error.clsException;
+                    throw this.mapper.FetchError();
                 }
 %(return_ret)s
             }
@@ -111,7 +109,7 @@ NULL_ARG = 'IntPtr.Zero'
 
 MODULE_ARG = 'this.modulePtr'
 
-CALL_DGT_TEMPLATE = '((dgt_%(spec)s)(this.table[key]))(%(arglist)s);'
+CALL_DGT_TEMPLATE = '((dgt_%(spec)s)(this.slots.delegates[slot]))(%(arglist)s);'
 
 
 #================================================================================================
@@ -134,9 +132,9 @@ SIMPLE_RETURN = """\
 THROW_RET_NEGATIVE = """\
                 if (ret < 0)
                 {
-                    if (this.mapper.LastException == null)
+                    if (!this.mapper.HasPendingError)
                     {
-                        this.mapper.LastException = new Exception(key);
+                        this.mapper.LastException = new Exception(this.slots.names[slot]);
                     }
                 }"""
 
@@ -147,7 +145,7 @@ HANDLE_RET_NULL = """\
                 object ret = null;
                 if (retptr == IntPtr.Zero)
                 {
-                    if (this.mapper.LastException == null)
+                    if (!this.mapper.HasPendingError)
                     {
                         this.mapper.LastException = %s;
                     }
@@ -158,7 +156,7 @@ HANDLE_RET_NULL = """\
                     this.mapper.DecRef(retptr);
                 }"""
 
-DEFAULT_HANDLE_RETPTR = HANDLE_RET_NULL % 'new NullReferenceException(key)'
+DEFAULT_HANDLE_RETPTR = HANDLE_RET_NULL % 'new NullReferenceException(this.slots.names[slot])'
 
 ITERNEXT_HANDLE_RETPTR = HANDLE_RET_NULL % 'PythonOps.StopIteration()'
 
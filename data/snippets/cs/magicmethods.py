@@ -54,25 +54,25 @@ SWAP_YES_CODE = """
 MAGICMETHOD_TEMPLATE2 = """
 def {0}(%(arglist)s):
     '''{1}'''
-    return _0._dispatcher.%(functype)s('{2}{0}', %(callargs)s)
+    return _0._dispatcher.%(functype)s({2}, %(callargs)s)
 _ironclad_class_attrs['{0}'] = {0}"""
 
 SQUISHKWARGS_TEMPLATE2 = """
 def {0}(self, *args, **kwargs):
     '''{1}'''
-    return self._dispatcher.%(functype)s('{2}{0}', self, args, kwargs)
+    return self._dispatcher.%(functype)s({2}, self, args, kwargs)
 _ironclad_class_attrs['{0}'] = {0}"""
 
 POW_TEMPLATE2 = """
 def {0}(self, other, modulo=None):
     '''{1}'''
-    return self._dispatcher.%(functype)s('{2}{0}', self, other, modulo)
+    return self._dispatcher.%(functype)s({2}, self, other, modulo)
 _ironclad_class_attrs['{0}'] = {0}"""
 
 POW_SWAPPED_TEMPLATE2 = """
 def {0}(self, other):
     '''{1}'''
-    return self._dispatcher.%(functype)s('{2}{0}', other, self, None)
+    return self._dispatcher.%(functype)s({2}, other, self, None)
 _ironclad_class_attrs['{0}'] = {0}"""
 
 
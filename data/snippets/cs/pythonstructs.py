@@ -25,4 +25,36 @@ STRUCT_FIELD_TEMPLATE = """\
             public %(type)s %(name)s;"""
 
 
+#================================================================================================
+
+# typed accessors for the hottest fields, so callers needn't go through Marshal.OffsetOf
+
+STRUCT_REF_TEMPLATE = """\
+        public static class %(name)sRef
+        {
+%(offsets)s
+
+%(accessors)s
+        }"""
+
+STRUCT_REF_OFFSET_TEMPLATE = """\
+            public static readonly int %(accessor)sOffset = (int)Marshal.OffsetOf(typeof(%(struct)s), "%(name)s");"""
+
+STRUCT_REF_ACCESSOR_TEMPLATE = """\
+            public static %(type)s %(accessor)s(IntPtr ptr) { return CPyMarshal.Read%(suffix)s(CPyMarshal.Offset(ptr, %(accessor)sOffset)); }
+            public static void %(accessor)s(IntPtr ptr, %(type)s value) { CPyMarshal.Write%(suffix)s(CPyMarshal.Offset(ptr, %(accessor)sOffset), value); }"""
+
+# only these managed types have CPyMarshal Read/Write functions
+STRUCT_REF_ACCESSOR_SUFFIXES = {
+    'IntPtr': 'Ptr',
+    'int': 'Int',
+    'uint': 'UInt',
+    'double': 'Double',
+    'byte': 'Byte',
+}
+
+# stripped from field names to make accessor names: ob_refcnt -> Refcnt
+STRUCT_REF_FIELD_PREFIXES = ('ob_', 'tp_', 'ml_', 'nb_', 'sq_', 'mp_', 'bf_', 'im_', 'cl_', 'in_', 'func_', 'f_')
+
+
 #================================================================================================
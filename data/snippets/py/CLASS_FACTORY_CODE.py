@@ -0,0 +1,15 @@
+
+def _ironclad_make_class(_ironclad_name, _ironclad_module, _ironclad_doc, _ironclad_new_slot):
+    def __new__(cls, *args, **kwargs):
+        return cls._dispatcher.newfunc(_ironclad_new_slot, cls, args, kwargs)
+
+    def __del__(self):
+        self._dispatcher.ic_destroy(_ironclad_name, self)
+
+    _ironclad_class_attrs['__new__'] = __new__
+    _ironclad_class_attrs['__del__'] = __del__
+
+    _ironclad_class = _ironclad_metaclass(_ironclad_name, _ironclad_bases, _ironclad_class_attrs)
+    _ironclad_class.__doc__ = _ironclad_doc
+    _ironclad_class.__module__ = _ironclad_module
+    return _ironclad_class
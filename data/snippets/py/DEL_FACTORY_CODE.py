@@ -0,0 +1,5 @@
+
+def _ironclad_make_del(_ironclad_name):
+    def __del__(self):
+        self._dispatcher.ic_destroy(_ironclad_name, self)
+    return __del__
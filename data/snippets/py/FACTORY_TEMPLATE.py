@@ -0,0 +1,8 @@
+
+def _ironclad_build(_ironclad_slots, _ironclad_closures, _dispatcher, _ironclad_module_name):
+    _ironclad_class_attrs = dict()
+    _ironclad_module_attrs = dict()
+{0}
+    for _ironclad_function in _ironclad_module_attrs.values():
+        _ironclad_function.__module__ = _ironclad_module_name
+    return {1}
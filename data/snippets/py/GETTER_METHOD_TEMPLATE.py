@@ -1,4 +1,4 @@
 
 def _ironclad_getter(self):
-    return self._dispatcher.getter('{1}{0}', self, IntPtr({2}))
+    return self._dispatcher.getter({1}, self, {2})
 _ironclad_class_attrs['{0}'] = _ironclad_getter
@@ -0,0 +1,4 @@
+
+_ironclad_module = __import__(_ironclad_import_name)
+for _ironclad_part in _ironclad_import_name.split(".")[1:]:
+    _ironclad_module = getattr(_ironclad_module, _ironclad_part)
\ No newline at end of file
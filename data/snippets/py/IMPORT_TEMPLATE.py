@@ -1,2 +0,0 @@
-
-import {0} as _ironclad_module
\ No newline at end of file
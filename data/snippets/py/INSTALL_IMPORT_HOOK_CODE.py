@@ -3,23 +3,80 @@
 # should depend on anything in this namespace; if you want to use it,
 # make sure it's tacked onto an instance.
 
-class Loader(object):
+class PydIndex(object):
+    # Saves us from statting <dir>/<name>.pyd for every directory on the path, for
+    # every import: each directory is listed once, and only listed again when its
+    # mtime changes. Names are matched case-insensitively, as isfile would on Windows.
+    # Also remembers which module came from which .pyd.
 
-    def __init__(self, mapper, path):
-        self.mapper = mapper
-        self.path = path
+    def __init__(self):
+        self.dirs = {}
+        self.modules = {}
 
-    def load_module(self, name):
+    def find(self, d, name):
+        import os
+        if not os.path.isabs(d):
+            d = os.path.abspath(d)
+        try:
+            mtime = os.stat(d).st_mtime
+        except (OSError, IOError):
+            return None
+        
+        entry = self.dirs.get(d)
+        if entry is None or entry[0] != mtime:
+            entry = (mtime, self.list_pyds(d))
+            self.dirs[d] = entry
+        return entry[1].get(name.lower())
+
+    def list_pyds(self, d):
+        import os
+        pyds = {}
+        try:
+            filenames = os.listdir(d)
+        except (OSError, IOError):
+            return pyds
+        for filename in filenames:
+            name, ext = os.path.splitext(filename)
+            if ext.lower() == '.pyd':
+                pyds[name.lower()] = os.path.join(d, filename)
+        return pyds
+
+    def get_module(self, pyd):
         import os, sys
+        module = self.modules.get(pyd)
+        if module is not None and sys.modules.get(module.__name__) is module:
+            return module
         
+        # the .pyd may have been loaded some other way, or under another name
         for m in sys.modules.values():
             if hasattr(m, '__file__'):
-                if os.path.abspath(m.__file__) == os.path.abspath(self.path):
+                if os.path.abspath(m.__file__) == pyd:
+                    self.modules[pyd] = m
                     return m
+        return None
+
+    def add_module(self, pyd, module):
+        self.modules[pyd] = module
+
+
+class Loader(object):
+
+    def __init__(self, mapper, path, index):
+        self.mapper = mapper
+        self.path = path
+        self.index = index
+
+    def load_module(self, name):
+        import sys
+        
+        module = self.index.get_module(self.path)
+        if module is not None:
+            return module
         
         if name not in sys.modules:
             self.mapper.LoadModule(self.path, name)
             sys.modules[name] = self.mapper.GetModule(name)
+        self.index.add_module(self.path, sys.modules[name])
         return sys.modules[name]
 
 
@@ -28,6 +85,7 @@ class MetaImporter(object):
     def __init__(self, loader, mapper):
         self.loader = loader
         self.mapper = mapper
+        self.index = PydIndex()
         self.patched_for_h5py = False
         
     def find_module(self, fullname, path=None):
@@ -38,13 +96,12 @@ class MetaImporter(object):
             # _ctypes.pyd will mask ipy _ctypes, I think
             return None
         
-        import os
         import sys
         lastname = fullname.rsplit('.', 1)[-1]
         for d in (path or sys.path):
-            pyd = os.path.join(d, lastname + '.pyd')
-            if os.path.isfile(pyd):
-                return self.loader(self.mapper, pyd)
+            pyd = self.index.find(d, lastname)
+            if pyd is not None:
+                return self.loader(self.mapper, pyd, self.index)
 
         return None
 
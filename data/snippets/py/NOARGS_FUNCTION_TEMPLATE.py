@@ -1,4 +1,5 @@
 
 def {0}():
     '''{1}'''
-    return _dispatcher.ic_function_noargs('{2}{0}')
+    return _dispatcher.ic_function_noargs({2})
+_ironclad_module_attrs['{0}'] = {0}
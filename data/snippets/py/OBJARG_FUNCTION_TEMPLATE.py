@@ -1,4 +1,5 @@
 
 def {0}(arg):
     '''{1}'''
-    return _dispatcher.ic_function_objarg('{2}{0}', arg)
+    return _dispatcher.ic_function_objarg({2}, arg)
+_ironclad_module_attrs['{0}'] = {0}
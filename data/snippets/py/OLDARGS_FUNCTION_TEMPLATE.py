@@ -2,5 +2,6 @@
 def {0}(*args):
     '''{1}'''
     if len(args) == 1:
-        return _dispatcher.ic_function_objarg('{2}{0}', args[0])
-    return _dispatcher.ic_function_varargs('{2}{0}', args)
+        return _dispatcher.ic_function_objarg({2}, args[0])
+    return _dispatcher.ic_function_varargs({2}, args)
+_ironclad_module_attrs['{0}'] = {0}
@@ -1,4 +1,5 @@
 
 def {0}(*args):
     '''{1}'''
-    return _dispatcher.ic_function_varargs('{2}{0}', args)
+    return _dispatcher.ic_function_varargs({2}, args)
+_ironclad_module_attrs['{0}'] = {0}
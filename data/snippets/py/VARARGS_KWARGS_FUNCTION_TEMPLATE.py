@@ -1,4 +1,5 @@
 
 def {0}(*args, **kwargs):
     '''{1}'''
-    return _dispatcher.ic_function_kwargs('{2}{0}', args, kwargs)
+    return _dispatcher.ic_function_kwargs({2}, args, kwargs)
+_ironclad_module_attrs['{0}'] = {0}
@@ -1,5 +1,5 @@
 
 def {0}(self, *args, **kwargs):
     '''{1}'''
-    return self._dispatcher.ic_method_kwargs('{2}{0}', self, args, kwargs)
+    return self._dispatcher.ic_method_kwargs({2}, self, args, kwargs)
 _ironclad_class_attrs['{0}'] = {0}
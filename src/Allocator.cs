@@ -27,9 +27,12 @@ namespace Ironclad
         public virtual IntPtr
         Realloc(IntPtr oldptr, uint bytes)
         {
-            IntPtr newptr = Marshal.ReAllocHGlobal(oldptr, (IntPtr)bytes);    
-            this.allocated.SetRemove(oldptr);        
-            this.allocated.Add(newptr);
+            IntPtr newptr = Marshal.ReAllocHGlobal(oldptr, (IntPtr)bytes);
+            if (newptr != oldptr)
+            {
+                this.allocated.SetRemove(oldptr);
+                this.allocated.Add(newptr);
+            }
             return newptr;
         }
         
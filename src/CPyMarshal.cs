@@ -1,5 +1,6 @@
 using System;
 using System.Runtime.InteropServices;
+using System.Text;
 
 namespace Ironclad
 {
@@ -20,6 +21,8 @@ namespace Ironclad
         public const int IntSize = 4;
         public const int DoubleSize = 8;
 
+        private static readonly Encoding Latin1 = Encoding.GetEncoding(28591);
+
         public static void
         Zero(IntPtr start, int bytes)
         {
@@ -242,5 +245,56 @@ namespace Ironclad
         {
             return Marshal.ReadByte(address);
         }
+
+        public static unsafe int
+        Strlen(IntPtr address)
+        {
+            byte* start = (byte*)address;
+            byte* end = start;
+            while (*end != 0)
+            {
+                end++;
+            }
+            return (int)(end - start);
+        }
+
+        public static unsafe string
+        ReadLatin1String(IntPtr address, int length)
+        {
+            // latin-1 maps each byte to the char with the same value, so this is a single
+            // widening pass straight into the new string
+            return new string((sbyte*)address, 0, length, Latin1);
+        }
+
+        public static unsafe bool
+        Latin1StringEquals(IntPtr address, string value)
+        {
+            // true if address holds exactly value, null terminator and all
+            byte* src = (byte*)address;
+            int length = value.Length;
+            for (int i = 0; i < length; i++)
+            {
+                if (src[i] != value[i])
+                {
+                    return false;
+                }
+            }
+            return src[length] == 0;
+        }
+
+        public static unsafe void
+        WriteLatin1String(IntPtr address, string value)
+        {
+            // chars over 255 are truncated, as they always have been
+            fixed (char* src = value)
+            {
+                byte* dst = (byte*)address;
+                int length = value.Length;
+                for (int i = 0; i < length; i++)
+                {
+                    dst[i] = (byte)src[i];
+                }
+            }
+        }
     }
 }
@@ -1,4 +1,5 @@
 using System;
+using System.Collections.Generic;
 using System.Text;
 using System.Runtime.InteropServices;
 
@@ -11,10 +12,10 @@ namespace Ironclad
     internal static class CallableBuilder
     {
         public static void
-        GenerateFunctions(StringBuilder code, IntPtr methods, PythonDictionary methodTable)
+        GenerateFunctions(StringBuilder code, IntPtr methods, PythonDictionary methodTable, DispatchTable dispatchTable, List<object> slots)
         {
             GenerateCallablesFromMethodDefs(
-                code, methods, methodTable, "",
+                code, methods, methodTable, dispatchTable, "", slots,
                 CodeSnippets.OLDARGS_FUNCTION_TEMPLATE,
                 CodeSnippets.NOARGS_FUNCTION_TEMPLATE,
                 CodeSnippets.OBJARG_FUNCTION_TEMPLATE,
@@ -44,11 +45,55 @@ namespace Ironclad
             __module__ = module;
         }
 
+        public static string
+        BuildFactory(StringBuilder code, int slotCount, int closureCount, string attrs)
+        {
+            // wraps generated code in a factory which takes the things that change from one
+            // process to the next as arguments (see CodeCache), and returns the attrs dict
+            StringBuilder body = new StringBuilder();
+            for (int i = 0; i < slotCount; i++)
+            {
+                body.AppendFormat("\n_ironclad_slot{0} = _ironclad_slots[{0}]", i);
+            }
+            for (int i = 0; i < closureCount; i++)
+            {
+                body.AppendFormat("\n_ironclad_closure{0} = _ironclad_closures[{0}]", i);
+            }
+            body.Append(code.ToString());
+            return String.Format(CodeSnippets.FACTORY_TEMPLATE, body.Replace("\n", "\n    "), attrs);
+        }
+
+        public static string
+        SlotArg(List<object> slots, int slot)
+        {
+            slots.Add(slot);
+            return String.Format("_ironclad_slot{0}", slots.Count - 1);
+        }
+
+        public static string
+        ClosureArg(List<object> closures, IntPtr closure)
+        {
+            closures.Add(closure);
+            return String.Format("_ironclad_closure{0}", closures.Count - 1);
+        }
+
+        public static string
+        DocLiteral(string doc)
+        {
+            // docs go inside ''' quotes; escaping them keeps them on one line, so they
+            // survive being indented into a factory, and lets them contain quotes
+            if (doc == null)
+            {
+                return "";
+            }
+            return doc.Replace("\\", "\\\\").Replace("'", "\\'").Replace("\r", "\\r").Replace("\n", "\\n");
+        }
+
         public static void
-        GenerateMethods(StringBuilder code, IntPtr methods, PythonDictionary methodTable, string tablePrefix)
+        GenerateMethods(StringBuilder code, IntPtr methods, PythonDictionary methodTable, DispatchTable dispatchTable, string tablePrefix, List<object> slots)
         {
             GenerateCallablesFromMethodDefs(
-                code, methods, methodTable, tablePrefix,
+                code, methods, methodTable, dispatchTable, tablePrefix, slots,
                 CodeSnippets.OLDARGS_METHOD_TEMPLATE,
                 CodeSnippets.NOARGS_METHOD_TEMPLATE,
                 CodeSnippets.OBJARG_METHOD_TEMPLATE,
@@ -60,7 +105,9 @@ namespace Ironclad
         GenerateCallablesFromMethodDefs(StringBuilder code,
                         IntPtr methods,
                         PythonDictionary methodTable,
+                        DispatchTable dispatchTable,
                         string tablePrefix,
+                        List<object> slots,
                         string oldargsTemplate,
                         string noargsTemplate,
                         string objargTemplate,
@@ -129,9 +176,10 @@ namespace Ironclad
 
                 if (!unsupportedFlags)
                 {
-                    code.Append(String.Format(template,
-                        name, thisMethod.ml_doc, tablePrefix));
                     methodTable[tablePrefix + name] = dgt;
+                    int slot = dispatchTable.Add(tablePrefix + name, dgt);
+                    code.Append(String.Format(template,
+                        name, DocLiteral(thisMethod.ml_doc), SlotArg(slots, slot)));
                 }
                 else
                 {
@@ -1,4 +1,5 @@
 using System;
+using System.Collections.Generic;
 using System.Text;
 using System.Runtime.InteropServices;
 
@@ -11,25 +12,31 @@ namespace Ironclad
     internal class ClassBuilder
     {
         public StringBuilder code = new StringBuilder();
+        public string factoryCode = null;
+        public List<object> slots = new List<object>();
+        public List<object> closures = new List<object>();
         public PythonDictionary methodTable = new PythonDictionary();
+        public DispatchTable dispatchTable = null;
 
         public IntPtr ptr = IntPtr.Zero;
         public string tablePrefix = null;
         public string __name__ = null;
         public string __module__ = null;
         public string tp_name = null;
+        public string __doc__ = null;
+        public int tp_newSlot = -1;
 
-        private readonly string[] EASY_TYPE_FIELDS = new string[] { 
+        internal static readonly string[] EASY_TYPE_FIELDS = new string[] { 
             "tp_init", "tp_call", "tp_repr", "tp_str", "tp_compare", "tp_hash", 
             "tp_getattr", "tp_iter", "tp_iternext"
         };
-        private readonly string[] MP_FIELDS = new string[] { 
+        internal static readonly string[] MP_FIELDS = new string[] { 
             "mp_subscript", "mp_ass_subscript", "mp_length" 
         };
-        private readonly string[] SQ_FIELDS = new string[] { 
+        internal static readonly string[] SQ_FIELDS = new string[] { 
             "sq_item", "sq_concat", "sq_ass_item", "sq_length", "sq_slice", "sq_ass_slice", "sq_contains" 
         };
-        private readonly string[] NB_FIELDS = new string[] { 
+        internal static readonly string[] NB_FIELDS = new string[] { 
             "nb_add", "nb_subtract", "nb_multiply", "nb_divide", "nb_true_divide", 
               "nb_floor_divide", "nb_remainder", "nb_divmod", 
             "nb_lshift", "nb_rshift", "nb_and", "nb_xor", "nb_or", 
@@ -42,9 +49,10 @@ namespace Ironclad
             "nb_power", "nb_inplace_power",
         };
 
-        public ClassBuilder(IntPtr typePtr)
+        public ClassBuilder(IntPtr typePtr, DispatchTable dispatchTable)
         {
             this.ptr = typePtr;
+            this.dispatchTable = dispatchTable;
             this.Build();
         }
 
@@ -58,8 +66,8 @@ namespace Ironclad
             this.GenerateMagicMethods(); // } This order of calls effectively treats all methods as having the
             this.GenerateMethods();      // } COEXIST flag set; swap would be equivalent to it never being set.
             this.GenerateClass();
-            
-            this.code.Append(CodeSnippets.CLASS_STUB_CODE);
+            this.factoryCode = CallableBuilder.BuildFactory(
+                this.code, this.slots.Count, this.closures.Count, "_ironclad_class_attrs");
         }
 
         private void
@@ -68,15 +76,15 @@ namespace Ironclad
             this.tp_name = CPyMarshal.ReadCStringField(this.ptr, typeof(PyTypeObject), "tp_name");
             CallableBuilder.ExtractNameModule(this.tp_name, ref this.__name__, ref this.__module__);
             this.tablePrefix = this.__name__ + ".";
-            this.code.Append("_ironclad_class_attrs = dict()");
         }
 
         private void
         GenerateClass()
         {
-            string __doc__ = CPyMarshal.ReadCStringField(this.ptr, typeof(PyTypeObject), "tp_doc").Replace("\\", "\\\\");
-            this.code.Append(String.Format(CodeSnippets.CLASS_TEMPLATE, this.__name__, this.__module__, __doc__));
-            this.ConnectTypeField("tp_new", typeof(dgt_ptr_ptrptrptr));
+            // the class itself is made by CLASS_FACTORY_CODE, which is the same for every
+            // type, so the mapper can run it from the CodeCache with these values
+            this.__doc__ = CPyMarshal.ReadCStringField(this.ptr, typeof(PyTypeObject), "tp_doc");
+            this.tp_newSlot = this.ConnectTypeField("tp_new", typeof(dgt_ptr_ptrptrptr));
         }
 
         private void
@@ -115,7 +123,7 @@ namespace Ironclad
         GenerateMethods()
         {
             IntPtr methodsPtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), "tp_methods");
-            CallableBuilder.GenerateMethods(this.code, methodsPtr, this.methodTable, this.tablePrefix);
+            CallableBuilder.GenerateMethods(this.code, methodsPtr, this.methodTable, this.dispatchTable, this.tablePrefix, this.slots);
         }
 
         private void
@@ -140,29 +148,29 @@ namespace Ironclad
             if (getset.get != IntPtr.Zero)
             {
                 getname = String.Format("__get_{0}", getset.name);
-                this.code.Append(String.Format(CodeSnippets.GETTER_METHOD_TEMPLATE, getname, this.tablePrefix, getset.closure));
-
                 dgt_ptr_ptrptr dgt = (dgt_ptr_ptrptr)
                     Marshal.GetDelegateForFunctionPointer(
                         getset.get, typeof(dgt_ptr_ptrptr));
-                this.methodTable[this.tablePrefix + getname] = dgt;
+                int slot = this.AddSlot(getname, dgt);
+                this.code.Append(String.Format(CodeSnippets.GETTER_METHOD_TEMPLATE, getname,
+                    CallableBuilder.SlotArg(this.slots, slot), CallableBuilder.ClosureArg(this.closures, getset.closure)));
             }
 
             if (getset.set != IntPtr.Zero)
             {
                 setname = String.Format("__set_{0}", getset.name);
-                this.code.Append(String.Format(CodeSnippets.SETTER_METHOD_TEMPLATE, setname, this.tablePrefix, getset.closure));
-
                 dgt_int_ptrptrptr dgt = (dgt_int_ptrptrptr)
                     Marshal.GetDelegateForFunctionPointer(
                         getset.set, typeof(dgt_int_ptrptrptr));
-                this.methodTable[this.tablePrefix + setname] = dgt;
+                int slot = this.AddSlot(setname, dgt);
+                this.code.Append(String.Format(CodeSnippets.SETTER_METHOD_TEMPLATE, setname,
+                    CallableBuilder.SlotArg(this.slots, slot), CallableBuilder.ClosureArg(this.closures, getset.closure)));
             }
 
-            this.code.Append(String.Format(CodeSnippets.PROPERTY_CODE, getset.name, getset.doc));
+            this.code.Append(String.Format(CodeSnippets.PROPERTY_CODE, getset.name, CallableBuilder.DocLiteral(getset.doc)));
         }
 
-        private static bool
+        internal static bool
         TryGetMemberMethodInfix(MemberT type, ref string suffix)
         {
             switch (type)
@@ -219,7 +227,7 @@ namespace Ironclad
                     setname = String.Format("__set_{0}", member.name);
                     this.code.Append(String.Format(CodeSnippets.MEMBER_SETTER_TEMPLATE, setname, member.offset, infix));
                 }
-                this.code.Append(String.Format(CodeSnippets.PROPERTY_CODE, member.name, member.doc));
+                this.code.Append(String.Format(CodeSnippets.PROPERTY_CODE, member.name, CallableBuilder.DocLiteral(member.doc)));
             }
             else
             {
@@ -251,14 +259,14 @@ namespace Ironclad
                     Type dgtType;
                     bool needGetSwappedInfo;
                     MagicMethods.GetInfo(field, out name, out template, out dgtType, out needGetSwappedInfo);
-                    this.methodTable[this.tablePrefix + name] = CPyMarshal.ReadFunctionPtrField(protocolPtr, protocol, field, dgtType);
-                    this.code.Append(String.Format(template, name, "", this.tablePrefix));
+                    int slot = this.AddSlot(name, CPyMarshal.ReadFunctionPtrField(protocolPtr, protocol, field, dgtType));
+                    this.code.Append(String.Format(template, name, "", CallableBuilder.SlotArg(this.slots, slot)));
 
                     if (needGetSwappedInfo)
                     {
                         MagicMethods.GetSwappedInfo(field, out name, out template, out dgtType);
-                        this.methodTable[this.tablePrefix + name] = CPyMarshal.ReadFunctionPtrField(protocolPtr, protocol, field, dgtType); ;
-                        this.code.Append(String.Format(template, name, "", this.tablePrefix));
+                        slot = this.AddSlot(name, CPyMarshal.ReadFunctionPtrField(protocolPtr, protocol, field, dgtType));
+                        this.code.Append(String.Format(template, name, "", CallableBuilder.SlotArg(this.slots, slot)));
                     }
                 }
             }
@@ -269,8 +277,8 @@ namespace Ironclad
         {
             if (CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), "tp_richcompare") != IntPtr.Zero)
             {
-                this.code.Append(String.Format(CodeSnippets.RICHCMP_METHOD_TEMPLATE, tablePrefix));
-                this.ConnectTypeField("tp_richcompare", typeof(dgt_ptr_ptrptrint));
+                int slot = this.ConnectTypeField("tp_richcompare", typeof(dgt_ptr_ptrptrint));
+                this.code.Append(String.Format(CodeSnippets.RICHCMP_METHOD_TEMPLATE, CallableBuilder.SlotArg(this.slots, slot)));
             }
         }
         
@@ -286,14 +294,28 @@ namespace Ironclad
         }
 
 
-        private void
+        private int
         ConnectTypeField(string fieldName, Type dgtType)
         {
+            Delegate dgt = null;
             if (CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), fieldName) != IntPtr.Zero)
             {
-                Delegate dgt = CPyMarshal.ReadFunctionPtrField(this.ptr, typeof(PyTypeObject), fieldName, dgtType);
-                this.methodTable[this.tablePrefix + fieldName] = dgt;
+                dgt = CPyMarshal.ReadFunctionPtrField(this.ptr, typeof(PyTypeObject), fieldName, dgtType);
+            }
+            return this.AddSlot(fieldName, dgt);
+        }
+
+        private int
+        AddSlot(string name, Delegate dgt)
+        {
+            // a null dgt still gets a slot, so the generated code has something to refer to;
+            // it just won't appear in methodTable
+            string key = this.tablePrefix + name;
+            if (dgt != null)
+            {
+                this.methodTable[key] = dgt;
             }
+            return this.dispatchTable.Add(key, dgt);
         }
     }
 }
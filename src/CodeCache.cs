@@ -0,0 +1,347 @@
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Reflection;
+using System.Security.Cryptography;
+using System.Text;
+
+using IronPython.Modules;
+using IronPython.Runtime;
+
+using Microsoft.Scripting;
+using Microsoft.Scripting.Runtime;
+
+namespace Ironclad
+{
+    public class CodeCache
+    {
+        // Compiled forms of snippets which we execute over and over again (the class stub
+        // code, for example, runs once for every type we see); each is compiled the first
+        // time it's needed, and the compiled code is rerun in whatever scope it's needed in
+        // thereafter. Code which only ever runs once doesn't belong in here.
+        //
+        // The code generated for each type and module is cached too, by its source. It
+        // defines a factory, _ironclad_build, which takes everything that varies from one
+        // process to the next (dispatch slots, getset closures) as arguments, so the same
+        // type always generates the same source; when Directory is set, the code generated
+        // while a pyd is being imported is also kept on disk (see CodeCacheBucket), and
+        // later processes load it precompiled instead of compiling it again.
+        private PythonContext python;
+        private Dictionary<string, ScriptCode> compiled = new Dictionary<string, ScriptCode>();
+        private Dictionary<string, object> factories = new Dictionary<string, object>();
+        private Dictionary<string, CodeCacheBucket> buckets = new Dictionary<string, CodeCacheBucket>();
+        private string directory = null;
+        private long hits = 0;
+        private long misses = 0;
+        private long diskHits = 0;
+        private long diskMisses = 0;
+
+        public CodeCache(PythonContext python)
+        {
+            this.python = python;
+        }
+
+        public int Count { get { return this.compiled.Count + this.factories.Count; } }
+        public long Hits { get { return this.hits; } }
+        public long Misses { get { return this.misses; } }
+        public long DiskHits { get { return this.diskHits; } }
+        public long DiskMisses { get { return this.diskMisses; } }
+
+        public string
+        Directory
+        {
+            // where generated code is kept between processes; null keeps it in memory only
+            get { return this.directory; }
+            set
+            {
+                this.Flush();
+                this.buckets.Clear();
+                this.directory = value;
+            }
+        }
+
+        public void
+        Exec(string code, Scope scope)
+        {
+            ScriptCode script;
+            if (this.compiled.TryGetValue(code, out script))
+            {
+                this.hits += 1;
+            }
+            else
+            {
+                this.misses += 1;
+                script = this.python.CreateSnippet(code, SourceCodeKind.Statements).Compile();
+                this.compiled[code] = script;
+            }
+            script.Run(scope);
+        }
+
+        public object
+        GetFactory(string code, string pydPath)
+        {
+            // a miss here may still be a hit on disk; pydPath is the pyd which was being
+            // imported when the code was generated, or null if there wasn't one
+            object factory;
+            if (this.factories.TryGetValue(code, out factory))
+            {
+                this.hits += 1;
+                return factory;
+            }
+
+            this.misses += 1;
+            string unit = "_ironclad_" + Fingerprint(code);
+            CodeCacheBucket bucket = this.GetBucket(pydPath);
+            if (bucket != null)
+            {
+                factory = bucket.Load(unit);
+                if (factory != null)
+                {
+                    this.diskHits += 1;
+                }
+                else
+                {
+                    this.diskMisses += 1;
+                    bucket.Add(unit, code);
+                }
+            }
+            if (factory == null)
+            {
+                PythonDictionary globals = new PythonDictionary();
+                globals["__name__"] = unit;
+                this.python.CreateSnippet(code, SourceCodeKind.Statements).Execute(
+                    new Scope(new DictionaryWrapper((IDictionary<object, object>)globals)));
+                factory = globals["_ironclad_build"];
+            }
+            this.factories[code] = factory;
+            return factory;
+        }
+
+        public void
+        Flush()
+        {
+            // compiles anything new to disk; the mapper does this when it's disposed
+            foreach (CodeCacheBucket bucket in this.buckets.Values)
+            {
+                bucket.Flush();
+            }
+        }
+
+        public void
+        ResetCounters()
+        {
+            this.hits = 0;
+            this.misses = 0;
+            this.diskHits = 0;
+            this.diskMisses = 0;
+        }
+
+        private CodeCacheBucket
+        GetBucket(string pydPath)
+        {
+            if (this.directory == null || pydPath == null || !File.Exists(pydPath))
+            {
+                return null;
+            }
+            CodeCacheBucket bucket;
+            if (!this.buckets.TryGetValue(pydPath, out bucket))
+            {
+                bucket = new CodeCacheBucket(this.python, this.directory, pydPath);
+                this.buckets[pydPath] = bucket;
+            }
+            return bucket;
+        }
+
+        internal static string
+        Fingerprint(string text)
+        {
+            byte[] hash = SHA1.Create().ComputeHash(Encoding.UTF8.GetBytes(text));
+            return BitConverter.ToString(hash).Replace("-", "").ToLowerInvariant();
+        }
+    }
+
+
+    internal class CodeCacheBucket
+    {
+        // The generated code for a single pyd. It lives in a directory named for the pyd's
+        // file name, a hash of its full path, and its mtime, so a rebuilt pyd gets a fresh
+        // directory (and stale ones are deleted). Each factory's source is kept as <unit>.py;
+        // when there are new ones, Flush compiles all of them into <dir>_<N+1>.dll with
+        // clr.CompileModules, and then lists the units in that dll in <dir>_<N+1>.txt. Only
+        // the newest dll with a list is loaded, and older ones are deleted when nobody is
+        // using them. Anything which goes wrong just leaves the code in memory.
+        private PythonContext python;
+        private string name = null;
+        private string dir = null;
+        private int generation = 0;
+        private Dictionary<string, bool> loaded = new Dictionary<string, bool>();
+        private bool dirty = false;
+
+        public CodeCacheBucket(PythonContext python, string root, string pydPath)
+        {
+            this.python = python;
+            string fullPath = Path.GetFullPath(pydPath);
+            string prefix = String.Format("{0}_{1}_",
+                Path.GetFileNameWithoutExtension(fullPath),
+                CodeCache.Fingerprint(fullPath.ToLowerInvariant()).Substring(0, 8));
+            this.name = prefix + File.GetLastWriteTimeUtc(fullPath).Ticks.ToString();
+            try
+            {
+                Directory.CreateDirectory(root);
+                foreach (string stale in Directory.GetDirectories(root, prefix + "*"))
+                {
+                    if (Path.GetFileName(stale) != this.name)
+                    {
+                        TryDelete(stale);
+                    }
+                }
+                this.dir = Directory.CreateDirectory(Path.Combine(root, this.name)).FullName;
+                this.Open();
+            }
+            catch (Exception e)
+            {
+                Console.WriteLine("could not use code cache directory for {0}: {1}", pydPath, e.Message);
+                this.dir = null;
+            }
+        }
+
+        public object
+        Load(string unit)
+        {
+            if (!this.loaded.ContainsKey(unit))
+            {
+                return null;
+            }
+            CodeContext context = this.python.SharedContext;
+            PythonDictionary modules = (PythonDictionary)this.python.SystemState.Get__dict__()["modules"];
+            try
+            {
+                object module = Builtin.__import__(context, unit);
+                return Builtin.getattr(context, module, "_ironclad_build");
+            }
+            catch (Exception e)
+            {
+                Console.WriteLine("could not load {0} from code cache: {1}", unit, e.Message);
+                this.loaded.Remove(unit);
+                return null;
+            }
+            finally
+            {
+                // the factory is all we want; it mustn't look like a real module
+                modules.Remove(unit);
+            }
+        }
+
+        public void
+        Add(string unit, string code)
+        {
+            if (this.dir == null)
+            {
+                return;
+            }
+            try
+            {
+                File.WriteAllText(Path.Combine(this.dir, unit + ".py"), code);
+                this.dirty = true;
+            }
+            catch (IOException e)
+            {
+                Console.WriteLine("could not write {0} to code cache: {1}", unit, e.Message);
+            }
+        }
+
+        public void
+        Flush()
+        {
+            if (!this.dirty)
+            {
+                return;
+            }
+            this.dirty = false;
+
+            int next = this.generation + 1;
+            try
+            {
+                string[] sources = Directory.GetFiles(this.dir, "_ironclad_*.py");
+                ClrModule.CompileModules(this.python.SharedContext, this.GetPath(next, ".dll"),
+                    new Dictionary<string, object>(), sources);
+
+                string[] units = new string[sources.Length];
+                for (int i = 0; i < sources.Length; i++)
+                {
+                    units[i] = Path.GetFileNameWithoutExtension(sources[i]);
+                }
+                // written last, so a dll without one is never loaded
+                File.WriteAllLines(this.GetPath(next, ".txt"), units);
+                this.generation = next;
+            }
+            catch (Exception e)
+            {
+                Console.WriteLine("could not compile code cache in {0}: {1}", this.dir, e.Message);
+            }
+        }
+
+        private void
+        Open()
+        {
+            foreach (string list in Directory.GetFiles(this.dir, this.name + "_*.txt"))
+            {
+                int candidate;
+                string suffix = Path.GetFileNameWithoutExtension(list).Substring(this.name.Length + 1);
+                if (Int32.TryParse(suffix, out candidate) && candidate > this.generation &&
+                    File.Exists(this.GetPath(candidate, ".dll")))
+                {
+                    this.generation = candidate;
+                }
+            }
+            if (this.generation == 0)
+            {
+                return;
+            }
+
+            for (int older = 1; older < this.generation; older++)
+            {
+                TryDelete(this.GetPath(older, ".dll"));
+                TryDelete(this.GetPath(older, ".txt"));
+            }
+
+            // loading the assembly through the DomainManager is what makes IronPython
+            // register the modules inside it, so they can be imported
+            Assembly assembly = Assembly.LoadFile(this.GetPath(this.generation, ".dll"));
+            this.python.DomainManager.LoadAssembly(assembly);
+            foreach (string unit in File.ReadAllLines(this.GetPath(this.generation, ".txt")))
+            {
+                this.loaded[unit] = true;
+            }
+        }
+
+        private string
+        GetPath(int generation, string extension)
+        {
+            return Path.Combine(this.dir, String.Format("{0}_{1}{2}", this.name, generation, extension));
+        }
+
+        private static void
+        TryDelete(string path)
+        {
+            // another process may be using it; it'll get cleaned up next time
+            try
+            {
+                if (Directory.Exists(path))
+                {
+                    Directory.Delete(path, true);
+                }
+                else if (File.Exists(path))
+                {
+                    File.Delete(path);
+                }
+            }
+            catch (IOException)
+            {
+            }
+            catch (UnauthorizedAccessException)
+            {
+            }
+        }
+    }
+}
@@ -0,0 +1,322 @@
+using System;
+using System.Runtime.InteropServices;
+
+using IronPython.Modules;
+using IronPython.Runtime;
+using IronPython.Runtime.Operations;
+using IronPython.Runtime.Types;
+
+using Microsoft.Scripting.Runtime;
+
+using Ironclad.Structs;
+
+namespace Ironclad
+{
+    public enum ClassEngine
+    {
+        Generated,
+        Direct,
+    }
+
+    internal class DirectClassBuilder
+    {
+        // Builds the same class as ClassBuilder, but puts it together directly instead of
+        // generating and exec'ing python source: methods, properties, __new__ and rich
+        // comparisons are DispatcherCallables, and the class itself is made by calling the
+        // metaclass. Magic methods still need to be real python functions, so that they bind
+        // properly however IronPython looks them up; each kind is made by a small factory,
+        // compiled once through the CodeCache and called with the appropriate slot.
+        private const string MAKER_NAME = "_ironclad_make";
+
+        private Dispatcher dispatcher;
+        private CodeCache codeCache;
+        private Scope scratchScope;
+        private PythonDictionary scratchDict;
+        private CodeContext context;
+
+        public PythonDictionary attrs = new PythonDictionary();
+        public object klass = null;
+
+        public IntPtr ptr = IntPtr.Zero;
+        public string tablePrefix = null;
+        public string __name__ = null;
+        public string __module__ = null;
+
+        public DirectClassBuilder(IntPtr typePtr, Dispatcher dispatcher, CodeCache codeCache,
+                                  Scope scratchScope, PythonDictionary scratchDict, CodeContext context)
+        {
+            this.ptr = typePtr;
+            this.dispatcher = dispatcher;
+            this.codeCache = codeCache;
+            this.scratchScope = scratchScope;
+            this.scratchDict = scratchDict;
+            this.context = context;
+            this.Build();
+        }
+
+        private PythonDictionary
+        methodTable
+        {
+            get { return this.dispatcher.table; }
+        }
+
+        private void
+        Build()
+        {
+            string tp_name = CPyMarshal.ReadCStringField(this.ptr, typeof(PyTypeObject), "tp_name");
+            CallableBuilder.ExtractNameModule(tp_name, ref this.__name__, ref this.__module__);
+            this.tablePrefix = this.__name__ + ".";
+            this.scratchDict["_ironclad_class_attrs"] = this.attrs;
+
+            // same order as ClassBuilder; methods and rich comparisons can only be
+            // attached once the class exists, so we do those last, in the right order
+            this.BuildMembers();
+            this.BuildProperties();
+            this.BuildMagicMethods();
+            this.BuildClass();
+            this.BuildRichcmpMethods();
+            this.BuildMethods();
+        }
+
+        private void
+        BuildClass()
+        {
+            this.attrs["__new__"] = new staticmethod(
+                new DispatcherNew(this.dispatcher, this.ConnectTypeField("tp_new", typeof(dgt_ptr_ptrptrptr))));
+            this.codeCache.Exec(CodeSnippets.DEL_FACTORY_CODE, this.scratchScope);
+            this.attrs["__del__"] = PythonCalls.Call(this.context, this.scratchDict["_ironclad_make_del"], this.__name__);
+            this.attrs["__doc__"] = CPyMarshal.ReadCStringField(this.ptr, typeof(PyTypeObject), "tp_doc");
+            this.attrs["__module__"] = this.__module__;
+
+            this.klass = PythonCalls.Call(this.context, this.scratchDict["_ironclad_metaclass"],
+                this.__name__, this.scratchDict["_ironclad_bases"], this.attrs);
+        }
+
+        private void
+        BuildProperties()
+        {
+            IntPtr getsetPtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), "tp_getset");
+            if (getsetPtr == IntPtr.Zero)
+            {
+                return;
+            }
+
+            while (CPyMarshal.ReadInt(getsetPtr) != 0)
+            {
+                PyGetSetDef getset = (PyGetSetDef)Marshal.PtrToStructure(getsetPtr, typeof(PyGetSetDef));
+                object getter = null;
+                object setter = null;
+                if (getset.get != IntPtr.Zero)
+                {
+                    int slot = this.AddSlot(String.Format("__get_{0}", getset.name),
+                        Marshal.GetDelegateForFunctionPointer(getset.get, typeof(dgt_ptr_ptrptr)));
+                    getter = new DispatcherGetter(this.dispatcher, slot, getset.closure);
+                }
+                if (getset.set != IntPtr.Zero)
+                {
+                    int slot = this.AddSlot(String.Format("__set_{0}", getset.name),
+                        Marshal.GetDelegateForFunctionPointer(getset.set, typeof(dgt_int_ptrptrptr)));
+                    setter = new DispatcherSetter(this.dispatcher, slot, getset.closure);
+                }
+                this.attrs[getset.name] = this.MakeProperty(getter, setter, getset.doc);
+                getsetPtr = CPyMarshal.Offset(getsetPtr, Marshal.SizeOf(typeof(PyGetSetDef)));
+            }
+        }
+
+        private void
+        BuildMembers()
+        {
+            IntPtr memberPtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), "tp_members");
+            if (memberPtr == IntPtr.Zero)
+            {
+                return;
+            }
+
+            while (CPyMarshal.ReadInt(memberPtr) != 0)
+            {
+                PyMemberDef member = (PyMemberDef)Marshal.PtrToStructure(memberPtr, typeof(PyMemberDef));
+                string infix = null;
+                if (ClassBuilder.TryGetMemberMethodInfix((MemberT)member.type, ref infix))
+                {
+                    object getter = new DispatcherMemberGetter(
+                        Builtin.getattr(this.context, this.dispatcher, "get_" + infix), member.offset);
+                    object setter = null;
+                    if ((member.flags & 1) == 0 && (MemberT)member.type != MemberT.STRING)
+                    {
+                        setter = new DispatcherMemberSetter(
+                            Builtin.getattr(this.context, this.dispatcher, "set_" + infix), member.offset);
+                    }
+                    this.attrs[member.name] = this.MakeProperty(getter, setter, member.doc);
+                }
+                else
+                {
+                    Console.WriteLine("detected unsupported member type {0}; ignoring", (Py_TPFLAGS)member.type);
+                }
+                memberPtr = CPyMarshal.Offset(memberPtr, Marshal.SizeOf(typeof(PyMemberDef)));
+            }
+        }
+
+        private void
+        BuildMethods()
+        {
+            IntPtr methodPtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), "tp_methods");
+            if (methodPtr == IntPtr.Zero)
+            {
+                return;
+            }
+
+            while (CPyMarshal.ReadInt(methodPtr) != 0)
+            {
+                PyMethodDef thisMethod = (PyMethodDef)Marshal.PtrToStructure(methodPtr, typeof(PyMethodDef));
+                string name = thisMethod.ml_name;
+                Type dgtType = null;
+
+                // COEXIST flag ignored, as in CallableBuilder
+                METH flags = (METH)thisMethod.ml_flags & ~METH.COEXIST;
+                switch (flags)
+                {
+                    case METH.OLDARGS:
+                    case METH.NOARGS:
+                    case METH.O:
+                    case METH.VARARGS:
+                        dgtType = typeof(dgt_ptr_ptrptr);
+                        break;
+
+                    case METH.KEYWORDS:
+                    case METH.VARARGS | METH.KEYWORDS:
+                        dgtType = typeof(dgt_ptr_ptrptrptr);
+                        break;
+                }
+
+                if (dgtType != null)
+                {
+                    int slot = this.AddSlot(name, Marshal.GetDelegateForFunctionPointer(thisMethod.ml_meth, dgtType));
+                    this.SetMethod(name, new DispatcherMethod(this.dispatcher, slot, flags, name, thisMethod.ml_doc));
+                }
+                else
+                {
+                    Console.WriteLine("Detected unsupported method flags for {0}{1} ({2}); ignoring.",
+                        this.tablePrefix, name, thisMethod.ml_flags);
+                }
+
+                methodPtr = CPyMarshal.Offset(methodPtr, Marshal.SizeOf(typeof(PyMethodDef)));
+            }
+        }
+
+        private void
+        BuildMagicMethods()
+        {
+            this.BuildProtocolMagicMethods(this.ptr, typeof(PyTypeObject), ClassBuilder.EASY_TYPE_FIELDS);
+            this.BuildNamedProtocolMagicMethods("tp_as_sequence", typeof(PySequenceMethods), ClassBuilder.SQ_FIELDS);
+            this.BuildNamedProtocolMagicMethods("tp_as_mapping", typeof(PyMappingMethods), ClassBuilder.MP_FIELDS);
+            this.BuildNamedProtocolMagicMethods("tp_as_number", typeof(PyNumberMethods), ClassBuilder.NB_FIELDS);
+            this.UglyComplexHack();
+        }
+
+        private void
+        BuildNamedProtocolMagicMethods(string protocolName, Type protocolType, string[] fields)
+        {
+            IntPtr pPtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), protocolName);
+            this.BuildProtocolMagicMethods(pPtr, protocolType, fields);
+        }
+
+        private void
+        BuildProtocolMagicMethods(IntPtr protocolPtr, Type protocol, string[] fields)
+        {
+            if (protocolPtr == IntPtr.Zero)
+            {
+                return;
+            }
+
+            foreach (string field in fields)
+            {
+                if (CPyMarshal.ReadPtrField(protocolPtr, protocol, field) != IntPtr.Zero)
+                {
+                    string name;
+                    string template;
+                    Type dgtType;
+                    bool needGetSwappedInfo;
+                    MagicMethods.GetInfo(field, out name, out template, out dgtType, out needGetSwappedInfo);
+                    int slot = this.AddSlot(name, CPyMarshal.ReadFunctionPtrField(protocolPtr, protocol, field, dgtType));
+                    this.MakeMagicMethod(name, template, slot);
+
+                    if (needGetSwappedInfo)
+                    {
+                        MagicMethods.GetSwappedInfo(field, out name, out template, out dgtType);
+                        slot = this.AddSlot(name, CPyMarshal.ReadFunctionPtrField(protocolPtr, protocol, field, dgtType));
+                        this.MakeMagicMethod(name, template, slot);
+                    }
+                }
+            }
+        }
+
+        private void
+        MakeMagicMethod(string name, string template, int slot)
+        {
+            // the template adds the method to _ironclad_class_attrs itself
+            string body = String.Format(template, name, "", "_ironclad_slot");
+            string code = String.Format("\ndef {0}(_ironclad_slot):{1}\n", MAKER_NAME, body.Replace("\n", "\n    "));
+            this.codeCache.Exec(code, this.scratchScope);
+            PythonCalls.Call(this.context, this.scratchDict[MAKER_NAME], slot);
+        }
+
+        private void
+        BuildRichcmpMethods()
+        {
+            if (CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), "tp_richcompare") != IntPtr.Zero)
+            {
+                int slot = this.ConnectTypeField("tp_richcompare", typeof(dgt_ptr_ptrptrint));
+                string[] names = new string[] { "__lt__", "__le__", "__eq__", "__ne__", "__gt__", "__ge__" };
+                for (int op = 0; op < names.Length; op++)
+                {
+                    this.SetMethod(names[op], new DispatcherRichcmp(this.dispatcher, slot, op));
+                }
+            }
+        }
+
+        private void
+        UglyComplexHack()
+        {
+            if (this.methodTable.has_key(this.tablePrefix + "__get_real") &&
+                this.methodTable.has_key(this.tablePrefix + "__get_imag"))
+            {
+                this.codeCache.Exec(CodeSnippets.COMPLEX_HACK_CODE, this.scratchScope);
+            }
+        }
+
+        private object
+        MakeProperty(object getter, object setter, string doc)
+        {
+            return PythonCalls.Call(this.context, DynamicHelpers.GetPythonTypeFromType(typeof(PythonProperty)),
+                getter, setter, null, doc);
+        }
+
+        private void
+        SetMethod(string name, object callable)
+        {
+            Builtin.setattr(this.context, this.klass, name, new Method(callable, null, this.klass));
+        }
+
+        private int
+        ConnectTypeField(string fieldName, Type dgtType)
+        {
+            Delegate dgt = null;
+            if (CPyMarshal.ReadPtrField(this.ptr, typeof(PyTypeObject), fieldName) != IntPtr.Zero)
+            {
+                dgt = CPyMarshal.ReadFunctionPtrField(this.ptr, typeof(PyTypeObject), fieldName, dgtType);
+            }
+            return this.AddSlot(fieldName, dgt);
+        }
+
+        private int
+        AddSlot(string name, Delegate dgt)
+        {
+            string key = this.tablePrefix + name;
+            if (dgt != null)
+            {
+                this.methodTable[key] = dgt;
+            }
+            return this.dispatcher.slots.Add(key, dgt);
+        }
+    }
+}
@@ -0,0 +1,63 @@
+using System;
+
+namespace Ironclad
+{
+    public class DispatchTable
+    {
+        // Every delegate a Dispatcher can call is given a slot when its class or module
+        // is built, and the generated python code passes the slot number instead of a
+        // name; so, at call time, we just index an array. Slots are never reused, because
+        // subclasses and their bases all call through the same slots.
+        private const int INITIAL_SIZE = 256;
+
+        public Delegate[] delegates = new Delegate[INITIAL_SIZE];
+        public string[] names = new string[INITIAL_SIZE];
+        private int count = 0;
+
+        public int
+        Count
+        {
+            get { return this.count; }
+        }
+
+        public int
+        Add(string name, Delegate dgt)
+        {
+            if (this.count == this.delegates.Length)
+            {
+                this.Grow();
+            }
+            int slot = this.count;
+            this.delegates[slot] = dgt;
+            this.names[slot] = name;
+            this.count += 1;
+            return slot;
+        }
+
+        public Delegate
+        GetDelegate(int slot)
+        {
+            return this.delegates[slot];
+        }
+
+        public string
+        GetName(int slot)
+        {
+            return this.names[slot];
+        }
+
+        private void
+        Grow()
+        {
+            int size = this.delegates.Length * 2;
+            string[] names = new string[size];
+            Delegate[] delegates = new Delegate[size];
+            Array.Copy(this.names, names, this.count);
+            Array.Copy(this.delegates, delegates, this.count);
+
+            // names first, so nobody who can see a delegate is unable to see its name
+            this.names = names;
+            this.delegates = delegates;
+        }
+    }
+}
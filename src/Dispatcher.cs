@@ -12,6 +12,7 @@ namespace Ironclad
         // just pretend this is written in Python
         public PythonMapper mapper;
         public PythonDictionary table;
+        public DispatchTable slots;
         private IntPtr modulePtr;
         
         public Dispatcher(PythonMapper inMapper, PythonDictionary inTable) :
@@ -23,6 +24,7 @@ namespace Ironclad
         {
             this.mapper = inMapper;
             this.table = inTable;
+            this.slots = inMapper.DispatchTable;
             this.modulePtr = module;
         }
         
@@ -112,11 +114,9 @@ namespace Ironclad
                 this.mapper.DecRef(ptr0);
                 this.mapper.DecRef(ptr0);
                 this.mapper.Unmap(ptr0);
-                PythonExceptions.BaseException error = (PythonExceptions.BaseException)this.mapper.LastException;
-                if (error != null)
+                if (this.mapper.HasPendingError)
                 {
-                    this.mapper.LastException = null;
-                    throw error.clsException;
+                    throw this.mapper.FetchError();
                 }
             }
             catch (Exception e)
@@ -0,0 +1,204 @@
+using System;
+using System.Collections.Generic;
+
+using IronPython.Runtime;
+using IronPython.Runtime.Operations;
+
+using Microsoft.Scripting;
+using Microsoft.Scripting.Runtime;
+
+using Ironclad.Structs;
+
+namespace Ironclad
+{
+    // These are the callables DirectClassBuilder puts into classes in place of generated
+    // python functions: each one just forwards its arguments to the appropriate Dispatcher
+    // method. Anything which needs to bind to an instance gets wrapped in a Method.
+
+    public class DispatcherMethod
+    {
+        private Dispatcher dispatcher;
+        private int slot;
+        private METH flags;
+        private string name;
+        private string doc;
+
+        public DispatcherMethod(Dispatcher dispatcher, int slot, METH flags, string name, string doc)
+        {
+            this.dispatcher = dispatcher;
+            this.slot = slot;
+            this.flags = flags;
+            this.name = name;
+            this.doc = doc;
+        }
+
+        public string __name__ { get { return this.name; } }
+        public string __doc__ { get { return this.doc; } }
+
+        public object
+        __call__(object self, [ParamDictionary] IDictionary<object, object> kwargs, params object[] args)
+        {
+            if ((this.flags & METH.KEYWORDS) != 0)
+            {
+                PythonDictionary kwargsDict = new PythonDictionary();
+                foreach (KeyValuePair<object, object> kvp in kwargs)
+                {
+                    kwargsDict[kvp.Key] = kvp.Value;
+                }
+                return this.dispatcher.ic_method_kwargs(this.slot, self, new PythonTuple(args), kwargsDict);
+            }
+
+            if (kwargs.Count > 0)
+            {
+                throw PythonOps.TypeError("{0}() takes no keyword arguments", this.name);
+            }
+            switch (this.flags)
+            {
+                case METH.NOARGS:
+                    if (args.Length != 0)
+                    {
+                        throw PythonOps.TypeError("{0}() takes no arguments ({1} given)", this.name, args.Length);
+                    }
+                    return this.dispatcher.ic_method_noargs(this.slot, self);
+
+                case METH.O:
+                    if (args.Length != 1)
+                    {
+                        throw PythonOps.TypeError("{0}() takes exactly one argument ({1} given)", this.name, args.Length);
+                    }
+                    return this.dispatcher.ic_method_objarg(this.slot, self, args[0]);
+
+                case METH.OLDARGS:
+                    if (args.Length == 1)
+                    {
+                        return this.dispatcher.ic_method_objarg(this.slot, self, args[0]);
+                    }
+                    return this.dispatcher.ic_method_varargs(this.slot, self, new PythonTuple(args));
+
+                default:
+                    return this.dispatcher.ic_method_varargs(this.slot, self, new PythonTuple(args));
+            }
+        }
+    }
+
+    public class DispatcherNew
+    {
+        private Dispatcher dispatcher;
+        private int slot;
+
+        public DispatcherNew(Dispatcher dispatcher, int slot)
+        {
+            this.dispatcher = dispatcher;
+            this.slot = slot;
+        }
+
+        public object
+        __call__(object cls, [ParamDictionary] IDictionary<object, object> kwargs, params object[] args)
+        {
+            PythonDictionary kwargsDict = new PythonDictionary();
+            foreach (KeyValuePair<object, object> kvp in kwargs)
+            {
+                kwargsDict[kvp.Key] = kvp.Value;
+            }
+            return this.dispatcher.newfunc(this.slot, cls, new PythonTuple(args), kwargsDict);
+        }
+    }
+
+    public class DispatcherRichcmp
+    {
+        private Dispatcher dispatcher;
+        private int slot;
+        private int op;
+
+        public DispatcherRichcmp(Dispatcher dispatcher, int slot, int op)
+        {
+            this.dispatcher = dispatcher;
+            this.slot = slot;
+            this.op = op;
+        }
+
+        public object
+        __call__(object self, object other)
+        {
+            return this.dispatcher.richcmpfunc(this.slot, self, other, this.op);
+        }
+    }
+
+    public class DispatcherGetter
+    {
+        private Dispatcher dispatcher;
+        private int slot;
+        private IntPtr closure;
+
+        public DispatcherGetter(Dispatcher dispatcher, int slot, IntPtr closure)
+        {
+            this.dispatcher = dispatcher;
+            this.slot = slot;
+            this.closure = closure;
+        }
+
+        public object
+        __call__(object self)
+        {
+            return this.dispatcher.getter(this.slot, self, this.closure);
+        }
+    }
+
+    public class DispatcherSetter
+    {
+        private Dispatcher dispatcher;
+        private int slot;
+        private IntPtr closure;
+
+        public DispatcherSetter(Dispatcher dispatcher, int slot, IntPtr closure)
+        {
+            this.dispatcher = dispatcher;
+            this.slot = slot;
+            this.closure = closure;
+        }
+
+        public object
+        __call__(object self, object value)
+        {
+            return this.dispatcher.setter(this.slot, self, value, this.closure);
+        }
+    }
+
+    public class DispatcherMemberGetter
+    {
+        // get is a bound Dispatcher.get_whatever method
+        private object get;
+        private int offset;
+
+        public DispatcherMemberGetter(object get, int offset)
+        {
+            this.get = get;
+            this.offset = offset;
+        }
+
+        public object
+        __call__(object self)
+        {
+            return PythonCalls.Call(this.get, self, this.offset);
+        }
+    }
+
+    public class DispatcherMemberSetter
+    {
+        // set is a bound Dispatcher.set_whatever method
+        private object set;
+        private int offset;
+
+        public DispatcherMemberSetter(object set, int offset)
+        {
+            this.set = set;
+            this.offset = offset;
+        }
+
+        public void
+        __call__(object self, object value)
+        {
+            PythonCalls.Call(this.set, self, this.offset, value);
+        }
+    }
+}
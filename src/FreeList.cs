@@ -0,0 +1,72 @@
+using System;
+using System.Collections.Generic;
+
+namespace Ironclad
+{
+    public class FreeList
+    {
+        // Recycles fixed-size blocks which would otherwise go straight back to the
+        // allocator; the caller is responsible for only Freeing blocks of the right size.
+        private IAllocator allocator;
+        private uint size;
+        private int capacity = 0;
+        private Stack<IntPtr> ptrs = new Stack<IntPtr>();
+
+        private long hits = 0;
+        private long misses = 0;
+
+        public FreeList(IAllocator allocator, uint size)
+        {
+            this.allocator = allocator;
+            this.size = size;
+        }
+
+        public int
+        Capacity
+        {
+            get { return this.capacity; }
+            set
+            {
+                this.capacity = Math.Max(0, value);
+                while (this.ptrs.Count > this.capacity)
+                {
+                    this.allocator.Free(this.ptrs.Pop());
+                }
+            }
+        }
+
+        public int Count { get { return this.ptrs.Count; } }
+        public long Hits { get { return this.hits; } }
+        public long Misses { get { return this.misses; } }
+
+        public IntPtr
+        Alloc()
+        {
+            if (this.ptrs.Count > 0)
+            {
+                this.hits += 1;
+                return this.ptrs.Pop();
+            }
+            this.misses += 1;
+            return this.allocator.Alloc(this.size);
+        }
+
+        public void
+        Free(IntPtr ptr)
+        {
+            if (this.ptrs.Count < this.capacity)
+            {
+                this.ptrs.Push(ptr);
+                return;
+            }
+            this.allocator.Free(ptr);
+        }
+
+        public void
+        ResetCounters()
+        {
+            this.hits = 0;
+            this.misses = 0;
+        }
+    }
+}
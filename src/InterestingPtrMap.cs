@@ -21,58 +21,292 @@ namespace Ironclad
     
     public delegate void PtrFunc(IntPtr ptr);
     
+    internal enum MapEntryState : byte
+    {
+        Empty = 0,
+        Simple,
+        Bridge,
+    }
+
+    internal struct MapEntry
+    {
+        public IntPtr ptr;
+        public long id;
+        public object obj;          // always set for Simple; only set for Bridge while strong
+        public WeakReference wref;  // only set for Bridge
+        public MapEntryState state;
+
+        // bridge sweep bookkeeping
+        public byte generation;
+        public byte age;
+        public bool dirty;
+        public int listIndex;
+    }
+
+    public class BridgeSweepCounters
+    {
+        private long slices = 0;
+        private long fullSweeps = 0;
+        private long entriesChecked = 0;
+        private long promotions = 0;
+        private long demotions = 0;
+        private long lastPauseTicks = 0;
+        private long maxPauseTicks = 0;
+        private long totalPauseTicks = 0;
+
+        public long Slices { get { return this.slices; } }
+        public long FullSweeps { get { return this.fullSweeps; } }
+        public long EntriesChecked { get { return this.entriesChecked; } }
+        public long Promotions { get { return this.promotions; } }
+        public long Demotions { get { return this.demotions; } }
+
+        public double LastPauseMilliseconds { get { return TicksToMilliseconds(this.lastPauseTicks); } }
+        public double MaxPauseMilliseconds { get { return TicksToMilliseconds(this.maxPauseTicks); } }
+        public double TotalPauseMilliseconds { get { return TicksToMilliseconds(this.totalPauseTicks); } }
+
+        internal void
+        RecordPause(long ticks, int entriesChecked, bool full)
+        {
+            if (full)
+            {
+                this.fullSweeps += 1;
+            }
+            else
+            {
+                this.slices += 1;
+            }
+            this.entriesChecked += entriesChecked;
+            this.lastPauseTicks = ticks;
+            this.totalPauseTicks += ticks;
+            if (ticks > this.maxPauseTicks)
+            {
+                this.maxPauseTicks = ticks;
+            }
+        }
+
+        internal void
+        RecordPromotion()
+        {
+            this.promotions += 1;
+        }
+
+        internal void
+        RecordDemotion()
+        {
+            this.demotions += 1;
+        }
+
+        public void
+        Reset()
+        {
+            this.slices = 0;
+            this.fullSweeps = 0;
+            this.entriesChecked = 0;
+            this.promotions = 0;
+            this.demotions = 0;
+            this.lastPauseTicks = 0;
+            this.maxPauseTicks = 0;
+            this.totalPauseTicks = 0;
+        }
+
+        private static double
+        TicksToMilliseconds(long ticks)
+        {
+            return (ticks * 1000.0) / Stopwatch.Frequency;
+        }
+    }
+
     public class InterestingPtrMap
     {
-        private Dictionary<IntPtr, long> ptr2id = new Dictionary<IntPtr, long>();
+        // All ptr-keyed data lives in a single open-addressed (linear probing) table,
+        // so Store/Retrieve/IncRef/DecRef need only one probe sequence to find everything
+        // they care about; id2ptr is the only other index, and serves obj->ptr lookups.
+        private const int INITIAL_CAPACITY = 1024;
+
+        private MapEntry[] entries;
+        private int mask;
+        private int shift;
+        private int count = 0;
+        private int bridgeCount = 0;
+
         private Dictionary<long, IntPtr> id2ptr = new Dictionary<long, IntPtr>();
-        private Dictionary<long, object> id2obj = new Dictionary<long, object>();
 
-        private Dictionary<long, WeakReference> id2wref = new Dictionary<long, WeakReference>();
-        private Dictionary<long, object> id2sref = new Dictionary<long, object>();
+        // Bridge ptrs are swept incrementally: each CheckBridgePtrs(false) checks a slice of
+        // the young generation sized so that a full pass takes cbpRegulator calls, and a
+        // proportionally smaller slice of the old generation. Ptrs which stay strong for a
+        // few young passes are probably owned by long-lived C structures, so they get promoted
+        // and checked less often; we never promote weak ptrs, because missing a weak->strong
+        // transition risks losing the managed object, while missing strong->weak only delays
+        // collection. Ptrs whose strength is flipped by a managed IncRef/DecRef go on the dirty
+        // list, because whoever's passing them around is likely to flip them back natively.
+        private const byte YOUNG = 0;
+        private const byte OLD = 1;
+        private const int PROMOTION_AGE = 3;
+        private const int OLD_GENERATION_RATIO = 8;
+        private const int DIRTY_SLICE = 32;
         
-        private int cbpCount = 0;
+        private List<IntPtr>[] generations = new List<IntPtr>[] { new List<IntPtr>(), new List<IntPtr>() };
+        private int[] cursors = new int[] { 0, 0 };
+        private List<IntPtr> dirty = new List<IntPtr>();
+        private BridgeSweepCounters sweepCounters = new BridgeSweepCounters();
+
         private int cbpRegulator = 50000;
+
+        public InterestingPtrMap()
+        {
+            this.Resize(INITIAL_CAPACITY);
+        }
     
         public void
         Associate(IntPtr ptr, object obj)
         {
-            long id = PythonOps.Id(obj);
-            this.ptr2id[ptr] = id;
+            this.Associate(ptr, obj, PythonOps.Id(obj));
+        }
+
+        public void
+        Associate(IntPtr ptr, object obj, long id)
+        {
+            // for callers which already needed obj's id, and would rather not look it up twice
+            int slot = this.Claim(ptr);
+            this.entries[slot].id = id;
+            this.entries[slot].obj = obj;
+            this.entries[slot].wref = null;
+            this.entries[slot].state = MapEntryState.Simple;
             this.id2ptr[id] = ptr;
-            this.id2obj[id] = obj;
+        }
+
+        public void
+        AssociateValue(IntPtr ptr, object obj)
+        {
+            // for immutable values (boxed ints and floats) which nobody will ever look up by
+            // identity: getting an id is surprisingly expensive, so we don't
+            int slot = this.Claim(ptr);
+            this.entries[slot].id = 0;
+            this.entries[slot].obj = obj;
+            this.entries[slot].wref = null;
+            this.entries[slot].state = MapEntryState.Simple;
+        }
+
+        public void
+        Reserve(int extra)
+        {
+            // so that the next extra Associates won't need to resize the table
+            int capacity = this.entries.Length;
+            while ((this.count + extra) * 10 > capacity * 7)
+            {
+                capacity *= 2;
+            }
+            if (capacity != this.entries.Length)
+            {
+                this.Resize(capacity);
+            }
         }
         
         public void
         BridgeAssociate(IntPtr ptr, object obj)
         {
             long id = PythonOps.Id(obj);
-            this.ptr2id[ptr] = id;
+            int slot = this.Claim(ptr);
+            this.entries[slot].id = id;
+            this.entries[slot].obj = obj;
+            this.entries[slot].wref = new WeakReference(obj);
+            this.entries[slot].state = MapEntryState.Bridge;
+            this.entries[slot].age = 0;
+            this.entries[slot].dirty = false;
+            this.ListAdd(slot, YOUNG);
+            this.bridgeCount += 1;
             this.id2ptr[id] = ptr;
-            
-            WeakReference wref = new WeakReference(obj);
-            this.id2wref[id] = wref;
-            this.id2sref[id] = obj;
         }
         
         public void
         UpdateStrength(IntPtr ptr)
         {
-            long id = this.ptr2id[ptr];
-            if (!this.id2wref.ContainsKey(id))
+            int slot = this.Find(ptr);
+            if (slot == -1)
             {
-                return;
+                throw new KeyNotFoundException(String.Format("UpdateStrength: No mapping for {0}", ptr.ToString("x")));
+            }
+            this.UpdateStrengthAndMarkDirty(slot);
+        }
+
+        // The refcount fast path: one probe tells us whether ptr is mapped, and whether it's a
+        // bridge ptr, so we can skip everything else PythonMapper.IncRef/DecRef would check.
+        // Simple ptrs just get their ob_refcnt changed; bridge ptrs get their strength checked,
+        // which only does any work if the refcount crosses between 1 and 2. Both return false
+        // if they didn't do anything, in which case the caller should take the slow path.
+
+        public bool
+        TryIncRef(IntPtr ptr)
+        {
+            int slot = this.Find(ptr);
+            if (slot == -1)
+            {
+                return false;
+            }
+            PyObjectRef.Refcnt(ptr, PyObjectRef.Refcnt(ptr) + 1);
+            if (this.entries[slot].state == MapEntryState.Bridge)
+            {
+                this.UpdateStrengthAndMarkDirty(slot);
+            }
+            return true;
+        }
+
+        public bool
+        TryDecRef(IntPtr ptr)
+        {
+            // never deallocates: if ptr is about to die, leave it to the slow path
+            int slot = this.Find(ptr);
+            if (slot == -1)
+            {
+                return false;
+            }
+            int count = PyObjectRef.Refcnt(ptr);
+            if (count <= 1)
+            {
+                return false;
+            }
+            PyObjectRef.Refcnt(ptr, count - 1);
+            if (this.entries[slot].state == MapEntryState.Bridge)
+            {
+                this.UpdateStrengthAndMarkDirty(slot);
+            }
+            return true;
+        }
+
+        private void
+        UpdateStrengthAndMarkDirty(int slot)
+        {
+            if (this.UpdateSlotStrength(slot) && !this.entries[slot].dirty)
+            {
+                this.entries[slot].dirty = true;
+                this.dirty.Add(this.entries[slot].ptr);
+            }
+        }
+
+        private bool
+        UpdateSlotStrength(int slot)
+        {
+            // returns true if the strength changed
+            if (this.entries[slot].state != MapEntryState.Bridge)
+            {
+                return false;
             }
             
-            object obj = this.id2wref[id].Target;
-            int refcnt = CPyMarshal.ReadInt(ptr);
+            int refcnt = CPyMarshal.ReadInt(this.entries[slot].ptr);
             if (refcnt > 1)
             {
-                this.Strengthen(obj);
+                if (this.entries[slot].obj == null)
+                {
+                    this.entries[slot].obj = this.entries[slot].wref.Target;
+                    return true;
+                }
             }
-            else
+            else if (this.entries[slot].obj != null)
             {
-                this.Weaken(obj);
+                this.entries[slot].obj = null;
+                return true;
             }
+            return false;
         }
         
         
@@ -80,21 +314,22 @@ namespace Ironclad
         LogMappingInfo(object id_)
         {
             long id = (long)id_;
-            if (this.id2ptr.ContainsKey(id))
+            IntPtr ptr;
+            if (this.id2ptr.TryGetValue(id, out ptr))
             {
-                IntPtr ptr = this.id2ptr[id];
                 Console.WriteLine("object for id {0} is stored at {1}; refcount is {2}", 
                     id, ptr.ToString("x"), CPyMarshal.ReadInt(ptr));
-                if (this.id2obj.ContainsKey(id))
+                int slot = this.Find(ptr);
+                if (slot != -1 && this.entries[slot].state == MapEntryState.Simple)
                 {
                     Console.WriteLine("object is simply mapped");
-                    Console.WriteLine(PythonCalls.Call(Builtin.str, new object[] { this.id2obj[id] }));
+                    Console.WriteLine(PythonCalls.Call(Builtin.str, new object[] { this.entries[slot].obj }));
                 }
-                else if (this.id2wref.ContainsKey(id))
+                else if (slot != -1 && this.entries[slot].state == MapEntryState.Bridge)
                 {
-                    this.UpdateStrength(ptr);
+                    this.UpdateSlotStrength(slot);
                     Console.WriteLine("object is cleverly mapped");
-                    if (this.id2sref.ContainsKey(id))
+                    if (this.entries[slot].obj != null)
                     {
                         Console.WriteLine("object is being kept alive");
                     }
@@ -122,12 +357,16 @@ namespace Ironclad
             Dictionary<object, int> scounts = new Dictionary<object, int>();
             Dictionary<object, int> wcounts = new Dictionary<object, int>();
             wcounts["ZOMBIE"] = 0;
-            foreach (long id in this.id2wref.Keys)
+            for (int slot = 0; slot < this.entries.Length; slot++)
             {
-                if (!this.id2sref.ContainsKey(id))
+                if (this.entries[slot].state != MapEntryState.Bridge)
+                {
+                    continue;
+                }
+                if (this.entries[slot].obj == null)
                 {
                     wtotal += 1;
-                    WeakReference wref = this.id2wref[id];
+                    WeakReference wref = this.entries[slot].wref;
                     if (wref.IsAlive)
                     {
                         object type_ = PythonCalls.Call(Builtin.type, new object[] { wref.Target });
@@ -145,7 +384,7 @@ namespace Ironclad
                 else
                 {
                     stotal += 1;
-                    object type_ = PythonCalls.Call(Builtin.type, new object[] { this.id2sref[id] });
+                    object type_ = PythonCalls.Call(Builtin.type, new object[] { this.entries[slot].obj });
                     if (!scounts.ContainsKey(type_))
                     {
                         scounts[type_] = 0;
@@ -174,31 +413,187 @@ namespace Ironclad
             set { this.cbpRegulator = value; }
         }
         
+        public int
+        Count
+        {
+            get { return this.count; }
+        }
+
+        public int
+        YoungBridgeCount
+        {
+            get { return this.generations[YOUNG].Count; }
+        }
+
+        public int
+        OldBridgeCount
+        {
+            get { return this.generations[OLD].Count; }
+        }
+
+        public BridgeSweepCounters
+        SweepCounters
+        {
+            get { return this.sweepCounters; }
+        }
+
         
         public void
         CheckBridgePtrs(bool force)
         {
-            if (!force)
+            if (force || this.cbpRegulator <= 0)
+            {
+                this.SweepAll(force);
+            }
+            else
+            {
+                this.SweepSlice();
+            }
+        }
+
+        private void
+        SweepAll(bool force)
+        {
+            long start = Stopwatch.GetTimestamp();
+            int checkedCount = 0;
+            for (int slot = 0; slot < this.entries.Length; slot++)
             {
-                // throttling and forced GC not tested; couldn't work out how
-                this.cbpCount += 1;
-                if (this.cbpCount < this.cbpRegulator)
+                if (this.entries[slot].state == MapEntryState.Bridge)
                 {
-                    return;
+                    this.entries[slot].dirty = false;
+                    this.AgeSlot(slot);
+                    checkedCount += 1;
                 }
-                this.cbpCount = 0;
             }
-            this.MapOverBridgePtrs(new PtrFunc(this.UpdateStrength));
+            this.dirty.Clear();
+            this.sweepCounters.RecordPause(Stopwatch.GetTimestamp() - start, checkedCount, force);
+        }
+
+        private void
+        SweepSlice()
+        {
+            int youngCount = this.generations[YOUNG].Count;
+            int oldCount = this.generations[OLD].Count;
+            if (this.dirty.Count == 0 && youngCount == 0 && oldCount == 0)
+            {
+                return;
+            }
+
+            long start = Stopwatch.GetTimestamp();
+            int youngBudget = (youngCount + this.cbpRegulator - 1) / this.cbpRegulator;
+            long oldSpread = (long)this.cbpRegulator * OLD_GENERATION_RATIO;
+            int oldBudget = (int)((oldCount + oldSpread - 1) / oldSpread);
+
+            int checkedCount = this.SweepDirty(Math.Max(DIRTY_SLICE, youngBudget));
+            checkedCount += this.SweepGeneration(YOUNG, youngBudget);
+            checkedCount += this.SweepGeneration(OLD, oldBudget);
+            this.sweepCounters.RecordPause(Stopwatch.GetTimestamp() - start, checkedCount, false);
+        }
+
+        private int
+        SweepDirty(int budget)
+        {
+            int checkedCount = 0;
+            while (checkedCount < budget && this.dirty.Count > 0)
+            {
+                int last = this.dirty.Count - 1;
+                IntPtr ptr = this.dirty[last];
+                this.dirty.RemoveAt(last);
+
+                int slot = this.Find(ptr);
+                if (slot == -1 || !this.entries[slot].dirty || this.entries[slot].state != MapEntryState.Bridge)
+                {
+                    // released (and maybe reused) since it was marked
+                    continue;
+                }
+                this.entries[slot].dirty = false;
+                this.UpdateSlotStrength(slot);
+                this.entries[slot].age = 0;
+                if (this.entries[slot].generation == OLD)
+                {
+                    this.Move(slot, YOUNG);
+                    this.sweepCounters.RecordDemotion();
+                }
+                checkedCount += 1;
+            }
+            return checkedCount;
+        }
+
+        private int
+        SweepGeneration(byte generation, int budget)
+        {
+            List<IntPtr> list = this.generations[generation];
+            int checkedCount = 0;
+            while (checkedCount < budget && list.Count > 0)
+            {
+                if (this.cursors[generation] >= list.Count)
+                {
+                    this.cursors[generation] = 0;
+                }
+                int slot = this.Find(list[this.cursors[generation]]);
+                checkedCount += 1;
+                if (!this.AgeSlot(slot))
+                {
+                    this.cursors[generation] += 1;
+                }
+                // else: ptr moved to the other generation, and the cursor now
+                // points at whatever was swapped into its place
+            }
+            return checkedCount;
+        }
+
+        private bool
+        AgeSlot(int slot)
+        {
+            // returns true if the slot changed generation
+            bool wasStrong = (this.entries[slot].obj != null);
+            this.UpdateSlotStrength(slot);
+            bool isStrong = (this.entries[slot].obj != null);
+
+            if (this.entries[slot].generation == YOUNG)
+            {
+                if (!(wasStrong && isStrong))
+                {
+                    this.entries[slot].age = 0;
+                    return false;
+                }
+                this.entries[slot].age += 1;
+                if (this.entries[slot].age >= PROMOTION_AGE)
+                {
+                    this.Move(slot, OLD);
+                    this.sweepCounters.RecordPromotion();
+                    return true;
+                }
+            }
+            else if (!isStrong)
+            {
+                this.entries[slot].age = 0;
+                this.Move(slot, YOUNG);
+                this.sweepCounters.RecordDemotion();
+                return true;
+            }
+            return false;
         }
         
         public void
         MapOverBridgePtrs(PtrFunc f)
         {
-            long[] keys = new long[this.id2wref.Count];
-            this.id2wref.Keys.CopyTo(keys, 0);
-            foreach (long id in keys)
+            // f may well change the map, so snapshot the keys first
+            IntPtr[] ptrs = new IntPtr[this.bridgeCount];
+            int i = 0;
+            for (int slot = 0; slot < this.entries.Length; slot++)
             {
-                f(this.id2ptr[id]);
+                if (this.entries[slot].state == MapEntryState.Bridge)
+                {
+                    ptrs[i++] = this.entries[slot].ptr;
+                }
+            }
+            foreach (IntPtr ptr in ptrs)
+            {
+                if (this.Find(ptr) != -1)
+                {
+                    f(ptr);
+                }
             }
             return;
         }
@@ -206,124 +601,286 @@ namespace Ironclad
         public void
         Strengthen(object obj)
         {
-            long id = PythonOps.Id(obj);
-            if (this.id2wref.ContainsKey(id))
+            int slot = this.FindBridgeSlot(obj);
+            if (slot != -1)
             {
-                if (this.id2sref.ContainsKey(id))
-                {
-                    // already strongly reffed
-                    return; 
-                }
-                this.id2sref[id] = obj;
+                this.entries[slot].obj = obj;
             }
         }
         
         public void
         Weaken(object obj)
         {
-            long id = PythonOps.Id(obj);
-            if (this.id2wref.ContainsKey(id))
+            int slot = this.FindBridgeSlot(obj);
+            if (slot != -1)
             {
-                if (!this.id2sref.ContainsKey(id))
-                {
-                    // already weakly reffed
-                    return; 
-                }
-                this.id2sref.Remove(id);
+                this.entries[slot].obj = null;
             }
         }
         
         public void
         Release(IntPtr ptr)
         {
-            if (!this.ptr2id.ContainsKey(ptr))
+            int slot = this.Find(ptr);
+            if (slot == -1)
             {
                 throw new BadMappingException(String.Format("Release: tried to release unmapped ptr {0}", ptr.ToString("x")));
             }
 
-            long id = this.ptr2id[ptr];
-            this.ptr2id.Remove(ptr);
-            this.id2ptr.Remove(id);
-
-            if (this.id2obj.ContainsKey(id))
-            {
-                this.id2obj.Remove(id);
-            }
-            else if (this.id2wref.ContainsKey(id))
+            long id = this.entries[slot].id;
+            IntPtr idPtr;
+            if (this.id2ptr.TryGetValue(id, out idPtr) && idPtr == ptr)
             {
-                this.id2wref.Remove(id);
-                if (this.id2sref.ContainsKey(id))
-                {
-                    this.id2sref.Remove(id);
-                }
+                this.id2ptr.Remove(id);
             }
-            else
+
+            switch (this.entries[slot].state)
             {
-                throw new BadMappingException(String.Format("Release: mapping corrupt (ptr {0})", ptr.ToString("x")));
+                case MapEntryState.Simple:
+                    break;
+                case MapEntryState.Bridge:
+                    this.ListRemove(slot);
+                    this.bridgeCount -= 1;
+                    break;
+                default:
+                    throw new BadMappingException(String.Format("Release: mapping corrupt (ptr {0})", ptr.ToString("x")));
             }
+            this.Vacate(slot);
         }
         
         public bool
         HasObj(object obj)
         {
-            if (this.id2ptr.ContainsKey(PythonOps.Id(obj)))
-            {
-                return true;
-            }
-            return false;
+            return this.id2ptr.ContainsKey(PythonOps.Id(obj));
         }
         
         public IntPtr
         GetPtr(object obj)
         {
-            long id = PythonOps.Id(obj);
-            if (!this.id2ptr.ContainsKey(id))
+            IntPtr ptr;
+            if (!this.id2ptr.TryGetValue(PythonOps.Id(obj), out ptr))
             {
                 throw new BadMappingException(String.Format("GetPtr: No obj-to-ptr mapping for {0}", obj));
             }
-            return this.id2ptr[id];
+            return ptr;
+        }
+
+        public bool
+        TryGetPtr(long id, out IntPtr ptr)
+        {
+            return this.id2ptr.TryGetValue(id, out ptr);
         }
         
         public bool
         HasPtr(IntPtr ptr)
         {
-            if (this.ptr2id.ContainsKey(ptr))
+            return this.Find(ptr) != -1;
+        }
+
+        public bool
+        TryGetSimpleObj(IntPtr ptr, out object obj)
+        {
+            // bridge objects might need their strength checked, so they don't count
+            int slot = this.Find(ptr);
+            if (slot == -1 || this.entries[slot].state != MapEntryState.Simple)
             {
-                return true;
+                obj = null;
+                return false;
             }
-            return false;
+            obj = this.entries[slot].obj;
+            return true;
         }
         
         public object
         GetObj(IntPtr ptr)
         {
-            if (!this.ptr2id.ContainsKey(ptr))
+            int slot = this.Find(ptr);
+            if (slot == -1)
             {
                 throw new BadMappingException(String.Format("GetObj: No ptr-to-obj mapping for {0}", ptr.ToString("x")));
             }
 
-            long id = this.ptr2id[ptr];
-            if (this.id2obj.ContainsKey(id))
+            switch (this.entries[slot].state)
             {
-                return this.id2obj[id];
+                case MapEntryState.Simple:
+                    return this.entries[slot].obj;
+
+                case MapEntryState.Bridge:
+                    if (this.entries[slot].obj != null)
+                    {
+                        return this.entries[slot].obj;
+                    }
+                    object obj = this.entries[slot].wref.Target;
+                    if (obj != null)
+                    {
+                        return obj;
+                    }
+                    throw new NullReferenceException(
+                        String.Format("GetObj: Weakly mapped object for ptr {0} was GCed too soon", ptr.ToString("x")));
+
+                default:
+                    throw new BadMappingException(String.Format("GetObj: mapping corrupt (ptr {0})", ptr.ToString("x")));
+            }
+        }
+
+
+        private int
+        FindBridgeSlot(object obj)
+        {
+            long id = PythonOps.Id(obj);
+            IntPtr ptr;
+            if (!this.id2ptr.TryGetValue(id, out ptr))
+            {
+                return -1;
+            }
+            int slot = this.Find(ptr);
+            if (slot == -1 || this.entries[slot].state != MapEntryState.Bridge || this.entries[slot].id != id)
+            {
+                return -1;
+            }
+            return slot;
+        }
+
+        private int
+        Hash(IntPtr ptr)
+        {
+            // fibonacci hashing: object addresses are heavily aligned, so the low bits are useless
+            ulong h = unchecked((ulong)ptr.ToInt64() * 0x9E3779B97F4A7C15UL);
+            return (int)(h >> this.shift);
+        }
+
+        private int
+        Find(IntPtr ptr)
+        {
+            int slot = this.Hash(ptr);
+            while (this.entries[slot].state != MapEntryState.Empty)
+            {
+                if (this.entries[slot].ptr == ptr)
+                {
+                    return slot;
+                }
+                slot = (slot + 1) & this.mask;
             }
-            else if (this.id2sref.ContainsKey(id))
+            return -1;
+        }
+
+        private int
+        Claim(IntPtr ptr)
+        {
+            // returns the slot for ptr, which may previously have held a mapping; if so,
+            // it's being overwritten, so we forget whether it was a bridge
+            if ((this.count + 1) * 10 > this.entries.Length * 7)
             {
-                return this.id2sref[id];
+                this.Resize(this.entries.Length * 2);
             }
-            else if (this.id2wref.ContainsKey(id))
+
+            int slot = this.Hash(ptr);
+            while (this.entries[slot].state != MapEntryState.Empty)
             {
-                WeakReference wref = this.id2wref[id];
-                if (wref.IsAlive)
+                if (this.entries[slot].ptr == ptr)
                 {
-                    return wref.Target;
+                    if (this.entries[slot].state == MapEntryState.Bridge)
+                    {
+                        this.ListRemove(slot);
+                        this.bridgeCount -= 1;
+                    }
+                    this.entries[slot].dirty = false;
+                    return slot;
                 }
-                throw new NullReferenceException(
-                    String.Format("GetObj: Weakly mapped object for ptr {0} was GCed too soon", ptr.ToString("x")));
+                slot = (slot + 1) & this.mask;
             }
-            else
+            this.entries[slot].ptr = ptr;
+            this.count += 1;
+            return slot;
+        }
+
+        private void
+        ListAdd(int slot, byte generation)
+        {
+            List<IntPtr> list = this.generations[generation];
+            this.entries[slot].generation = generation;
+            this.entries[slot].listIndex = list.Count;
+            list.Add(this.entries[slot].ptr);
+        }
+
+        private void
+        ListRemove(int slot)
+        {
+            List<IntPtr> list = this.generations[this.entries[slot].generation];
+            int index = this.entries[slot].listIndex;
+            int last = list.Count - 1;
+            if (index != last)
+            {
+                IntPtr moved = list[last];
+                list[index] = moved;
+                this.entries[this.Find(moved)].listIndex = index;
+            }
+            list.RemoveAt(last);
+        }
+
+        private void
+        Move(int slot, byte generation)
+        {
+            this.ListRemove(slot);
+            this.ListAdd(slot, generation);
+        }
+
+        private void
+        Vacate(int slot)
+        {
+            // backward-shift deletion: no tombstones, so probe sequences never degrade
+            int hole = slot;
+            int next = slot;
+            while (true)
+            {
+                next = (next + 1) & this.mask;
+                if (this.entries[next].state == MapEntryState.Empty)
+                {
+                    break;
+                }
+                int home = this.Hash(this.entries[next].ptr);
+                bool stays = (hole <= next) ?
+                    ((hole < home) && (home <= next)) :
+                    ((hole < home) || (home <= next));
+                if (!stays)
+                {
+                    this.entries[hole] = this.entries[next];
+                    hole = next;
+                }
+            }
+            this.entries[hole] = new MapEntry();
+            this.count -= 1;
+        }
+
+        private void
+        Resize(int capacity)
+        {
+            MapEntry[] old = this.entries;
+            this.entries = new MapEntry[capacity];
+            this.mask = capacity - 1;
+            this.shift = 64;
+            while (capacity > 1)
+            {
+                this.shift -= 1;
+                capacity >>= 1;
+            }
+
+            if (old == null)
+            {
+                return;
+            }
+            foreach (MapEntry entry in old)
             {
-                throw new BadMappingException(String.Format("GetObj: mapping corrupt (ptr {0})", ptr.ToString("x")));
+                if (entry.state == MapEntryState.Empty)
+                {
+                    continue;
+                }
+                int slot = this.Hash(entry.ptr);
+                while (this.entries[slot].state != MapEntryState.Empty)
+                {
+                    slot = (slot + 1) & this.mask;
+                }
+                this.entries[slot] = entry;
             }
         }
     }
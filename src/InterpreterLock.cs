@@ -0,0 +1,277 @@
+using System;
+using System.Collections.Generic;
+using System.Diagnostics;
+using System.Threading;
+
+
+namespace Ironclad
+{
+    internal class LockWaiter
+    {
+        public int id;
+        public long since;
+        public bool granted = false;
+
+        public LockWaiter(int id, long since)
+        {
+            this.id = id;
+            this.since = since;
+        }
+    }
+
+    public class InterpreterLock
+    {
+        // A recursive lock with the same interface as Lock, which doesn't need to enter
+        // the kernel unless it's contended: an uncontended Acquire or Release is a single
+        // interlocked operation on the owner field. Contended Acquires spin for a little
+        // while, in the hope that the owner is just making a quick call into C, and then
+        // queue up and sleep on a Monitor until a Release wakes them.
+        //
+        // Left to itself, that lets a thread which keeps calling into C take the lock
+        // straight back every time it releases it, starving everyone else; so, if
+        // SwitchInterval is set, a Release which finds that the longest-waiting thread
+        // has been waiting at least that long hands the lock directly to that thread.
+        private const int SPIN_LIMIT = 10;
+        private static readonly bool CAN_SPIN = Environment.ProcessorCount > 1;
+        private static readonly double[] WAIT_BUCKET_LIMITS = new double[] { 0.01, 0.1, 1, 10, 100, 1000 };
+
+        private int owner = 0;
+        private int count = 0;
+        private volatile int waiters = 0;
+        private object monitor = new object();
+        private LinkedList<LockWaiter> queue = new LinkedList<LockWaiter>();
+
+        private long switchTicks = 0;
+        private long handoffs = 0;
+        private Dictionary<int, long[]> waitHistograms = new Dictionary<int, long[]>();
+
+        public void
+        Dispose()
+        {
+            while (this.CountAcquired > 0)
+            {
+                this.Release();
+            }
+        }
+
+        public double
+        SwitchInterval
+        {
+            // seconds, like CPython's sys.setswitchinterval; 0 disables handoff
+            get { return (double)this.switchTicks / Stopwatch.Frequency; }
+            set { this.switchTicks = (long)(Math.Max(0, value) * Stopwatch.Frequency); }
+        }
+
+        public long
+        Handoffs
+        {
+            get { return this.handoffs; }
+        }
+
+        public double[]
+        WaitBucketLimits
+        {
+            // milliseconds; each histogram has one more bucket, for longer waits
+            get { return (double[])WAIT_BUCKET_LIMITS.Clone(); }
+        }
+
+        public Dictionary<int, long[]>
+        GetWaitHistograms()
+        {
+            // only counts Acquires which had to wait; keyed on ManagedThreadId
+            lock (this.waitHistograms)
+            {
+                Dictionary<int, long[]> result = new Dictionary<int, long[]>();
+                foreach (KeyValuePair<int, long[]> kvp in this.waitHistograms)
+                {
+                    result[kvp.Key] = (long[])kvp.Value.Clone();
+                }
+                return result;
+            }
+        }
+
+        public void
+        ResetWaitHistograms()
+        {
+            lock (this.waitHistograms)
+            {
+                this.waitHistograms.Clear();
+            }
+            lock (this.monitor)
+            {
+                this.handoffs = 0;
+            }
+        }
+
+        public int
+        Acquire()
+        {
+            int me = Thread.CurrentThread.ManagedThreadId;
+            if (this.owner == me)
+            {
+                this.count += 1;
+                return this.count;
+            }
+
+            if (Interlocked.CompareExchange(ref this.owner, me, 0) != 0)
+            {
+                this.AcquireSlow(me);
+            }
+            this.count = 1;
+            return 1;
+        }
+
+        public bool
+        TryAcquire()
+        {
+            int me = Thread.CurrentThread.ManagedThreadId;
+            if (this.owner == me)
+            {
+                this.count += 1;
+                return true;
+            }
+
+            if (Interlocked.CompareExchange(ref this.owner, me, 0) != 0)
+            {
+                return false;
+            }
+            this.count = 1;
+            return true;
+        }
+
+        public bool
+        IsAcquired
+        {
+            get
+            {
+                return (this.owner == Thread.CurrentThread.ManagedThreadId) && (this.count > 0);
+            }
+        }
+
+        public int
+        CountAcquired
+        {
+            get
+            {
+                if (this.owner == Thread.CurrentThread.ManagedThreadId)
+                {
+                    return this.count;
+                }
+                return 0;
+            }
+        }
+
+        public void
+        Release()
+        {
+            if (!this.IsAcquired)
+            {
+                throw new LockException("you can't release a lock you don't own");
+            }
+            this.count -= 1;
+            if (this.count > 0)
+            {
+                return;
+            }
+
+            if (this.waiters > 0 && this.switchTicks > 0 && this.TryHandoff())
+            {
+                return;
+            }
+
+            // the exchange is a full fence, so we can't miss a waiter who registered
+            // before failing to take the lock
+            Interlocked.Exchange(ref this.owner, 0);
+            if (this.waiters > 0)
+            {
+                lock (this.monitor)
+                {
+                    Monitor.Pulse(this.monitor);
+                }
+            }
+        }
+
+        private bool
+        TryHandoff()
+        {
+            lock (this.monitor)
+            {
+                LinkedListNode<LockWaiter> first = this.queue.First;
+                if (first == null || Stopwatch.GetTimestamp() - first.Value.since < this.switchTicks)
+                {
+                    return false;
+                }
+                this.queue.RemoveFirst();
+                first.Value.granted = true;
+                Interlocked.Exchange(ref this.owner, first.Value.id);
+                this.handoffs += 1;
+                Monitor.PulseAll(this.monitor);
+                return true;
+            }
+        }
+
+        private void
+        AcquireSlow(int me)
+        {
+            long start = Stopwatch.GetTimestamp();
+            if (CAN_SPIN)
+            {
+                for (int i = 0; i < SPIN_LIMIT; i++)
+                {
+                    Thread.SpinWait(20 << i);
+                    if (Thread.VolatileRead(ref this.owner) == 0 &&
+                        Interlocked.CompareExchange(ref this.owner, me, 0) == 0)
+                    {
+                        this.RecordWait(me, start);
+                        return;
+                    }
+                }
+            }
+
+            lock (this.monitor)
+            {
+                LinkedListNode<LockWaiter> node = this.queue.AddLast(new LockWaiter(me, start));
+                this.waiters += 1;
+                try
+                {
+                    while (!node.Value.granted &&
+                           Interlocked.CompareExchange(ref this.owner, me, 0) != 0)
+                    {
+                        Monitor.Wait(this.monitor);
+                    }
+                }
+                finally
+                {
+                    if (!node.Value.granted)
+                    {
+                        this.queue.Remove(node);
+                    }
+                    this.waiters -= 1;
+                }
+            }
+            this.RecordWait(me, start);
+        }
+
+        private void
+        RecordWait(int me, long start)
+        {
+            double waited = (double)(Stopwatch.GetTimestamp() - start) * 1000 / Stopwatch.Frequency;
+            int bucket = 0;
+            while (bucket < WAIT_BUCKET_LIMITS.Length && waited >= WAIT_BUCKET_LIMITS[bucket])
+            {
+                bucket += 1;
+            }
+
+            lock (this.waitHistograms)
+            {
+                long[] histogram;
+                if (!this.waitHistograms.TryGetValue(me, out histogram))
+                {
+                    histogram = new long[WAIT_BUCKET_LIMITS.Length + 1];
+                    this.waitHistograms[me] = histogram;
+                }
+                histogram[bucket] += 1;
+            }
+        }
+    }
+}
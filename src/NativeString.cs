@@ -0,0 +1,227 @@
+using System;
+using System.Collections.Generic;
+using System.Runtime.CompilerServices;
+using System.Text;
+
+using IronPython.Modules;
+using IronPython.Runtime;
+using IronPython.Runtime.Operations;
+
+using Microsoft.Scripting.Runtime;
+
+using Ironclad.Structs;
+
+namespace Ironclad
+{
+    public class NativeString
+    {
+        // Stands in for a big str which C code built with PyString_FromStringAndSize(NULL, n),
+        // leaving its data in the PyStringObject's own buffer: indexing and simple slicing
+        // only read the bytes they need, and Storing it just gives back the original object,
+        // so a string which goes straight back into C is never copied at all. Anything else
+        // reads the whole buffer into a real string, once.
+        //
+        // We own a reference to the PyStringObject, which is bridge-mapped, so it lives as long
+        // as we do; if it gets freed anyway (say, when the mapper is disposed) we're Detached
+        // first, and keep a copy of the data.
+        private PythonMapper mapper;
+        private IntPtr ptr;
+        private IntPtr buffer;
+        private int length;
+        private string value = null;
+
+        public NativeString(PythonMapper mapper, IntPtr ptr, int length)
+        {
+            this.mapper = mapper;
+            this.ptr = ptr;
+            this.buffer = CPyMarshal.GetField(ptr, typeof(PyStringObject), "ob_sval");
+            this.length = length;
+        }
+
+        ~NativeString()
+        {
+            if (this.ptr != IntPtr.Zero)
+            {
+                this.mapper.ReleaseNativeString(this.ptr);
+            }
+        }
+
+        public bool
+        IsMaterialised
+        {
+            get { return this.value != null; }
+        }
+
+        public void
+        Detach()
+        {
+            this.Materialise();
+            this.ptr = IntPtr.Zero;
+            this.buffer = IntPtr.Zero;
+            GC.SuppressFinalize(this);
+        }
+
+        public string
+        Materialise()
+        {
+            if (this.value == null)
+            {
+                this.value = CPyMarshal.ReadLatin1String(this.buffer, this.length);
+            }
+            return this.value;
+        }
+
+        private string
+        Read(int start, int count)
+        {
+            if (this.value != null)
+            {
+                return this.value.Substring(start, count);
+            }
+            return CPyMarshal.ReadLatin1String(CPyMarshal.Offset(this.buffer, start), count);
+        }
+
+        public override string
+        ToString()
+        {
+            return this.Materialise();
+        }
+
+        public override int
+        GetHashCode()
+        {
+            return this.Materialise().GetHashCode();
+        }
+
+        public override bool
+        Equals(object other)
+        {
+            if (other is NativeString || other is string)
+            {
+                return this.Materialise() == other.ToString();
+            }
+            return false;
+        }
+
+        public int
+        __len__()
+        {
+            return this.length;
+        }
+
+        public string
+        __str__()
+        {
+            return this.Materialise();
+        }
+
+        public string
+        __repr__(CodeContext context)
+        {
+            return (string)Builtin.repr(context, this.Materialise());
+        }
+
+        public int
+        __hash__()
+        {
+            return this.GetHashCode();
+        }
+
+        public object
+        __eq__(object other)
+        {
+            if (other is NativeString || other is string)
+            {
+                return this.Equals(other);
+            }
+            return NotImplementedType.Value;
+        }
+
+        public object
+        __ne__(object other)
+        {
+            if (other is NativeString || other is string)
+            {
+                return !this.Equals(other);
+            }
+            return NotImplementedType.Value;
+        }
+
+        public string
+        __getitem__(int index)
+        {
+            if (index < 0)
+            {
+                index += this.length;
+            }
+            if (index < 0 || index >= this.length)
+            {
+                throw PythonOps.IndexError("string index out of range");
+            }
+            return this.Read(index, 1);
+        }
+
+        public string
+        __getitem__(Slice slice)
+        {
+            int start;
+            int stop;
+            int step;
+            slice.indices(this.length, out start, out stop, out step);
+            if (step == 1)
+            {
+                return (stop > start) ? this.Read(start, stop - start) : "";
+            }
+
+            StringBuilder result = new StringBuilder();
+            for (int i = start; (step > 0) ? (i < stop) : (i > stop); i += step)
+            {
+                result.Append(this.Read(i, 1));
+            }
+            return result.ToString();
+        }
+
+        public bool
+        __contains__(string item)
+        {
+            return this.Materialise().Contains(item);
+        }
+
+        public object
+        __add__(object other)
+        {
+            if (other is NativeString || other is string)
+            {
+                return this.Materialise() + other.ToString();
+            }
+            return NotImplementedType.Value;
+        }
+
+        public object
+        __radd__(object other)
+        {
+            if (other is NativeString || other is string)
+            {
+                return other.ToString() + this.Materialise();
+            }
+            return NotImplementedType.Value;
+        }
+
+        public IEnumerator<string>
+        __iter__()
+        {
+            foreach (char c in this.Materialise())
+            {
+                yield return c.ToString();
+            }
+        }
+
+        [SpecialName]
+        public object
+        GetBoundMember(CodeContext context, string name)
+        {
+            // everything else str can do, we do by becoming a str
+            return PythonOps.GetBoundAttr(context, this.Materialise(), name);
+        }
+    }
+}
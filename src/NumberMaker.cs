@@ -1,4 +1,5 @@
 using System;
+using System.Runtime.CompilerServices;
 
 using System.Numerics;
 
@@ -12,32 +13,87 @@ namespace Ironclad
 {
     public class NumberMaker
     {
+        // When Converter can't handle an object, the only way to find out is to catch
+        // its exception; and whatever it is, we'll be asked to convert plenty more like
+        // it. So we remember, per type, which fallback worked last time, and go straight
+        // to that; we only throw when there really is nothing to be done. Types are held
+        // weakly, so remembering them doesn't keep them alive; and a type which had no
+        // fallback isn't remembered at all, because it might gain one later.
+        private enum Fallback
+        {
+            Int,
+            Long,
+            Float,
+            None,
+        }
+        
+        private class FallbackHolder
+        {
+            public Fallback fallback;
+            
+            public FallbackHolder(Fallback fallback)
+            {
+                this.fallback = fallback;
+            }
+        }
+        
+        private static ConditionalWeakTable<PythonType, FallbackHolder> bigIntegerFallbacks = new ConditionalWeakTable<PythonType, FallbackHolder>();
+        private static ConditionalWeakTable<PythonType, FallbackHolder> floatFallbacks = new ConditionalWeakTable<PythonType, FallbackHolder>();
+        
         public static BigInteger
         MakeBigInteger(CodeContext ctx, object obj)
         {
-            try
+            if (obj is int)
             {
-                return Converter.ConvertToBigInteger(obj);
+                return (int)obj;
             }
-            catch
+            if (obj is BigInteger)
             {
-                // one of the following fallbacks *might* work
+                return (BigInteger)obj;
             }
-            
-            if ((!Builtin.isinstance(obj, TypeCache.PythonType)) &&
-                Builtin.hasattr(ctx, obj, "__int__"))
+            if (obj is bool)
             {
-                object probablyInt = PythonCalls.Call(TypeCache.Int32, new object[] {obj});
-                return MakeBigInteger(ctx, probablyInt);
+                return ((bool)obj) ? BigInteger.One : BigInteger.Zero;
+            }
+            if (obj is long)
+            {
+                return (long)obj;
+            }
+            if (obj is double)
+            {
+                double value = (double)obj;
+                if (!Double.IsNaN(value) && !Double.IsInfinity(value))
+                {
+                    return new BigInteger(value);
+                }
             }
             
-            if ((!Builtin.isinstance(obj, TypeCache.PythonType)) &&
-                Builtin.hasattr(ctx, obj, "__float__"))
+            PythonType type_ = DynamicHelpers.GetPythonType(obj);
+            Fallback fallback;
+            if (!TryGetFallback(bigIntegerFallbacks, type_, out fallback))
             {
-                object probablyFloat = PythonCalls.Call(TypeCache.Double, new object[] {obj});
-                return MakeBigInteger(ctx, probablyFloat);
+                try
+                {
+                    return Converter.ConvertToBigInteger(obj);
+                }
+                catch
+                {
+                    // one of the following fallbacks *might* work
+                }
+                fallback = FindFallback(ctx, obj, "__int__", "__float__");
+                RememberFallback(bigIntegerFallbacks, type_, obj, fallback);
             }
             
+            switch (fallback)
+            {
+                case Fallback.Int:
+                    object probablyInt = PythonCalls.Call(TypeCache.Int32, new object[] {obj});
+                    return MakeBigInteger(ctx, probablyInt);
+                
+                case Fallback.Float:
+                    object probablyFloat = PythonCalls.Call(TypeCache.Double, new object[] {obj});
+                    return MakeBigInteger(ctx, probablyFloat);
+            }
             throw PythonOps.TypeError("could not make number sufficiently integeresque");
         }
         
@@ -58,30 +114,106 @@ namespace Ironclad
         public static double
         MakeFloat(CodeContext ctx, object obj)
         {
-            try
+            if (obj is double)
             {
-                return Converter.ConvertToDouble(obj);
+                return (double)obj;
             }
-            catch
+            if (obj is int)
             {
-                // one of the following fallbacks *might* work
+                return (int)obj;
             }
-            
-            if ((!Builtin.isinstance(obj, TypeCache.PythonType)) &&
-                Builtin.hasattr(ctx, obj, "__int__"))
+            if (obj is bool)
             {
-                object probablyInt = PythonCalls.Call(TypeCache.Int32, new object[] {obj});
-                return MakeFloat(ctx, probablyInt);
+                return ((bool)obj) ? 1.0 : 0.0;
             }
             
-            if ((!Builtin.isinstance(obj, TypeCache.PythonType)) &&
-                Builtin.hasattr(ctx, obj, "__long__"))
+            PythonType type_ = DynamicHelpers.GetPythonType(obj);
+            Fallback fallback;
+            if (!TryGetFallback(floatFallbacks, type_, out fallback))
             {
-                object probablyLong = PythonCalls.Call(TypeCache.BigInteger, new object[] {obj});
-                return MakeFloat(ctx, probablyLong);
+                try
+                {
+                    return Converter.ConvertToDouble(obj);
+                }
+                catch
+                {
+                    // one of the following fallbacks *might* work
+                }
+                fallback = FindFallback(ctx, obj, "__int__", "__long__");
+                RememberFallback(floatFallbacks, type_, obj, fallback);
             }
             
+            switch (fallback)
+            {
+                case Fallback.Int:
+                    object probablyInt = PythonCalls.Call(TypeCache.Int32, new object[] {obj});
+                    return MakeFloat(ctx, probablyInt);
+                
+                case Fallback.Long:
+                    object probablyLong = PythonCalls.Call(TypeCache.BigInteger, new object[] {obj});
+                    return MakeFloat(ctx, probablyLong);
+            }
             throw PythonOps.TypeError("could not make number sufficiently floatesque");
         }
+        
+        private static bool
+        TryGetFallback(ConditionalWeakTable<PythonType, FallbackHolder> fallbacks, PythonType type_, out Fallback fallback)
+        {
+            FallbackHolder holder;
+            if (fallbacks.TryGetValue(type_, out holder))
+            {
+                fallback = holder.fallback;
+                return true;
+            }
+            fallback = Fallback.None;
+            return false;
+        }
+        
+        private static void
+        RememberFallback(ConditionalWeakTable<PythonType, FallbackHolder> fallbacks, PythonType type_, object obj, Fallback fallback)
+        {
+            // old-style instances all share a type, but not their methods
+            if (obj is OldInstance || fallback == Fallback.None)
+            {
+                return;
+            }
+            lock (fallbacks)
+            {
+                fallbacks.Remove(type_);
+                fallbacks.Add(type_, new FallbackHolder(fallback));
+            }
+        }
+        
+        private static Fallback
+        FindFallback(CodeContext ctx, object obj, string first, string second)
+        {
+            if (Builtin.isinstance(obj, TypeCache.PythonType))
+            {
+                return Fallback.None;
+            }
+            if (Builtin.hasattr(ctx, obj, first))
+            {
+                return NameToFallback(first);
+            }
+            if (Builtin.hasattr(ctx, obj, second))
+            {
+                return NameToFallback(second);
+            }
+            return Fallback.None;
+        }
+        
+        private static Fallback
+        NameToFallback(string name)
+        {
+            switch (name)
+            {
+                case "__int__":
+                    return Fallback.Int;
+                case "__long__":
+                    return Fallback.Long;
+                default:
+                    return Fallback.Float;
+            }
+        }
     }
 }
@@ -0,0 +1,256 @@
+using System;
+using System.Collections.Generic;
+using System.Runtime.InteropServices;
+
+namespace Ironclad
+{
+    internal class Arena
+    {
+        public IntPtr start;
+        public IntPtr end;
+        public int sizeClass;
+        public int blockSize;
+        public int carved = 0;
+        public uint[] allocated;
+
+        public Arena(IntPtr start, int bytes, int sizeClass, int blockSize)
+        {
+            this.start = start;
+            this.end = CPyMarshal.Offset(start, bytes);
+            this.sizeClass = sizeClass;
+            this.blockSize = blockSize;
+            this.allocated = new uint[((bytes / blockSize) + 31) / 32];
+        }
+
+        public bool
+        Holds(IntPtr ptr)
+        {
+            long address = ptr.ToInt64();
+            return (address >= this.start.ToInt64()) && (address < this.end.ToInt64());
+        }
+
+        public int
+        BlockIndex(IntPtr ptr)
+        {
+            long offset = ptr.ToInt64() - this.start.ToInt64();
+            if (offset % this.blockSize != 0)
+            {
+                return -1;
+            }
+            return (int)(offset / this.blockSize);
+        }
+
+        public bool
+        IsAllocated(int index)
+        {
+            return (this.allocated[index >> 5] & (1u << (index & 31))) != 0;
+        }
+
+        public void
+        SetAllocated(int index, bool value)
+        {
+            if (value)
+            {
+                this.allocated[index >> 5] |= (1u << (index & 31));
+            }
+            else
+            {
+                this.allocated[index >> 5] &= ~(1u << (index & 31));
+            }
+        }
+    }
+
+    public class SlabAllocator : HGlobalAllocator
+    {
+        // Small blocks (which is to say, almost all object headers) are carved out of
+        // large arenas, one size class per arena, and recycled through per-class free
+        // lists threaded through the freed blocks themselves. Anything bigger than the
+        // largest size class goes straight to HGlobalAllocator.
+        //
+        // Arenas are indexed by address >> ARENA_SHIFT; since an arena is exactly that
+        // big, it can touch at most 2 index entries, and an index entry can hold at
+        // most 2 arenas, so Contains never has to look at more than 2 ranges.
+        private const int ARENA_SHIFT = 18;
+        private const int ARENA_SIZE = 1 << ARENA_SHIFT;
+        private static readonly int[] SIZE_CLASSES = new int[] { 16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512 };
+
+        private int[] classForSize;
+        private IntPtr[] freeLists = new IntPtr[SIZE_CLASSES.Length];
+        private Arena[] currentArenas = new Arena[SIZE_CLASSES.Length];
+        private List<Arena> arenas = new List<Arena>();
+        private Dictionary<long, List<Arena>> arenaIndex = new Dictionary<long, List<Arena>>();
+
+        public SlabAllocator()
+        {
+            int maxSize = SIZE_CLASSES[SIZE_CLASSES.Length - 1];
+            this.classForSize = new int[maxSize + 1];
+            int sizeClass = 0;
+            for (int size = 0; size <= maxSize; size++)
+            {
+                if (size > SIZE_CLASSES[sizeClass])
+                {
+                    sizeClass += 1;
+                }
+                this.classForSize[size] = sizeClass;
+            }
+        }
+
+        public int
+        ArenaCount
+        {
+            get { return this.arenas.Count; }
+        }
+
+        public override IntPtr
+        Alloc(uint bytes)
+        {
+            if (bytes >= this.classForSize.Length)
+            {
+                return base.Alloc(bytes);
+            }
+            int sizeClass = this.classForSize[bytes];
+
+            IntPtr ptr = this.freeLists[sizeClass];
+            if (ptr == IntPtr.Zero)
+            {
+                return this.Carve(sizeClass);
+            }
+            this.freeLists[sizeClass] = CPyMarshal.ReadPtr(ptr);
+            Arena arena = this.FindArena(ptr);
+            arena.SetAllocated(arena.BlockIndex(ptr), true);
+            return ptr;
+        }
+
+        public override IntPtr
+        Realloc(IntPtr oldptr, uint bytes)
+        {
+            Arena arena = this.FindArena(oldptr);
+            if (arena == null)
+            {
+                return base.Realloc(oldptr, bytes);
+            }
+            this.CheckAllocated(arena, oldptr);
+            if (bytes <= arena.blockSize)
+            {
+                return oldptr;
+            }
+
+            IntPtr newptr = this.Alloc(bytes);
+            Unmanaged.memcpy(newptr, oldptr, (uint)arena.blockSize);
+            this.Free(oldptr);
+            return newptr;
+        }
+
+        public override bool
+        Contains(IntPtr ptr)
+        {
+            Arena arena = this.FindArena(ptr);
+            if (arena == null)
+            {
+                return base.Contains(ptr);
+            }
+            int index = arena.BlockIndex(ptr);
+            return (index != -1) && arena.IsAllocated(index);
+        }
+
+        public override void
+        Free(IntPtr ptr)
+        {
+            Arena arena = this.FindArena(ptr);
+            if (arena == null)
+            {
+                base.Free(ptr);
+                return;
+            }
+            int index = this.CheckAllocated(arena, ptr);
+            arena.SetAllocated(index, false);
+            CPyMarshal.WritePtr(ptr, this.freeLists[arena.sizeClass]);
+            this.freeLists[arena.sizeClass] = ptr;
+        }
+
+        public override void
+        FreeAll()
+        {
+            foreach (Arena arena in this.arenas)
+            {
+                Marshal.FreeHGlobal(arena.start);
+            }
+            this.arenas.Clear();
+            this.arenaIndex.Clear();
+            for (int i = 0; i < SIZE_CLASSES.Length; i++)
+            {
+                this.freeLists[i] = IntPtr.Zero;
+                this.currentArenas[i] = null;
+            }
+            base.FreeAll();
+        }
+
+
+        private int
+        CheckAllocated(Arena arena, IntPtr ptr)
+        {
+            int index = arena.BlockIndex(ptr);
+            if (index == -1 || !arena.IsAllocated(index))
+            {
+                throw new KeyNotFoundException(String.Format("{0} was not allocated by this allocator.", ptr.ToString("x")));
+            }
+            return index;
+        }
+
+        private IntPtr
+        Carve(int sizeClass)
+        {
+            int blockSize = SIZE_CLASSES[sizeClass];
+            Arena arena = this.currentArenas[sizeClass];
+            if (arena == null || (arena.carved + 1) * blockSize > ARENA_SIZE)
+            {
+                arena = this.NewArena(sizeClass);
+            }
+            IntPtr ptr = CPyMarshal.Offset(arena.start, arena.carved * blockSize);
+            arena.SetAllocated(arena.carved, true);
+            arena.carved += 1;
+            return ptr;
+        }
+
+        private Arena
+        NewArena(int sizeClass)
+        {
+            IntPtr start = Marshal.AllocHGlobal(ARENA_SIZE);
+            Arena arena = new Arena(start, ARENA_SIZE, sizeClass, SIZE_CLASSES[sizeClass]);
+            this.arenas.Add(arena);
+            this.currentArenas[sizeClass] = arena;
+
+            long first = start.ToInt64() >> ARENA_SHIFT;
+            long last = (arena.end.ToInt64() - 1) >> ARENA_SHIFT;
+            for (long key = first; key <= last; key++)
+            {
+                List<Arena> bucket;
+                if (!this.arenaIndex.TryGetValue(key, out bucket))
+                {
+                    bucket = new List<Arena>(2);
+                    this.arenaIndex[key] = bucket;
+                }
+                bucket.Add(arena);
+            }
+            return arena;
+        }
+
+        private Arena
+        FindArena(IntPtr ptr)
+        {
+            List<Arena> bucket;
+            if (!this.arenaIndex.TryGetValue(ptr.ToInt64() >> ARENA_SHIFT, out bucket))
+            {
+                return null;
+            }
+            foreach (Arena arena in bucket)
+            {
+                if (arena.Holds(ptr))
+                {
+                    return arena;
+                }
+            }
+            return null;
+        }
+    }
+}
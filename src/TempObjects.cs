@@ -0,0 +1,170 @@
+using System;
+using System.Diagnostics;
+
+namespace Ironclad
+{
+    public delegate void PtrCountFunc(IntPtr ptr, int count);
+
+    public class TempObjects
+    {
+        // Remembers the ptrs which DecRefLater promised to DecRef when the current GIL
+        // scope ends. Every scope shares the same pair of arrays: Push just remembers
+        // where the new scope starts, and Pop releases everything above that, so nothing
+        // is allocated once the arrays are big enough. A ptr which was added very
+        // recently in the same scope (say, by the same lookup in a loop) just has its
+        // count bumped, and is released with a single call.
+        private const int INITIAL_CAPACITY = 64;
+        private const int COALESCE_WINDOW = 8;
+
+        private PtrCountFunc release;
+        private IntPtr[] ptrs = new IntPtr[INITIAL_CAPACITY];
+        private int[] counts = new int[INITIAL_CAPACITY];
+        private int count = 0;
+        private int[] scopes = new int[16];
+        private int depth = 0;
+        private int floor = 0;
+
+        private long scopesReleased = 0;
+        private long tempsReleased = 0;
+        private long coalesced = 0;
+        private int maxTemps = 0;
+        private long maxReleaseTicks = 0;
+        private long totalReleaseTicks = 0;
+
+        public TempObjects(PtrCountFunc release)
+        {
+            this.release = release;
+        }
+
+        public int Depth { get { return this.depth; } }
+        public int Count { get { return this.count; } }
+
+        public long ScopesReleased { get { return this.scopesReleased; } }
+        public long TempsReleased { get { return this.tempsReleased; } }
+        public long Coalesced { get { return this.coalesced; } }
+        public int MaxTemps { get { return this.maxTemps; } }
+        public double MaxReleaseMilliseconds { get { return TicksToMilliseconds(this.maxReleaseTicks); } }
+        public double TotalReleaseMilliseconds { get { return TicksToMilliseconds(this.totalReleaseTicks); } }
+
+        public void
+        Push()
+        {
+            if (this.depth == this.scopes.Length)
+            {
+                Array.Resize(ref this.scopes, this.depth * 2);
+            }
+            this.scopes[this.depth++] = this.count;
+        }
+
+        public void
+        Add(IntPtr ptr)
+        {
+            if (this.depth == 0)
+            {
+                return;
+            }
+
+            // don't coalesce into another scope, or into ptrs which are being released
+            int start = Math.Max(this.scopes[this.depth - 1], this.floor);
+            int stop = Math.Max(start, this.count - COALESCE_WINDOW);
+            for (int i = this.count - 1; i >= stop; i--)
+            {
+                if (this.ptrs[i] == ptr)
+                {
+                    this.counts[i] += 1;
+                    this.coalesced += 1;
+                    return;
+                }
+            }
+
+            if (this.count == this.ptrs.Length)
+            {
+                Array.Resize(ref this.ptrs, this.count * 2);
+                Array.Resize(ref this.counts, this.count * 2);
+            }
+            this.ptrs[this.count] = ptr;
+            this.counts[this.count] = 1;
+            this.count += 1;
+        }
+
+        public void
+        Pop()
+        {
+            if (this.depth == 0)
+            {
+                return;
+            }
+
+            int start = this.scopes[--this.depth];
+            int end = this.count;
+            this.scopesReleased += 1;
+            if (start == end)
+            {
+                return;
+            }
+
+            long startTicks = Stopwatch.GetTimestamp();
+            int oldFloor = this.floor;
+
+            // anything added while we release goes above end, into the enclosing scope
+            this.floor = end;
+            int temps = 0;
+            try
+            {
+                for (int i = start; i < end; i++)
+                {
+                    temps += this.counts[i];
+                    this.release(this.ptrs[i], this.counts[i]);
+                }
+            }
+            finally
+            {
+                int added = this.count - end;
+                Array.Copy(this.ptrs, end, this.ptrs, start, added);
+                Array.Copy(this.counts, end, this.counts, start, added);
+                this.count = start + added;
+                this.floor = oldFloor;
+            }
+
+            long ticks = Stopwatch.GetTimestamp() - startTicks;
+            this.tempsReleased += temps;
+            this.totalReleaseTicks += ticks;
+            if (temps > this.maxTemps)
+            {
+                this.maxTemps = temps;
+            }
+            if (ticks > this.maxReleaseTicks)
+            {
+                this.maxReleaseTicks = ticks;
+            }
+        }
+
+        public void
+        AddCounters(TempObjects other)
+        {
+            this.scopesReleased += other.scopesReleased;
+            this.tempsReleased += other.tempsReleased;
+            this.coalesced += other.coalesced;
+            this.maxTemps = Math.Max(this.maxTemps, other.maxTemps);
+            this.maxReleaseTicks = Math.Max(this.maxReleaseTicks, other.maxReleaseTicks);
+            this.totalReleaseTicks += other.totalReleaseTicks;
+        }
+
+        public void
+        ResetCounters()
+        {
+            this.scopesReleased = 0;
+            this.tempsReleased = 0;
+            this.coalesced = 0;
+            this.maxTemps = 0;
+            this.maxReleaseTicks = 0;
+            this.totalReleaseTicks = 0;
+        }
+
+        private static double
+        TicksToMilliseconds(long ticks)
+        {
+            return (ticks * 1000.0) / Stopwatch.Frequency;
+        }
+    }
+}
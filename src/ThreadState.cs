@@ -29,20 +29,62 @@ namespace Ironclad
             get { return this.ptr; }
         }
         
+        public bool
+        HasPendingError
+        {
+            // C code (PyErr_Restore, for one) sets curexc_type directly, so it's the only
+            // flag we can trust
+            get { return PyThreadStateRef.CurexcType(this.ptr) != IntPtr.Zero; }
+        }
+        
+        private object
+        MakeError(IntPtr typePtr, IntPtr valuePtr)
+        {
+            object[] args = new object[0];
+            if (valuePtr != IntPtr.Zero)
+            {
+                args = new object[] { this.mapper.Retrieve(valuePtr) };
+            }
+            return PythonCalls.Call(this.mapper.Retrieve(typePtr), args);
+        }
+        
+        public object
+        FetchError()
+        {
+            // same as getting LastException and then setting it to null, but only reads
+            // each field once, and only builds the exception once
+            IntPtr typePtr = PyThreadStateRef.CurexcType(this.ptr);
+            if (typePtr == IntPtr.Zero)
+            {
+                return null;
+            }
+            IntPtr valuePtr = PyThreadStateRef.CurexcValue(this.ptr);
+            IntPtr tracebackPtr = PyThreadStateRef.CurexcTraceback(this.ptr);
+            object error = this.MakeError(typePtr, valuePtr);
+            
+            PyThreadStateRef.CurexcType(this.ptr, IntPtr.Zero);
+            PyThreadStateRef.CurexcValue(this.ptr, IntPtr.Zero);
+            PyThreadStateRef.CurexcTraceback(this.ptr, IntPtr.Zero);
+            this.mapper.DecRef(typePtr);
+            if (valuePtr != IntPtr.Zero)
+            {
+                this.mapper.DecRef(valuePtr);
+            }
+            if (tracebackPtr != IntPtr.Zero)
+            {
+                this.mapper.DecRef(tracebackPtr);
+            }
+            return error;
+        }
+        
         public object LastException
         {
             get
             {
-                IntPtr typePtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyThreadState), "curexc_type");
+                IntPtr typePtr = PyThreadStateRef.CurexcType(this.ptr);
                 if (typePtr != IntPtr.Zero)
                 {
-                    object[] args = new object[0];
-                    IntPtr valuePtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyThreadState), "curexc_value");
-                    if (valuePtr != IntPtr.Zero)
-                    {
-                        args = new object[] { this.mapper.Retrieve(valuePtr) };
-                    }
-                    return PythonCalls.Call(this.mapper.Retrieve(typePtr), args);
+                    return this.MakeError(typePtr, PyThreadStateRef.CurexcValue(this.ptr));
                 }
                 else
                 {
@@ -56,34 +98,34 @@ namespace Ironclad
                     value = InappropriateReflection.GetPythonException((Exception)value);
                 }
                 
-                IntPtr typePtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyThreadState), "curexc_type");
+                IntPtr typePtr = PyThreadStateRef.CurexcType(this.ptr);
                 if (typePtr != IntPtr.Zero)
                 {
                     this.mapper.DecRef(typePtr);
                 }
-                IntPtr valuePtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyThreadState), "curexc_value");
+                IntPtr valuePtr = PyThreadStateRef.CurexcValue(this.ptr);
                 if (valuePtr != IntPtr.Zero)
                 {
                     this.mapper.DecRef(valuePtr);
                 }
-                IntPtr tracebackPtr = CPyMarshal.ReadPtrField(this.ptr, typeof(PyThreadState), "curexc_traceback");
+                IntPtr tracebackPtr = PyThreadStateRef.CurexcTraceback(this.ptr);
                 if (tracebackPtr != IntPtr.Zero)
                 {
                     this.mapper.DecRef(tracebackPtr);
                 }
                 
                 // traceback almost completely ignored in ironclad
-                CPyMarshal.WritePtrField(this.ptr, typeof(PyThreadState), "curexc_traceback", IntPtr.Zero);
+                PyThreadStateRef.CurexcTraceback(this.ptr, IntPtr.Zero);
                 if (value == null)
                 {
-                    CPyMarshal.WritePtrField(this.ptr, typeof(PyThreadState), "curexc_type", IntPtr.Zero);
-                    CPyMarshal.WritePtrField(this.ptr, typeof(PyThreadState), "curexc_value", IntPtr.Zero);
+                    PyThreadStateRef.CurexcType(this.ptr, IntPtr.Zero);
+                    PyThreadStateRef.CurexcValue(this.ptr, IntPtr.Zero);
                 }
                 else
                 {
                     object excType = PythonCalls.Call(Builtin.type, new object[] { value });
-                    CPyMarshal.WritePtrField(this.ptr, typeof(PyThreadState), "curexc_type", this.mapper.Store(excType));
-                    CPyMarshal.WritePtrField(this.ptr, typeof(PyThreadState), "curexc_value", this.mapper.Store(value.ToString()));
+                    PyThreadStateRef.CurexcType(this.ptr, this.mapper.Store(excType));
+                    PyThreadStateRef.CurexcValue(this.ptr, this.mapper.Store(value.ToString()));
                 }
             }
         }
@@ -25,6 +25,16 @@ namespace Ironclad
         PyStringObject,
         PyTupleObject,
         PyListObject,
+        PyDictObject,
+    }
+
+    internal enum ActualisationKind
+    {
+        Object,
+        Int,
+        Float,
+        String,
+        Type,
     }
 
     public class BadRefCountException : Exception
@@ -56,24 +66,53 @@ namespace Ironclad
         private object removeSysHacks;
         private object kindaDictProxy;
         private object cFileClass;
-        private Lock GIL;
+        private InterpreterLock GIL;
 
         private bool alive = false;
         private bool logErrors = false;
         
         private InterestingPtrMap map = new InterestingPtrMap();
+        private DispatchTable dispatchTable = new DispatchTable();
+        private CodeCache codeCache;
+        private ClassEngine classEngine = DefaultClassEngine;
         private Dictionary<IntPtr, ActualiseDelegate> actualisableTypes = new Dictionary<IntPtr, ActualiseDelegate>();
         private Dictionary<IntPtr, object> classStubs = new Dictionary<IntPtr, object>();
+        private Dictionary<IntPtr, ActualisationKind> actualisationKinds = new Dictionary<IntPtr, ActualisationKind>();
         private Dictionary<IntPtr, UnmanagedDataMarker> incompleteObjects = new Dictionary<IntPtr, UnmanagedDataMarker>();
         private Dictionary<IntPtr, List> listsBeingActualised = new Dictionary<IntPtr, List>();
+        private Dictionary<IntPtr, int> staleLists = new Dictionary<IntPtr, int>();
+        private Dictionary<IntPtr, object[]> dictIterKeys = new Dictionary<IntPtr, object[]>();
+        private Dictionary<IntPtr, Dictionary<string, IntPtr>> nativeDicts = new Dictionary<IntPtr, Dictionary<string, IntPtr>>();
+        private bool preferNativeDicts = false;
+        private bool deferListAppends = false;
+        private IntPtr deallocQueue = IntPtr.Zero;
+        private dgt_void_void drainDeallocQueue;
+        private List<IntPtr> drainingDeallocs = null;
+        private List<IntPtr> deallocPtrs = new List<IntPtr>();
+        private Dictionary<IntPtr, bool> deallocsDone = new Dictionary<IntPtr, bool>();
+        private bool queueDeallocs = false;
         private Dictionary<string, IntPtr> internedStrings = new Dictionary<string, IntPtr>();
+        private Dictionary<IntPtr, string> attrNames = new Dictionary<IntPtr, string>();
+        private Dictionary<IntPtr, WeakReference> nativeStrings = new Dictionary<IntPtr, WeakReference>();
+        private int lazyStringThreshold = 0;
         private Dictionary<IntPtr, IntPtr> FILEs = new Dictionary<IntPtr, IntPtr>();
         private Stack<dgt_void_void> exitfuncs = new Stack<dgt_void_void>();
 
-        private LocalDataStoreSlot _lockCount = Thread.AllocateDataSlot();
-        private LocalDataStoreSlot _threadState = Thread.AllocateDataSlot();
+        private IntPtr[] smallInts = new IntPtr[0];
+        private int smallIntMin = 0;
+        private long smallIntHits = 0;
+        private long smallIntMisses = 0;
+        private FreeList intFreeList;
+        private FreeList floatFreeList;
+        private FreeList complexFreeList;
 
-        public Stack<List<IntPtr>> tempObjects = new Stack<List<IntPtr>>();
+        private ThreadLocal<Counter> _lockCount = new ThreadLocal<Counter>();
+        private ThreadLocal<ThreadState> _threadState = new ThreadLocal<ThreadState>();
+        private ThreadLocal<TempObjects> _tempObjects = new ThreadLocal<TempObjects>();
+        private TempObjects tempObjectTotals = new TempObjects(null);
+        private PtrCountFunc releaseTempObject;
+
+        public static ClassEngine DefaultClassEngine = ClassEngine.Generated;
 
         // TODO: must be a better way to handle imports...
         // public to allow manipulation from test code
@@ -117,9 +156,14 @@ namespace Ironclad
 
         private void Init(PythonContext inPython, string stubPath, IAllocator inAllocator)
         {
-            this.GIL = new Lock();
+            this.GIL = new InterpreterLock();
+            this.releaseTempObject = new PtrCountFunc(this.DecRef);
             this.python = inPython;
+            this.codeCache = new CodeCache(this.python);
             this.allocator = inAllocator;
+            this.intFreeList = new FreeList(this.allocator, (uint)Marshal.SizeOf(typeof(PyIntObject)));
+            this.floatFreeList = new FreeList(this.allocator, (uint)Marshal.SizeOf(typeof(PyFloatObject)));
+            this.complexFreeList = new FreeList(this.allocator, (uint)Marshal.SizeOf(typeof(PyComplexObject)));
             
             this.importNames.Push("");
             this.importFiles.Push(null);
@@ -159,14 +203,14 @@ namespace Ironclad
             
             try
             {
-                IntPtr typePtr = CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type");
+                IntPtr typePtr = PyObjectRef.Type(ptr);
                 if (typePtr == IntPtr.Zero)
                 {
                     // no type
                     return;
                 }
                 
-                if (CPyMarshal.ReadPtrField(typePtr, typeof(PyTypeObject), "tp_dealloc") == IntPtr.Zero)
+                if (PyTypeObjectRef.Dealloc(typePtr) == IntPtr.Zero)
                 {
                     // no dealloc function
                     return;
@@ -206,6 +250,11 @@ namespace Ironclad
             {
                 this.exitfuncs.Pop()();
             }
+            this.codeCache.Flush();
+            if (this.deallocQueue != IntPtr.Zero)
+            {
+                this.QueueDeallocs = false;
+            }
 
             PythonDictionary modules = (PythonDictionary)this.python.SystemState.Get__dict__()["modules"];
             if (!modules.Contains("numpy"))
@@ -221,6 +270,7 @@ namespace Ironclad
                 this.map.MapOverBridgePtrs(new PtrFunc(this.DumpPtr));
             }
             
+            this.DetachNativeStrings();
             this.allocator.FreeAll();
             foreach (IntPtr FILE in this.FILEs.Values)
             {
@@ -241,6 +291,11 @@ namespace Ironclad
                 this.importer.Dispose();
                 this.stub.Dispose();
             }
+            
+            // otherwise every thread's state (and this mapper) lives as long as the thread
+            this._lockCount.Dispose();
+            this._threadState.Dispose();
+            this._tempObjects.Dispose();
         }
         
         public void 
@@ -270,6 +325,116 @@ namespace Ironclad
             get { return this.map.GCThreshold; }
             set { this.map.GCThreshold = value; }
         }
+
+        public BridgeSweepCounters
+        BridgeSweepCounters
+        {
+            get { return this.map.SweepCounters; }
+        }
+
+        public DispatchTable
+        DispatchTable
+        {
+            get { return this.dispatchTable; }
+        }
+
+        public CodeCache
+        CodeCache
+        {
+            get { return this.codeCache; }
+        }
+
+        public ClassEngine
+        ClassEngine
+        {
+            // how GenerateClass builds classes for types it hasn't seen before
+            get { return this.classEngine; }
+            set { this.classEngine = value; }
+        }
+
+        public int
+        LazyStringThreshold
+        {
+            // strs built by C, at least this long, are Retrieved as NativeStrings; 0 disables
+            get { return this.lazyStringThreshold; }
+            set { this.lazyStringThreshold = Math.Max(0, value); }
+        }
+
+        public bool
+        DeferListAppends
+        {
+            // if true, PyList_Append only touches the PyListObject, and the managed List
+            // catches up when it's next Retrieved, or when the GIL is released
+            get { return this.deferListAppends; }
+            set
+            {
+                this.deferListAppends = value;
+                if (!value)
+                {
+                    this.SyncStaleLists();
+                }
+            }
+        }
+
+        public bool
+        PreferNativeDicts
+        {
+            // if true, PyDict_New creates dicts whose str-keyed items are only kept on the
+            // unmanaged side until something needs the managed dict
+            get { return this.preferNativeDicts; }
+            set { this.preferNativeDicts = value; }
+        }
+
+        public bool
+        QueueDeallocs
+        {
+            // if true, ints, floats, complexes and plain objects which C code lets go of are
+            // pushed onto the stub's deallocation queue, and freed in bulk when it's drained
+            get { return this.queueDeallocs; }
+            set
+            {
+                if (this.deallocQueue == IntPtr.Zero)
+                {
+                    throw new NotSupportedException("QueueDeallocs needs the stub's deallocation queue");
+                }
+                if (value != this.queueDeallocs)
+                {
+                    this.queueDeallocs = value;
+                    this.InstallQueuedDeallocs(value);
+                }
+            }
+        }
+
+        public double
+        SwitchInterval
+        {
+            get { return this.GIL.SwitchInterval; }
+            set { this.GIL.SwitchInterval = value; }
+        }
+
+        public long
+        GILHandoffs
+        {
+            get { return this.GIL.Handoffs; }
+        }
+
+        public double[]
+        GILWaitBucketLimits
+        {
+            get { return this.GIL.WaitBucketLimits; }
+        }
+
+        public Dictionary<int, long[]>
+        GetGILWaitHistograms()
+        {
+            return this.GIL.GetWaitHistograms();
+        }
+
+        public void
+        ResetGILWaitHistograms()
+        {
+            this.GIL.ResetWaitHistograms();
+        }
         
         public bool
         LogErrors
@@ -410,6 +575,11 @@ namespace Ironclad
                 return null;
             }
 
+            if (this.staleLists.Count > 0)
+            {
+                this.SyncStaleList(ptr);
+            }
+
             if (this.incompleteObjects.ContainsKey(ptr))
             {
                 switch (this.incompleteObjects[ptr])
@@ -426,6 +596,10 @@ namespace Ironclad
                         this.ActualiseList(ptr);
                         break;
 
+                    case UnmanagedDataMarker.PyDictObject:
+                        this.ActualiseDict(ptr);
+                        break;
+
                     default:
                         throw new Exception(String.Format("{0} pointed to unknown UDM", ptr.ToString("x")));
                 }
@@ -450,12 +624,16 @@ namespace Ironclad
                 this.map.UpdateStrength(ptr);
             }
             
-            return CPyMarshal.ReadIntField(ptr, typeof(PyObject), "ob_refcnt");
+            return PyObjectRef.Refcnt(ptr);
         }
         
         public void 
         IncRef(IntPtr ptr)
         {
+            if (this.map.TryIncRef(ptr))
+            {
+                return;
+            }
             this.AttemptToMap(ptr);
             
             if (!this.HasPtr(ptr))
@@ -464,8 +642,8 @@ namespace Ironclad
                     "IncRef: missing key in pointer map: {0}", ptr.ToString("x")));
             }
             
-            int count = CPyMarshal.ReadIntField(ptr, typeof(PyObject), "ob_refcnt");
-            CPyMarshal.WriteIntField(ptr, typeof(PyObject), "ob_refcnt", count + 1);
+            int count = PyObjectRef.Refcnt(ptr);
+            PyObjectRef.Refcnt(ptr, count + 1);
             
             if (this.map.HasPtr(ptr))
             {
@@ -476,6 +654,10 @@ namespace Ironclad
         public void 
         DecRef(IntPtr ptr)
         {
+            if (this.map.TryDecRef(ptr))
+            {
+                return;
+            }
             this.AttemptToMap(ptr);
             
             if (!this.HasPtr(ptr))
@@ -484,21 +666,21 @@ namespace Ironclad
                     "DecRef: missing key in pointer map: {0}", ptr.ToString("x")));
             }
             
-            int count = CPyMarshal.ReadIntField(ptr, typeof(PyObject), "ob_refcnt");
+            int count = PyObjectRef.Refcnt(ptr);
             if (count == 0)
             {
                 throw new BadRefCountException("Trying to DecRef an object with ref count 0");
             }
             else if (count == 1)
             {
-                IntPtr typePtr = CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type");
+                IntPtr typePtr = PyObjectRef.Type(ptr);
                 if (typePtr == IntPtr.Zero)
                 {
                     throw new CannotInterpretException(String.Format(
                         "Cannot destroy object at {0}: null type", ptr.ToString("x")));
                 }
                 
-                if (CPyMarshal.ReadPtrField(typePtr, typeof(PyTypeObject), "tp_dealloc") == IntPtr.Zero)
+                if (PyTypeObjectRef.Dealloc(typePtr) == IntPtr.Zero)
                 {
                     throw new CannotInterpretException(String.Format(
                         "Cannot destroy object at {0} with type at {1}: no dealloc function", ptr.ToString("x"), typePtr.ToString("x")));
@@ -510,13 +692,33 @@ namespace Ironclad
             }
             else
             {
-                CPyMarshal.WriteIntField(ptr, typeof(PyObject), "ob_refcnt", count - 1);
+                PyObjectRef.Refcnt(ptr, count - 1);
                 if (this.map.HasPtr(ptr))
                 {
                     this.map.UpdateStrength(ptr);
                 }
             }
         }
+
+        public void
+        DecRef(IntPtr ptr, int times)
+        {
+            // only the last DecRef can possibly deallocate, so the others can all be done at once
+            if (times > 1 && this.map.HasPtr(ptr))
+            {
+                int count = PyObjectRef.Refcnt(ptr);
+                int skip = Math.Min(times - 1, count - 1);
+                if (skip > 0)
+                {
+                    PyObjectRef.Refcnt(ptr, count - skip);
+                    times -= skip;
+                }
+            }
+            for (; times > 0; times--)
+            {
+                this.DecRef(ptr);
+            }
+        }
         
         public void 
         Strengthen(object obj)
@@ -568,6 +770,22 @@ namespace Ironclad
         public void Unmap(IntPtr ptr)
         {
             // TODO: very badly tested (things break fast if this isn't here, but...)
+            if (this.nativeStrings.Count > 0)
+            {
+                this.DetachNativeString(ptr);
+            }
+            if (this.staleLists.Count > 0)
+            {
+                this.staleLists.Remove(ptr);
+            }
+            if (this.dictIterKeys.Count > 0)
+            {
+                this.dictIterKeys.Remove(ptr);
+            }
+            if (this.nativeDicts.Count > 0)
+            {
+                this.nativeDicts.Remove(ptr);
+            }
             if (this.map.HasPtr(ptr))
             {
                 this.map.Release(ptr);
@@ -580,11 +798,7 @@ namespace Ironclad
 
         public void DecRefLater(IntPtr ptr)
         {
-            if (this.tempObjects.Count > 0) {
-                if (this.tempObjects.Peek() != null) {
-                    this.tempObjects.Peek().Add(ptr);
-                }
-            }
+            this.TempObjects.Add(ptr);
         }
 
         public override int
@@ -0,0 +1,134 @@
+using System;
+using System.Collections.Generic;
+using System.Runtime.InteropServices;
+
+using Ironclad.Structs;
+
+
+namespace Ironclad
+{
+    public partial class PythonMapper : PythonApi
+    {
+        // _IC_DeallocQueue is laid out as { enqueue, drain, count, size, items[size] }
+        private const int DEALLOC_QUEUE_DRAIN = CPyMarshal.PtrSize;
+        private const int DEALLOC_QUEUE_COUNT = CPyMarshal.PtrSize * 2;
+        private const int DEALLOC_QUEUE_ITEMS = (CPyMarshal.PtrSize * 2) + (CPyMarshal.IntSize * 2);
+
+        public override void
+        Register__IC_DeallocQueue(IntPtr address)
+        {
+            this.drainDeallocQueue = new dgt_void_void(this.DrainDeallocQueue);
+            CPyMarshal.WritePtr(CPyMarshal.Offset(address, DEALLOC_QUEUE_DRAIN),
+                Marshal.GetFunctionPointerForDelegate(this.drainDeallocQueue));
+            this.deallocQueue = address;
+        }
+
+        private void
+        InstallQueuedDeallocs(bool queue)
+        {
+            if (!queue)
+            {
+                this.DrainDeallocQueue();
+            }
+            IntPtr enqueue = CPyMarshal.ReadPtr(this.deallocQueue);
+            IntPtr[] types = new IntPtr[] {
+                this.PyInt_Type, this.PyFloat_Type, this.PyComplex_Type, this.PyBaseObject_Type };
+            string[] deallocs = new string[] {
+                "IC_PyInt_Dealloc", "IC_PyFloat_Dealloc", "IC_PyComplex_Dealloc", "IC_PyBaseObject_Dealloc" };
+            for (int i = 0; i < types.Length; i++)
+            {
+                PyTypeObjectRef.Dealloc(types[i], queue ? enqueue : this.GetFuncPtr(deallocs[i]));
+            }
+        }
+
+        private int
+        QueuedDeallocCount()
+        {
+            return CPyMarshal.ReadInt(CPyMarshal.Offset(this.deallocQueue, DEALLOC_QUEUE_COUNT));
+        }
+
+        private void
+        TakeQueuedDeallocs(List<IntPtr> ptrs)
+        {
+            int count = this.QueuedDeallocCount();
+            IntPtr itemPtr = CPyMarshal.Offset(this.deallocQueue, DEALLOC_QUEUE_ITEMS);
+            for (int i = 0; i < count; i++)
+            {
+                ptrs.Add(CPyMarshal.ReadPtr(itemPtr));
+                itemPtr = CPyMarshal.Offset(itemPtr, CPyMarshal.PtrSize);
+            }
+            CPyMarshal.WriteInt(CPyMarshal.Offset(this.deallocQueue, DEALLOC_QUEUE_COUNT), 0);
+        }
+
+        public void
+        DrainDeallocQueue()
+        {
+            if (this.drainingDeallocs != null)
+            {
+                // the queue filled up again while we were draining it; the outer call
+                // will get round to these
+                this.TakeQueuedDeallocs(this.drainingDeallocs);
+                return;
+            }
+
+            if (this.deallocQueue == IntPtr.Zero || this.QueuedDeallocCount() == 0)
+            {
+                return;
+            }
+
+            // the same list and set are reused for every drain
+            List<IntPtr> ptrs = this.deallocPtrs;
+            Dictionary<IntPtr, bool> done = this.deallocsDone;
+            this.drainingDeallocs = ptrs;
+            try
+            {
+                this.TakeQueuedDeallocs(ptrs);
+                for (int i = 0; i < ptrs.Count; i++)
+                {
+                    IntPtr ptr = ptrs[i];
+                    // anything with a refcount was resurrected (say, by a Store) after it was
+                    // queued, and will be queued again if it's ever let go of
+                    if (!done.ContainsKey(ptr) && PyObjectRef.Refcnt(ptr) == 0)
+                    {
+                        done[ptr] = true;
+                        this.DeallocQueued(ptr);
+                    }
+                    if (i == ptrs.Count - 1)
+                    {
+                        this.TakeQueuedDeallocs(ptrs);
+                    }
+                }
+            }
+            finally
+            {
+                ptrs.Clear();
+                done.Clear();
+                this.drainingDeallocs = null;
+            }
+        }
+
+        private void
+        DeallocQueued(IntPtr ptr)
+        {
+            // only the exact types have their own deallocs: anything else which can end
+            // up here inherited its tp_dealloc, and would have been tp_freed anyway
+            IntPtr typePtr = PyObjectRef.Type(ptr);
+            if (typePtr == this.PyInt_Type)
+            {
+                this.IC_PyInt_Dealloc(ptr);
+            }
+            else if (typePtr == this.PyFloat_Type)
+            {
+                this.IC_PyFloat_Dealloc(ptr);
+            }
+            else if (typePtr == this.PyComplex_Type)
+            {
+                this.IC_PyComplex_Dealloc(ptr);
+            }
+            else
+            {
+                this.IC_PyBaseObject_Dealloc(ptr);
+            }
+        }
+    }
+}
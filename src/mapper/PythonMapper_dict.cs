@@ -1,5 +1,6 @@
 using System;
 using System.Collections;
+using System.Collections.Generic;
 using System.Runtime.InteropServices;
 
 using IronPython.Modules;
@@ -17,9 +18,73 @@ namespace Ironclad
         public override IntPtr
         PyDict_New()
         {
+            if (this.preferNativeDicts)
+            {
+                return this.IC_PyDict_NewNative();
+            }
             return this.Store(new PythonDictionary());
         }
         
+        private IntPtr
+        IC_PyDict_NewNative()
+        {
+            // the PythonDictionary won't exist until something Retrieves this dict; until then,
+            // we own a reference to each item, and hand out borrowed references as CPython does
+            IntPtr dictPtr = this.allocator.Alloc((uint)Marshal.SizeOf(typeof(PyObject)));
+            PyObjectRef.Refcnt(dictPtr, 1);
+            PyObjectRef.Type(dictPtr, this.PyDict_Type);
+            this.nativeDicts[dictPtr] = new Dictionary<string, IntPtr>();
+            this.incompleteObjects[dictPtr] = UnmanagedDataMarker.PyDictObject;
+            return dictPtr;
+        }
+        
+        private Dictionary<string, IntPtr>
+        GetNativeDictItems(IntPtr dictPtr, object key)
+        {
+            // anything but a str key needs the real dict's idea of equality
+            Dictionary<string, IntPtr> items;
+            if (this.nativeDicts.Count > 0 && this.nativeDicts.TryGetValue(dictPtr, out items))
+            {
+                if (key is string)
+                {
+                    return items;
+                }
+                this.Retrieve(dictPtr);
+            }
+            return null;
+        }
+        
+        private void
+        ActualiseDict(IntPtr dictPtr)
+        {
+            Dictionary<string, IntPtr> items = this.nativeDicts[dictPtr];
+            PythonDictionary dict = new PythonDictionary();
+            foreach (KeyValuePair<string, IntPtr> kvp in items)
+            {
+                dict[kvp.Key] = this.Retrieve(kvp.Value);
+                // C may still be holding borrowed references
+                this.DecRefLater(kvp.Value);
+            }
+            this.nativeDicts.Remove(dictPtr);
+            this.incompleteObjects.Remove(dictPtr);
+            this.map.Associate(dictPtr, dict);
+        }
+        
+        public override void
+        IC_PyDict_Dealloc(IntPtr dictPtr)
+        {
+            Dictionary<string, IntPtr> items;
+            if (this.nativeDicts.TryGetValue(dictPtr, out items))
+            {
+                this.nativeDicts.Remove(dictPtr);
+                foreach (IntPtr itemPtr in items.Values)
+                {
+                    this.DecRef(itemPtr);
+                }
+            }
+            this.IC_PyBaseObject_Dealloc(dictPtr);
+        }
+        
         public override int
         IC_PyDict_Init(IntPtr _, IntPtr __, IntPtr ___)
         {
@@ -40,16 +105,26 @@ namespace Ironclad
             return dictPtr;
         }
         
-        public override int
-        PyDict_Size(IntPtr dictPtr)
+        private int
+        IC_PyDict_Size(IDictionary dict)
         {
-            IDictionary dict = (IDictionary)this.Retrieve(dictPtr);
             if (dict is DictProxy)
             {
                 DictProxy proxy = (DictProxy)dict;
                 return proxy.__len__(this.scratchContext);
             }
-            return dict.Keys.Count;
+            return dict.Count;
+        }
+        
+        public override int
+        PyDict_Size(IntPtr dictPtr)
+        {
+            Dictionary<string, IntPtr> items;
+            if (this.nativeDicts.Count > 0 && this.nativeDicts.TryGetValue(dictPtr, out items))
+            {
+                return items.Count;
+            }
+            return this.IC_PyDict_Size((IDictionary)this.Retrieve(dictPtr));
         }
         
         public override int
@@ -59,6 +134,7 @@ namespace Ironclad
             {
                 PythonDictionary dst = (PythonDictionary)this.Retrieve(dstPtr);
                 dst.update(this.scratchContext, this.Retrieve(srcPtr));
+                this.dictIterKeys.Remove(dstPtr);
                 return 0;
             }
             catch (Exception e)
@@ -93,6 +169,17 @@ namespace Ironclad
         private IntPtr
         IC_PyDict_Get(IntPtr dictPtr, object key)
         {
+            Dictionary<string, IntPtr> items = this.GetNativeDictItems(dictPtr, key);
+            if (items != null)
+            {
+                IntPtr itemPtr;
+                if (items.TryGetValue((string)key, out itemPtr))
+                {
+                    return itemPtr;
+                }
+                return IntPtr.Zero;
+            }
+            
             IDictionary dict = (IDictionary)this.Retrieve(dictPtr);
             if (dict.Contains(key))
             {
@@ -107,7 +194,7 @@ namespace Ironclad
         public override IntPtr
         PyDict_GetItem(IntPtr dictPtr, IntPtr keyPtr)
         {
-            return this.IC_PyDict_Get(dictPtr, this.Retrieve(keyPtr));
+            return this.IC_PyDict_Get(dictPtr, Unwrap(this.Retrieve(keyPtr)));
         }
         
         
@@ -125,22 +212,46 @@ namespace Ironclad
             if (dict is DictProxy)
             {
                 PythonType _type = InappropriateReflection.PythonTypeFromDictProxy((DictProxy)dict);
-                Builtin.setattr(this.scratchContext, _type, (string)key, item);
+                Builtin.setattr(this.scratchContext, _type, AsString(key), item);
             }
             else
             {
+                if (this.dictIterKeys.Count > 0 && !dict.Contains(key))
+                {
+                    this.dictIterKeys.Remove(dictPtr);
+                }
                 dict[key] = item;
             }
             return 0;
         }
 
 
+        private int
+        IC_PyDict_SetNative(Dictionary<string, IntPtr> items, string key, IntPtr itemPtr)
+        {
+            this.IncRef(itemPtr);
+            IntPtr oldPtr;
+            bool replacing = items.TryGetValue(key, out oldPtr);
+            items[key] = itemPtr;
+            if (replacing)
+            {
+                this.DecRef(oldPtr);
+            }
+            return 0;
+        }
+
         public override int
         PyDict_SetItem(IntPtr dictPtr, IntPtr keyPtr, IntPtr itemPtr)
         {
             try
             {
-                return this.IC_PyDict_Set(dictPtr, this.Retrieve(keyPtr), this.Retrieve(itemPtr));
+                object key = Unwrap(this.Retrieve(keyPtr));
+                Dictionary<string, IntPtr> items = this.GetNativeDictItems(dictPtr, key);
+                if (items != null)
+                {
+                    return this.IC_PyDict_SetNative(items, (string)key, itemPtr);
+                }
+                return this.IC_PyDict_Set(dictPtr, key, this.Retrieve(itemPtr));
             }
             catch (Exception e)
             {
@@ -152,18 +263,37 @@ namespace Ironclad
         public override int
         PyDict_SetItemString(IntPtr dictPtr, string key, IntPtr itemPtr)
         {
+            Dictionary<string, IntPtr> items = this.GetNativeDictItems(dictPtr, key);
+            if (items != null)
+            {
+                return this.IC_PyDict_SetNative(items, key, itemPtr);
+            }
             return this.IC_PyDict_Set(dictPtr, key, this.Retrieve(itemPtr));
         }
         
         private int
         IC_PyDict_Del(IntPtr dictPtr, object key)
         {
+            Dictionary<string, IntPtr> items = this.GetNativeDictItems(dictPtr, key);
+            if (items != null)
+            {
+                IntPtr oldPtr;
+                if (items.TryGetValue((string)key, out oldPtr))
+                {
+                    items.Remove((string)key);
+                    this.DecRef(oldPtr);
+                    return 0;
+                }
+                return -1;
+            }
+            
             IDictionary dict = (IDictionary)this.Retrieve(dictPtr);
             // induce a TypeError, in case key is unhashable
             PythonOps.Hash(this.scratchContext, key);
             if (dict.Contains(key))
             {
                 dict.Remove(key);
+                this.dictIterKeys.Remove(dictPtr);
                 return 0;
             }
             return -1;
@@ -174,7 +304,7 @@ namespace Ironclad
         {
             try
             {
-                object key = this.Retrieve(keyPtr);
+                object key = Unwrap(this.Retrieve(keyPtr));
                 return this.IC_PyDict_Del(dictPtr, key);
             }
             catch (Exception e)
@@ -199,26 +329,38 @@ namespace Ironclad
             return this.Store(values);
         }
         
+        private object[]
+        GetDictIterKeys(IntPtr dictPtr, IDictionary dict, int pos)
+        {
+            // PyDict_Next loops work from a snapshot of the keys, taken when pos is 0; it's
+            // thrown away when the loop finishes, when we notice the dict has changed size
+            // (or change it ourselves), and when the GIL is finally released
+            object[] keys;
+            if (pos == 0 || !this.dictIterKeys.TryGetValue(dictPtr, out keys) || keys.Length != this.IC_PyDict_Size(dict))
+            {
+                ICollection dictKeys = dict.Keys;
+                keys = new object[dictKeys.Count];
+                dictKeys.CopyTo(keys, 0);
+                this.dictIterKeys[dictPtr] = keys;
+            }
+            return keys;
+        }
+        
         public override int
         PyDict_Next(IntPtr dictPtr, IntPtr posPtr, IntPtr keyPtrPtr, IntPtr valuePtrPtr)
         {
-            // note: this is not efficient, and assumes constant ordering of results from 
-            // KeyCollection.GetEnumerator. Storing an iterator would probably work,
-            // but we can't work out how to not leak it if iteration does not complete.
             try
             {
                 IDictionary dict = (IDictionary)this.Retrieve(dictPtr);
-                IEnumerator keys = dict.Keys.GetEnumerator();
                 int pos = CPyMarshal.ReadInt(posPtr);
-                for (int i = 0; i <= pos; i++)
+                object[] keys = this.GetDictIterKeys(dictPtr, dict, pos);
+                if (pos >= keys.Length)
                 {
-                    if (!keys.MoveNext())
-                    {
-                        return 0;
-                    }
+                    this.dictIterKeys.Remove(dictPtr);
+                    return 0;
                 }
 
-                object key = keys.Current;
+                object key = keys[pos];
                 IntPtr keyPtr = this.Store(key);
                 this.DecRefLater(keyPtr);
                 CPyMarshal.WritePtr(keyPtrPtr, keyPtr);
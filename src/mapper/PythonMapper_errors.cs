@@ -27,7 +27,7 @@ namespace Ironclad
         public override void
         PyErr_Print()
         {
-            if (this.LastException == null)
+            if (!this.HasPendingError)
             {
                 throw new Exception("Fatal error: called PyErr_Print without an actual error to print.");
             }
@@ -36,7 +36,7 @@ namespace Ironclad
         {
             try
             {
-                string name = (string)this.Retrieve(namePtr);
+                string name = this.RetrieveString(namePtr);
                 return this.Store(this.Import(name));
             }
             catch (Exception e)
@@ -75,8 +75,9 @@ namespace Ironclad
             try
             {
                 // TODO: there must be a better way to do this
-                return (PythonModule)this.CreateFromSnippet(
-                    String.Format(CodeSnippets.IMPORT_TEMPLATE, name), "_ironclad_module");
+                this.scratchModule.Get__dict__()["_ironclad_import_name"] = name;
+                this.ExecCachedInModule(CodeSnippets.IMPORT_CODE, this.scratchModule);
+                return (PythonModule)this.scratchModule.Get__dict__()["_ironclad_module"];
             }
             finally
             {
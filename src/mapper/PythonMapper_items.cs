@@ -0,0 +1,122 @@
+using System;
+using System.Collections.Generic;
+using System.Runtime.InteropServices;
+
+using IronPython.Runtime.Operations;
+
+using Ironclad.Structs;
+
+namespace Ironclad
+{
+    public partial class PythonMapper : PythonApi
+    {
+        // Lists and tuples are often full of ints, floats and strs, and the general-purpose
+        // Store and Retrieve do far more work than those need; these functions convert a
+        // whole ob_item array at once, and deal with those types directly.
+        
+        private void
+        StoreItems(IList<object> items, IntPtr itemsPtr)
+        {
+            int count = items.Count;
+            if (count == 0)
+            {
+                return;
+            }
+            
+            this.map.Reserve(count);
+            IntPtr[] ptrs = new IntPtr[count];
+            for (int i = 0; i < count; i++)
+            {
+                object item = items[i];
+                if (item is int)
+                {
+                    ptrs[i] = this.StoreItem((int)item, item);
+                }
+                else if (item is double)
+                {
+                    ptrs[i] = this.StoreItem((double)item, item);
+                }
+                else if (item is string)
+                {
+                    ptrs[i] = this.StoreItem((string)item);
+                }
+                else
+                {
+                    ptrs[i] = this.Store(item);
+                }
+            }
+            Marshal.Copy(ptrs, 0, itemsPtr, count);
+        }
+        
+        private IntPtr
+        StoreItem(int value, object boxed)
+        {
+            long index = (long)value - this.smallIntMin;
+            if (index >= 0 && index < this.smallInts.Length)
+            {
+                return this.StoreTyped(value);
+            }
+            
+            IntPtr ptr = this.intFreeList.Alloc();
+            PyIntObjectRef.Refcnt(ptr, 1);
+            PyIntObjectRef.Type(ptr, this.PyInt_Type);
+            PyIntObjectRef.Ival(ptr, value);
+            this.map.AssociateValue(ptr, boxed);
+            return ptr;
+        }
+        
+        private IntPtr
+        StoreItem(double value, object boxed)
+        {
+            IntPtr ptr = this.floatFreeList.Alloc();
+            PyFloatObjectRef.Refcnt(ptr, 1);
+            PyFloatObjectRef.Type(ptr, this.PyFloat_Type);
+            PyFloatObjectRef.Fval(ptr, value);
+            this.map.AssociateValue(ptr, boxed);
+            return ptr;
+        }
+        
+        private IntPtr
+        StoreItem(string str)
+        {
+            long id = PythonOps.Id(str);
+            IntPtr ptr;
+            if (this.map.TryGetPtr(id, out ptr))
+            {
+                this.IncRef(ptr);
+                return ptr;
+            }
+            return this.StoreString(str, id);
+        }
+        
+        private IntPtr[]
+        ReadItemPtrs(IntPtr itemsPtr, int count)
+        {
+            IntPtr[] ptrs = new IntPtr[count];
+            if (count > 0)
+            {
+                Marshal.Copy(itemsPtr, ptrs, 0, count);
+            }
+            return ptrs;
+        }
+        
+        private object
+        RetrieveItem(IntPtr ptr)
+        {
+            // already-mapped ints, floats and strs can skip straight to the map
+            if (ptr != IntPtr.Zero)
+            {
+                IntPtr typePtr = PyObjectRef.Type(ptr);
+                if (typePtr == this.PyInt_Type || typePtr == this.PyFloat_Type || typePtr == this.PyString_Type)
+                {
+                    object obj;
+                    if (this.map.TryGetSimpleObj(ptr, out obj))
+                    {
+                        return obj;
+                    }
+                }
+            }
+            return this.Retrieve(ptr);
+        }
+    }
+}
@@ -49,13 +49,8 @@ namespace Ironclad
             listStruct.allocated = length;
 
             uint bytes = (uint)length * CPyMarshal.PtrSize;
-            IntPtr data = this.allocator.Alloc(bytes);
-            listStruct.ob_item = data;
-            for (int i = 0; i < length; i++)
-            {
-                CPyMarshal.WritePtr(data, this.Store(list[i]));
-                data = CPyMarshal.Offset(data, CPyMarshal.PtrSize);
-            }
+            listStruct.ob_item = this.allocator.Alloc(bytes);
+            this.StoreItems(list, listStruct.ob_item);
 
             IntPtr listPtr = this.allocator.Alloc((uint)Marshal.SizeOf(typeof(PyListObject)));
             Marshal.StructureToPtr(listStruct, listPtr, false);
@@ -105,31 +100,28 @@ namespace Ironclad
         }   
         
         
-        private void 
-        IC_PyList_Append_Empty(IntPtr listPtr, ref PyListObject listStruct, IntPtr itemPtr)
-        {
-            listStruct.ob_size = 1;
-            listStruct.allocated = 1;
-            listStruct.ob_item = this.allocator.Alloc(CPyMarshal.PtrSize);
-            CPyMarshal.WritePtr(listStruct.ob_item, itemPtr);
-            Marshal.StructureToPtr(listStruct, listPtr, false);
-        }
-        
-        
-        private void 
-        IC_PyList_Append_NonEmpty(IntPtr listPtr, ref PyListObject listStruct, IntPtr itemPtr)
+        private void
+        IC_PyList_Resize(ref PyListObject listStruct, int newSize)
         {
-            int oldAllocated = listStruct.allocated;
-            int oldAllocatedBytes = oldAllocated * CPyMarshal.PtrSize;
-            listStruct.ob_size += 1;
-            listStruct.allocated += 1;
-            IntPtr oldDataStore = listStruct.ob_item;
-
-            int newAllocatedBytes = listStruct.allocated * CPyMarshal.PtrSize;
-            listStruct.ob_item = this.allocator.Realloc(listStruct.ob_item, (uint)newAllocatedBytes);
+            // same over-allocation as CPython's list_resize, so that n appends cost O(n)
+            if (newSize <= listStruct.allocated)
+            {
+                listStruct.ob_size = newSize;
+                return;
+            }
             
-            CPyMarshal.WritePtr(CPyMarshal.Offset(listStruct.ob_item, oldAllocatedBytes), itemPtr);
-            Marshal.StructureToPtr(listStruct, listPtr, false);
+            int newAllocated = newSize + (newSize >> 3) + (newSize < 9 ? 3 : 6);
+            uint newAllocatedBytes = (uint)(newAllocated * CPyMarshal.PtrSize);
+            if (listStruct.ob_item == IntPtr.Zero)
+            {
+                listStruct.ob_item = this.allocator.Alloc(newAllocatedBytes);
+            }
+            else
+            {
+                listStruct.ob_item = this.allocator.Realloc(listStruct.ob_item, newAllocatedBytes);
+            }
+            listStruct.ob_size = newSize;
+            listStruct.allocated = newAllocated;
         }
         
         
@@ -143,22 +135,72 @@ namespace Ironclad
                 return -1;
             }
 
-            if (listStruct.ob_item == IntPtr.Zero)
+            int index = listStruct.ob_size;
+            this.IC_PyList_Resize(ref listStruct, index + 1);
+            CPyMarshal.WritePtr(CPyMarshal.Offset(listStruct.ob_item, index * CPyMarshal.PtrSize), itemPtr);
+            Marshal.StructureToPtr(listStruct, listPtr, false);
+            this.IncRef(itemPtr);
+            
+            if (this.incompleteObjects.ContainsKey(listPtr))
             {
-                this.IC_PyList_Append_Empty(listPtr, ref listStruct, itemPtr);
+                // will be read in its entirety when it's first Retrieved
+                return 0;
             }
-            else
+            
+            if (this.deferListAppends && this.map.HasPtr(listPtr))
             {
-                this.IC_PyList_Append_NonEmpty(listPtr, ref listStruct, itemPtr);
+                int pending = 0;
+                this.staleLists.TryGetValue(listPtr, out pending);
+                this.staleLists[listPtr] = pending + 1;
+                return 0;
             }
             
             List list = (List)this.Retrieve(listPtr);
             list.append(this.Retrieve(itemPtr));
-            this.IncRef(itemPtr);
             return 0;
         }
         
         
+        private void
+        SyncStaleList(IntPtr listPtr)
+        {
+            // the last (pending) items in the PyListObject haven't made it into the List yet
+            int pending;
+            if (!this.staleLists.TryGetValue(listPtr, out pending))
+            {
+                return;
+            }
+            this.staleLists.Remove(listPtr);
+            
+            List list = (List)this.map.GetObj(listPtr);
+            int length = CPyMarshal.ReadIntField(listPtr, typeof(PyListObject), "ob_size");
+            IntPtr itemPtrPtr = CPyMarshal.ReadPtrField(listPtr, typeof(PyListObject), "ob_item");
+            itemPtrPtr = CPyMarshal.Offset(itemPtrPtr, (length - pending) * CPyMarshal.PtrSize);
+            for (int i = 0; i < pending; i++)
+            {
+                list.append(this.Retrieve(CPyMarshal.ReadPtr(itemPtrPtr)));
+                itemPtrPtr = CPyMarshal.Offset(itemPtrPtr, CPyMarshal.PtrSize);
+            }
+        }
+        
+        
+        private void
+        SyncStaleLists()
+        {
+            while (this.staleLists.Count > 0)
+            {
+                // syncing one list can Retrieve another, so don't hold an enumerator over them
+                IntPtr listPtr = IntPtr.Zero;
+                foreach (IntPtr ptr in this.staleLists.Keys)
+                {
+                    listPtr = ptr;
+                    break;
+                }
+                this.SyncStaleList(listPtr);
+            }
+        }
+        
+        
         public override int
         PyList_SetItem(IntPtr listPtr, int index, IntPtr itemPtr)
         {
@@ -261,28 +303,22 @@ namespace Ironclad
             this.listsBeingActualised[ptr] = newList;
             
             int length = CPyMarshal.ReadIntField(ptr, typeof(PyListObject), "ob_size");
-            if (length != 0)
+            IntPtr itemsPtr = CPyMarshal.ReadPtrField(ptr, typeof(PyListObject), "ob_item");
+            foreach (IntPtr itemPtr in this.ReadItemPtrs(itemsPtr, length))
             {
-                IntPtr itemPtrPtr = CPyMarshal.ReadPtrField(ptr, typeof(PyListObject), "ob_item");
-                for (int i = 0; i < length; i++)
+                if (itemPtr == IntPtr.Zero)
                 {
-                    IntPtr itemPtr = CPyMarshal.ReadPtr(itemPtrPtr);
-                    if (itemPtr == IntPtr.Zero)
-                    {
-                        // We have *no* idea what to do here.
-                        throw new ArgumentException("Attempted to Retrieve uninitialised PyListObject -- expect strange bugs");
-                    }
-                    
-                    if (this.listsBeingActualised.ContainsKey(itemPtr))
-                    {
-                        newList.append(this.listsBeingActualised[itemPtr]);
-                    }
-                    else
-                    {
-                        newList.append(this.Retrieve(itemPtr));
-                    }
-
-                    itemPtrPtr = CPyMarshal.Offset(itemPtrPtr, CPyMarshal.PtrSize);
+                    // We have *no* idea what to do here.
+                    throw new ArgumentException("Attempted to Retrieve uninitialised PyListObject -- expect strange bugs");
+                }
+                
+                if (this.listsBeingActualised.ContainsKey(itemPtr))
+                {
+                    newList.append(this.listsBeingActualised[itemPtr]);
+                }
+                else
+                {
+                    newList.append(this.RetrieveItem(itemPtr));
                 }
             }
             this.listsBeingActualised.Remove(ptr);
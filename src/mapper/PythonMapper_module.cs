@@ -115,9 +115,15 @@ namespace Ironclad
             __dict__["_dispatcher"] = new Dispatcher(this, methodTable, selfPtr);
 
             StringBuilder moduleCode = new StringBuilder();
-            moduleCode.Append(CodeSnippets.USEFUL_IMPORTS);
-            CallableBuilder.GenerateFunctions(moduleCode, methodsPtr, methodTable);
-            this.ExecInModule(moduleCode.ToString(), module);
+            List<object> slots = new List<object>();
+            CallableBuilder.GenerateFunctions(moduleCode, methodsPtr, methodTable, this.dispatchTable, slots);
+            this.ExecCachedInModule(CodeSnippets.USEFUL_IMPORTS, module);
+            if (moduleCode.Length > 0)
+            {
+                string factoryCode = CallableBuilder.BuildFactory(moduleCode, slots.Count, 0, "_ironclad_module_attrs");
+                __dict__.update(this.scratchContext, this.RunCachedFactory(
+                    factoryCode, __file__, slots, new List<object>(), __dict__["_dispatcher"], name));
+            }
             
             return this.Store(module);
         }
@@ -199,7 +205,29 @@ namespace Ironclad
         ExecInModule(string code, PythonModule module)
         {
             SourceUnit script = this.python.CreateSnippet(code, SourceCodeKind.Statements);
-            script.Execute(new Scope(new DictionaryWrapper((IDictionary<object, object>)module.Get__dict__())));
+            script.Execute(this.GetModuleScope(module));
+        }
+
+        private void
+        ExecCachedInModule(string code, PythonModule module)
+        {
+            this.codeCache.Exec(code, this.GetModuleScope(module));
+        }
+
+        private PythonDictionary
+        RunCachedFactory(string code, string pydPath, List<object> slots, List<object> closures, object dispatcher, string moduleName)
+        {
+            // code comes from CallableBuilder.BuildFactory; the factory returns a dict of
+            // whatever it defined, ready to go into a module or class
+            object factory = this.codeCache.GetFactory(code, pydPath);
+            return (PythonDictionary)PythonCalls.Call(this.scratchContext, factory,
+                new PythonTuple(slots.ToArray()), new PythonTuple(closures.ToArray()), dispatcher, moduleName);
+        }
+
+        private Scope
+        GetModuleScope(PythonModule module)
+        {
+            return new Scope(new DictionaryWrapper((IDictionary<object, object>)module.Get__dict__()));
         }
         
         public void
@@ -277,7 +305,7 @@ namespace Ironclad
             this.scratchModule = new PythonModule();
             this.scratchModule.Get__dict__()["_mapper"] = this;
 
-            this.ExecInModule(CodeSnippets.USEFUL_IMPORTS, this.scratchModule);
+            this.ExecCachedInModule(CodeSnippets.USEFUL_IMPORTS, this.scratchModule);
             this.scratchContext = new ModuleContext(this.scratchModule.Get__dict__(), this.python).GlobalContext;
         }
     }
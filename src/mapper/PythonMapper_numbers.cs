@@ -194,6 +194,84 @@ namespace Ironclad
             }
         }
 
+        public override void
+        IC_PyInt_Dealloc(IntPtr ptr)
+        {
+            if (CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type") != this.PyInt_Type)
+            {
+                this.IC_PyBaseObject_Dealloc(ptr);
+                return;
+            }
+            long index = (long)CPyMarshal.ReadIntField(ptr, typeof(PyIntObject), "ob_ival") - this.smallIntMin;
+            if (index >= 0 && index < this.smallInts.Length && this.smallInts[index] == ptr)
+            {
+                // immortal: stays mapped, waiting for the next Store
+                CPyMarshal.WriteIntField(ptr, typeof(PyObject), "ob_refcnt", 0);
+                return;
+            }
+            this.Unmap(ptr);
+            this.intFreeList.Free(ptr);
+        }
+
+        public override void
+        IC_PyFloat_Dealloc(IntPtr ptr)
+        {
+            if (CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type") != this.PyFloat_Type)
+            {
+                this.IC_PyBaseObject_Dealloc(ptr);
+                return;
+            }
+            this.Unmap(ptr);
+            this.floatFreeList.Free(ptr);
+        }
+
+        public override void
+        IC_PyComplex_Dealloc(IntPtr ptr)
+        {
+            if (CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type") != this.PyComplex_Type)
+            {
+                this.IC_PyBaseObject_Dealloc(ptr);
+                return;
+            }
+            this.Unmap(ptr);
+            this.complexFreeList.Free(ptr);
+        }
+
+        public void
+        SetSmallIntCacheRange(int min, int max)
+        {
+            // cached ints which nobody else references are only still alive because
+            // they're cached; anything with a refcount will be deallocated normally
+            foreach (IntPtr ptr in this.smallInts)
+            {
+                if (ptr != IntPtr.Zero && CPyMarshal.ReadIntField(ptr, typeof(PyObject), "ob_refcnt") == 0)
+                {
+                    this.PyObject_Free(ptr);
+                }
+            }
+            this.smallIntMin = min;
+            this.smallInts = new IntPtr[Math.Max(0, (long)max - min + 1)];
+        }
+
+        public int SmallIntCacheMin { get { return this.smallIntMin; } }
+        public int SmallIntCacheMax { get { return this.smallIntMin + this.smallInts.Length - 1; } }
+        public long SmallIntCacheHits { get { return this.smallIntHits; } }
+        public long SmallIntCacheMisses { get { return this.smallIntMisses; } }
+
+        public FreeList IntFreeList { get { return this.intFreeList; } }
+        public FreeList FloatFreeList { get { return this.floatFreeList; } }
+        public FreeList ComplexFreeList { get { return this.complexFreeList; } }
+
+        public void
+        ResetNumberCacheCounters()
+        {
+            this.smallIntHits = 0;
+            this.smallIntMisses = 0;
+            this.intFreeList.ResetCounters();
+            this.floatFreeList.ResetCounters();
+            this.complexFreeList.ResetCounters();
+        }
+
         public override IntPtr
         IC_PyFloat_New(IntPtr typePtr, IntPtr argsPtr, IntPtr kwargsPtr)
         {
@@ -239,11 +317,30 @@ namespace Ironclad
         private IntPtr
         StoreTyped(int value)
         {
-            IntPtr ptr = this.allocator.Alloc((uint)Marshal.SizeOf(typeof(PyIntObject)));
+            long index = (long)value - this.smallIntMin;
+            bool small = (index >= 0 && index < this.smallInts.Length);
+            if (small)
+            {
+                IntPtr cached = this.smallInts[index];
+                if (cached != IntPtr.Zero)
+                {
+                    this.smallIntHits += 1;
+                    int count = CPyMarshal.ReadIntField(cached, typeof(PyObject), "ob_refcnt");
+                    CPyMarshal.WriteIntField(cached, typeof(PyObject), "ob_refcnt", count + 1);
+                    return cached;
+                }
+                this.smallIntMisses += 1;
+            }
+
+            IntPtr ptr = this.intFreeList.Alloc();
             CPyMarshal.WriteIntField(ptr, typeof(PyIntObject), "ob_refcnt", 1);
             CPyMarshal.WritePtrField(ptr, typeof(PyIntObject), "ob_type", this.PyInt_Type);
             CPyMarshal.WriteIntField(ptr, typeof(PyIntObject), "ob_ival", value);
             this.map.Associate(ptr, value);
+            if (small)
+            {
+                this.smallInts[index] = ptr;
+            }
             return ptr;
         }
 
@@ -270,7 +367,7 @@ namespace Ironclad
         private IntPtr
         StoreTyped(double value)
         {
-            IntPtr ptr = this.allocator.Alloc((uint)Marshal.SizeOf(typeof(PyFloatObject)));
+            IntPtr ptr = this.floatFreeList.Alloc();
             CPyMarshal.WriteIntField(ptr, typeof(PyFloatObject), "ob_refcnt", 1);
             CPyMarshal.WritePtrField(ptr, typeof(PyFloatObject), "ob_type", this.PyFloat_Type);
             CPyMarshal.WriteDoubleField(ptr, typeof(PyFloatObject), "ob_fval", value);
@@ -281,7 +378,7 @@ namespace Ironclad
         private IntPtr
         StoreTyped(Complex value)
         {
-            IntPtr ptr = this.allocator.Alloc((uint)Marshal.SizeOf(typeof(PyComplexObject)));
+            IntPtr ptr = this.complexFreeList.Alloc();
             CPyMarshal.WriteIntField(ptr, typeof(PyComplexObject), "ob_refcnt", 1);
             CPyMarshal.WritePtrField(ptr, typeof(PyComplexObject), "ob_type", this.PyComplex_Type);
             IntPtr cpxptr = CPyMarshal.GetField(ptr, typeof(PyComplexObject), "cval");
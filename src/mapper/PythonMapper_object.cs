@@ -16,6 +16,8 @@ namespace Ironclad
 
     public partial class PythonMapper: PythonApi
     {
+        private const int MAX_ATTR_NAMES = 1024;
+
         public override IntPtr
         _PyObject_New(IntPtr typePtr)
         {
@@ -227,8 +229,8 @@ namespace Ironclad
         private IntPtr DoFoulImportHack(object[] argsArray)
         {
             PythonDictionary dest = (PythonDictionary)argsArray[1];
-            string tryimport = (string)argsArray[0];
-            string __name__ = (string)dest["__name__"];
+            string tryimport = AsString(argsArray[0]);
+            string __name__ = AsString(dest["__name__"]);
             
             object module = null;
             while (module == null)
@@ -248,7 +250,7 @@ namespace Ironclad
             ICollection fromList = (ICollection)argsArray[3];
             foreach (object name_ in fromList)
             {
-                string name = (string)name_;
+                string name = AsString(name_);
                 dest[name] = Builtin.getattr(this.scratchContext, module, name);
             }
             return this.Store(module);
@@ -312,31 +314,95 @@ namespace Ironclad
             }
         }
 
+        private string
+        GetAttrName(IntPtr namePtr)
+        {
+            // C code mostly asks for the same few names, from the same few string constants,
+            // so we remember what we read from each address rather than marshalling it again;
+            // the contents are checked every time, in case the address was a reused buffer
+            string name;
+            if (this.attrNames.TryGetValue(namePtr, out name) && CPyMarshal.Latin1StringEquals(namePtr, name))
+            {
+                return name;
+            }
+            if (this.attrNames.Count >= MAX_ATTR_NAMES)
+            {
+                this.attrNames.Clear();
+            }
+            name = String.Intern(CPyMarshal.ReadLatin1String(namePtr, CPyMarshal.Strlen(namePtr)));
+            this.attrNames[namePtr] = name;
+            return name;
+        }
+
+        private string
+        GetAttrName(object name)
+        {
+            if (name is string || name is NativeString)
+            {
+                return AsString(name);
+            }
+            throw PythonOps.TypeError("attribute name must be string");
+        }
+
         public override IntPtr
+        PyObject_GetAttrString(IntPtr objPtr, IntPtr namePtr)
+        {
+            return this.PyObject_GetAttrString(objPtr, this.GetAttrName(namePtr));
+        }
+
+        public IntPtr
         PyObject_GetAttrString(IntPtr objPtr, string name)
         {
-            object obj = this.Retrieve(objPtr);
-            if (Builtin.hasattr(this.scratchContext, obj, name))
+            try
             {
-                return this.Store(Builtin.getattr(this.scratchContext, obj, name));
+                object value;
+                if (PythonOps.TryGetBoundAttr(this.scratchContext, this.Retrieve(objPtr), name, out value))
+                {
+                    return this.Store(value);
+                }
+                return IntPtr.Zero;
+            }
+            catch (Exception e)
+            {
+                this.LastException = e;
+                return IntPtr.Zero;
             }
-            return IntPtr.Zero;
         }
 
         public override IntPtr
         PyObject_GetAttr(IntPtr objPtr, IntPtr namePtr)
         {
-            string name = (string)this.Retrieve(namePtr);
-            return this.PyObject_GetAttrString(objPtr, name);
+            try
+            {
+                return this.PyObject_GetAttrString(objPtr, this.GetAttrName(this.Retrieve(namePtr)));
+            }
+            catch (Exception e)
+            {
+                this.LastException = e;
+                return IntPtr.Zero;
+            }
         }
 
         public override int
+        PyObject_HasAttrString(IntPtr objPtr, IntPtr namePtr)
+        {
+            return this.PyObject_HasAttrString(objPtr, this.GetAttrName(namePtr));
+        }
+
+        public int
         PyObject_HasAttrString(IntPtr objPtr, string name)
         {
-            object obj = this.Retrieve(objPtr);
-            if (Builtin.hasattr(this.scratchContext, obj, name))
+            try
             {
-                return 1;
+                object value;
+                if (PythonOps.TryGetBoundAttr(this.scratchContext, this.Retrieve(objPtr), name, out value))
+                {
+                    return 1;
+                }
+            }
+            catch
+            {
+                // just like CPython, we don't care why it failed
             }
             return 0;
         }
@@ -344,11 +410,21 @@ namespace Ironclad
         public override int
         PyObject_HasAttr(IntPtr objPtr, IntPtr namePtr)
         {
-            string name = (string)this.Retrieve(namePtr);
-            return this.PyObject_HasAttrString(objPtr, name);
+            object name = this.Retrieve(namePtr);
+            if (!(name is string || name is NativeString))
+            {
+                return 0;
+            }
+            return this.PyObject_HasAttrString(objPtr, this.GetAttrName(name));
         }
 
         public override int
+        PyObject_SetAttrString(IntPtr objPtr, IntPtr namePtr, IntPtr valuePtr)
+        {
+            return this.PyObject_SetAttrString(objPtr, this.GetAttrName(namePtr), valuePtr);
+        }
+
+        public int
         PyObject_SetAttrString(IntPtr objPtr, string name, IntPtr valuePtr)
         {
             object obj = this.Retrieve(objPtr);
@@ -368,8 +444,15 @@ namespace Ironclad
         public override int
         PyObject_SetAttr(IntPtr objPtr, IntPtr namePtr, IntPtr valuePtr)
         {
-            string name = (string)this.Retrieve(namePtr);
-            return this.PyObject_SetAttrString(objPtr, name, valuePtr);
+            try
+            {
+                return this.PyObject_SetAttrString(objPtr, this.GetAttrName(this.Retrieve(namePtr)), valuePtr);
+            }
+            catch (Exception e)
+            {
+                this.LastException = e;
+                return -1;
+            }
         }
 
         public override int
@@ -22,25 +22,46 @@ namespace Ironclad
         private object
         GenerateClass(IntPtr typePtr)
         {
-            ClassBuilder cb = new ClassBuilder(typePtr);
             PythonTuple tp_bases = this.ExtractBases(typePtr);
-            foreach (object _base in tp_bases)
-            {
-                this.UpdateMethodTableObj(cb.methodTable, _base);
-            }
-
             IntPtr ob_typePtr = CPyMarshal.ReadPtrField(typePtr, typeof(PyObject), "ob_type");
             this.IncRef(ob_typePtr);
             object ob_type = this.Retrieve(ob_typePtr);
 
             this.scratchModule.Get__dict__()["_ironclad_metaclass"] = ob_type;
             this.scratchModule.Get__dict__()["_ironclad_bases"] = tp_bases;
-            this.ExecInModule(cb.code.ToString(), this.scratchModule);
-            object klass = this.scratchModule.Get__dict__()["_ironclad_class"];
+
+            object klass;
+            Dispatcher dispatcher;
+            if (this.classEngine == ClassEngine.Direct)
+            {
+                dispatcher = new Dispatcher(this, new PythonDictionary());
+                DirectClassBuilder dcb = new DirectClassBuilder(typePtr, dispatcher, this.codeCache, 
+                    this.GetModuleScope(this.scratchModule), this.scratchModule.Get__dict__(), this.scratchContext);
+                klass = dcb.klass;
+            }
+            else
+            {
+                ClassBuilder cb = new ClassBuilder(typePtr, this.dispatchTable);
+                dispatcher = new Dispatcher(this, cb.methodTable);
+                // types are normally readied while their pyd is being imported, so that's
+                // where their code gets cached on disk
+                this.scratchModule.Get__dict__()["_ironclad_class_attrs"] = this.RunCachedFactory(
+                    cb.factoryCode, this.importFiles.Peek(), cb.slots, cb.closures, null, null);
+                this.ExecCachedInModule(CodeSnippets.CLASS_FACTORY_CODE, this.scratchModule);
+                klass = PythonCalls.Call(this.scratchContext, this.scratchModule.Get__dict__()["_ironclad_make_class"],
+                    cb.__name__, cb.__module__, cb.__doc__, cb.tp_newSlot);
+            }
+            foreach (object _base in tp_bases)
+            {
+                this.UpdateMethodTableObj(dispatcher.table, _base);
+            }
+
+            this.ExecCachedInModule(CodeSnippets.CLASS_STUB_CODE, this.scratchModule);
             object klass_stub = this.scratchModule.Get__dict__()["_ironclad_class_stub"];
 
             this.classStubs[typePtr] = klass_stub;
-            Builtin.setattr(this.scratchContext, klass, "_dispatcher", new Dispatcher(this, cb.methodTable));
+            this.actualisationKinds[typePtr] = this.GetActualisationKind((PythonType)klass);
+            Builtin.setattr(this.scratchContext, klass, "_dispatcher", dispatcher);
             object typeDict = Builtin.getattr(this.scratchContext, klass, "__dict__");
             CPyMarshal.WritePtrField(typePtr, typeof(PyTypeObject), "tp_dict", this.Store(typeDict));
             return klass;
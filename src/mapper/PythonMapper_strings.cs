@@ -61,19 +61,11 @@ namespace Ironclad
         public override IntPtr 
         PyString_FromString(IntPtr stringData)
         {
-            IntPtr current = stringData;
-            List<byte> bytesList = new List<byte>();
-            while (CPyMarshal.ReadByte(current) != 0)
-            {
-                bytesList.Add(CPyMarshal.ReadByte(current));
-                current = CPyMarshal.Offset(current, 1);
-            }
-            byte[] bytes = new byte[bytesList.Count];
-            bytesList.CopyTo(bytes);
+            int length = CPyMarshal.Strlen(stringData);
             // note: NOT Associate
             // couldn't figure out to test this directly
             // without this, h5py tests get horribly screwy in PHIL contextmanager
-            return this.Store(this.StringFromBytes(bytes));
+            return this.Store(CPyMarshal.ReadLatin1String(stringData, length));
         }
         
         public override IntPtr
@@ -87,12 +79,10 @@ namespace Ironclad
             }
             else
             {
-                byte[] bytes = new byte[length];
-                Marshal.Copy(stringData, bytes, 0, length);
                 // note: NOT Associate
                 // couldn't figure out to test this directly
                 // without this, h5py tests get horribly screwy in PHIL contextmanager
-                return this.Store(this.StringFromBytes(bytes));
+                return this.Store(CPyMarshal.ReadLatin1String(stringData, length));
             }
         }
 
@@ -113,7 +103,7 @@ namespace Ironclad
         {
             IntPtr intStrPtr = IntPtr.Zero;
             IntPtr strPtr = CPyMarshal.ReadPtr(strPtrPtr);
-            string str = (string)this.Retrieve(strPtr);
+            string str = this.Retrieve(strPtr).ToString();
 
             if (this.internedStrings.ContainsKey(str))
             {
@@ -135,11 +125,11 @@ namespace Ironclad
         {
             try
             {
-                if (CPyMarshal.ReadPtrField(strPtr, typeof(PyObject), "ob_type") != this.PyString_Type)
+                if (PyObjectRef.Type(strPtr) != this.PyString_Type)
                 {
                     throw PythonOps.TypeError("PyString_AsString: not a string");
                 }
-                return CPyMarshal.Offset(strPtr, Marshal.OffsetOf(typeof(PyStringObject), "ob_sval"));
+                return CPyMarshal.Offset(strPtr, PyStringObjectRef.SvalOffset);
             }
             catch (Exception e)
             {
@@ -275,45 +265,46 @@ namespace Ironclad
             return data;
         }
         
-        private static char
-        CharFromByte(byte b)
+        private IntPtr
+        StoreTyped(string str)
         {
-            return (char)b;
+            return this.StoreString(str, PythonOps.Id(str));
         }
-        
-        private static byte
-        ByteFromChar(char c)
+
+        private IntPtr
+        StoreString(string str, long id)
         {
-            return (byte)c;
+            IntPtr strPtr = this.AllocPyString(str.Length);
+            CPyMarshal.WriteLatin1String(CPyMarshal.GetField(strPtr, typeof(PyStringObject), "ob_sval"), str);
+            this.map.Associate(strPtr, str, id);
+            return strPtr;
         }
-        
-        private string
-        StringFromBytes(byte[] bytes)
+
+        private static string
+        AsString(object obj)
         {
-            char[] chars = Array.ConvertAll<byte, char>(
-                bytes, new Converter<byte, char>(CharFromByte));
-            return new string(chars);
+            // anything which needs a real str should get it through here: when
+            // LazyStringThreshold is set, a str from C may be a NativeString
+            return (string)Unwrap(obj);
         }
-        
-        private IntPtr
-        CreatePyStringWithBytes(byte[] bytes)
+
+        private static object
+        Unwrap(object obj)
         {
-            IntPtr strPtr = this.AllocPyString(bytes.Length);
-            IntPtr bufPtr = CPyMarshal.Offset(
-                strPtr, Marshal.OffsetOf(typeof(PyStringObject), "ob_sval"));
-            Marshal.Copy(bytes, 0, bufPtr, bytes.Length);
-            return strPtr;
+            // for objects which might be strs, and which are about to be kept somewhere
+            // managed code will see them (dict keys, say)
+            NativeString nativeStr = obj as NativeString;
+            if (nativeStr != null)
+            {
+                return nativeStr.Materialise();
+            }
+            return obj;
         }
-        
-        private IntPtr
-        StoreTyped(string str)
+
+        private string
+        RetrieveString(IntPtr ptr)
         {
-            char[] chars = str.ToCharArray();
-            byte[] bytes = Array.ConvertAll<char, byte>(
-                chars, new Converter<char, byte>(ByteFromChar));
-            IntPtr strPtr = this.CreatePyStringWithBytes(bytes);
-            this.map.Associate(strPtr, str);
-            return strPtr;
+            return AsString(this.Retrieve(ptr));
         }
 
         private string
@@ -326,20 +317,86 @@ namespace Ironclad
             }
             IntPtr buffer = CPyMarshal.Offset(ptr, Marshal.OffsetOf(typeof(PyStringObject), "ob_sval"));
             int length = CPyMarshal.ReadIntField(ptr, typeof(PyStringObject), "ob_size");
-            byte[] bytes = new byte[length];
-            Marshal.Copy(buffer, bytes, 0, length);
-            char[] chars = Array.ConvertAll<byte, char>(
-                bytes, new Converter<byte, char>(CharFromByte));
-            return new string(chars);
+            return CPyMarshal.ReadLatin1String(buffer, length);
         }
         
         private void
         ActualiseString(IntPtr ptr)
         {
+            int length = CPyMarshal.ReadIntField(ptr, typeof(PyStringObject), "ob_size");
+            if (this.lazyStringThreshold > 0 && length >= this.lazyStringThreshold &&
+                CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type") == this.PyString_Type)
+            {
+                this.incompleteObjects.Remove(ptr);
+                NativeString nativeStr = new NativeString(this, ptr, length);
+                this.nativeStrings[ptr] = new WeakReference(nativeStr);
+                this.StoreBridge(ptr, nativeStr);
+                this.IncRef(ptr);
+                GC.KeepAlive(nativeStr);
+                return;
+            }
+            
             string str = this.ReadPyString(ptr);
             this.incompleteObjects.Remove(ptr);
             this.map.Associate(ptr, str);
         }
+        
+        internal void
+        ReleaseNativeString(IntPtr ptr)
+        {
+            // called from NativeString finalizers, to give back the reference they own
+            if (!this.alive)
+            {
+                return;
+            }
+            this.EnsureGIL();
+            try
+            {
+                if (this.nativeStrings.ContainsKey(ptr))
+                {
+                    this.DecRef(ptr);
+                }
+            }
+            finally
+            {
+                this.ReleaseGIL();
+            }
+        }
+        
+        private void
+        DetachNativeString(IntPtr ptr)
+        {
+            WeakReference wref;
+            if (this.nativeStrings.TryGetValue(ptr, out wref))
+            {
+                this.nativeStrings.Remove(ptr);
+                NativeString nativeStr = wref.Target as NativeString;
+                if (nativeStr != null)
+                {
+                    nativeStr.Detach();
+                }
+            }
+        }
+        
+        private void
+        DetachNativeStrings()
+        {
+            foreach (IntPtr ptr in new List<IntPtr>(this.nativeStrings.Keys))
+            {
+                this.DetachNativeString(ptr);
+            }
+        }
+        
+        private IntPtr
+        StoreTyped(NativeString nativeStr)
+        {
+            // only happens once nativeStr has been Detached from its original PyStringObject
+            string str = nativeStr.ToString();
+            IntPtr strPtr = this.AllocPyString(str.Length);
+            CPyMarshal.WriteLatin1String(CPyMarshal.GetField(strPtr, typeof(PyStringObject), "ob_sval"), str);
+            this.map.Associate(strPtr, nativeStr);
+            return strPtr;
+        }
 
         public override IntPtr
         IC_PyString_Str(IntPtr ptr)
@@ -3,6 +3,7 @@ using System.Collections.Generic;
 using System.Threading;
 
 using IronPython.Runtime;
+using IronPython.Runtime.Exceptions;
 
 using Ironclad.Structs;
 
@@ -15,11 +16,11 @@ namespace Ironclad
         {
             get
             {
-                Counter lockCount = (Counter)Thread.GetData(this._lockCount);
+                Counter lockCount = this._lockCount.Value;
                 if (lockCount == null)
                 {
                     lockCount = new Counter();
-                    Thread.SetData(this._lockCount, lockCount);
+                    this._lockCount.Value = lockCount;
                 }
                 return lockCount;
             }
@@ -30,16 +31,86 @@ namespace Ironclad
         {
             get
             {
-                ThreadState threadState = (ThreadState)Thread.GetData(this._threadState);
+                ThreadState threadState = this._threadState.Value;
                 if (threadState == null)
                 {
                     threadState = new ThreadState(this);
-                    Thread.SetData(this._threadState, threadState);
+                    this._threadState.Value = threadState;
                 }
                 return threadState;
             }
         }
         
+        public TempObjects
+        TempObjects
+        {
+            // each thread has its own stack of scopes, so a thread which is waiting for
+            // the GIL can't push a scope into the middle of another thread's
+            get
+            {
+                TempObjects tempObjects = this._tempObjects.Value;
+                if (tempObjects == null)
+                {
+                    tempObjects = new TempObjects(this.releaseTempObject);
+                    this._tempObjects.Value = tempObjects;
+                }
+                return tempObjects;
+            }
+        }
+
+        public TempObjects
+        GetTempObjectCounters()
+        {
+            // every thread's counters are added to tempObjectTotals, under the GIL, whenever
+            // it lets go of its last scope; this is a copy of those, plus the current thread's
+            TempObjects counters = new TempObjects(null);
+            this.GIL.Acquire();
+            try
+            {
+                counters.AddCounters(this.tempObjectTotals);
+                counters.AddCounters(this.TempObjects);
+            }
+            finally
+            {
+                this.GIL.Release();
+            }
+            return counters;
+        }
+
+        public void
+        ResetTempObjectCounters()
+        {
+            this.GIL.Acquire();
+            try
+            {
+                this.tempObjectTotals.ResetCounters();
+                this.TempObjects.ResetCounters();
+            }
+            finally
+            {
+                this.GIL.Release();
+            }
+        }
+
+        public bool
+        HasPendingError
+        {
+            // much cheaper than checking LastException, which has to build the exception
+            get { return this.threadState.HasPendingError; }
+        }
+
+        public Exception
+        FetchError()
+        {
+            // clears the error, and returns it ready to throw (or null, if there wasn't one)
+            PythonExceptions.BaseException error = (PythonExceptions.BaseException)this.threadState.FetchError();
+            if (error == null)
+            {
+                return null;
+            }
+            return error.clsException;
+        }
+
         public object LastException
         {
             get
@@ -157,30 +228,43 @@ namespace Ironclad
         public void
         EnsureGIL()
         {
-            this.tempObjects.Push(new List<IntPtr>());
             if (this.GIL.Acquire() == 1)
             {
                 CPyMarshal.WritePtr(this._PyThreadState_Current, this.threadState.Ptr);
             }
+            this.TempObjects.Push();
         }
         
         public void
         ReleaseGIL()
         {
-            if (this.tempObjects.Count > 0) {
-                List<IntPtr> safeTemps = this.tempObjects.Pop();
-                if (safeTemps != null) {
-                    foreach (IntPtr ptr in safeTemps)
-                    {
-                        this.DecRef(ptr);
-                    }
-                }
+            TempObjects tempObjects = this.TempObjects;
+            tempObjects.Pop();
+            if (tempObjects.Depth == 0)
+            {
+                this.tempObjectTotals.AddCounters(tempObjects);
+                tempObjects.ResetCounters();
+            }
+            if (this.deallocQueue != IntPtr.Zero)
+            {
+                // even with QueueDeallocs off, types which were readied while it was on
+                // inherited the enqueue function, so there may be something to free
+                this.DrainDeallocQueue();
+            }
+            if (this.staleLists.Count > 0)
+            {
+                this.SyncStaleLists();
             }
             this.map.CheckBridgePtrs(false);
 
             if (this.GIL.CountAcquired == 1)
             {
                 CPyMarshal.WritePtr(this._PyThreadState_Current, IntPtr.Zero);
+                if (this.dictIterKeys.Count > 0)
+                {
+                    // any PyDict_Next loop which is still running will have to start a new snapshot
+                    this.dictIterKeys.Clear();
+                }
             }
             this.GIL.Release();
         }
@@ -110,13 +110,9 @@ namespace Ironclad
         {
             int length = tuple.__len__();
             IntPtr tuplePtr = this.CreateTuple(length);
-            IntPtr itemPtr = CPyMarshal.Offset(
+            IntPtr itemsPtr = CPyMarshal.Offset(
                 tuplePtr, Marshal.OffsetOf(typeof(PyTupleObject), "ob_item"));
-            for (int i = 0; i < length; i++)
-            {
-                CPyMarshal.WritePtr(itemPtr, this.Store(tuple[i]));
-                itemPtr = CPyMarshal.Offset(itemPtr, CPyMarshal.PtrSize);
-            }
+            this.StoreItems(tuple, itemsPtr);
             this.map.Associate(tuplePtr, tuple);
             return tuplePtr;
         }
@@ -125,14 +121,13 @@ namespace Ironclad
         ActualiseTuple(IntPtr ptr)
         {
             int itemCount = CPyMarshal.ReadIntField(ptr, typeof(PyTupleObject), "ob_size");
-            IntPtr itemAddressPtr = CPyMarshal.Offset(ptr, Marshal.OffsetOf(typeof(PyTupleObject), "ob_item"));
+            IntPtr itemsPtr = CPyMarshal.Offset(ptr, Marshal.OffsetOf(typeof(PyTupleObject), "ob_item"));
+            IntPtr[] itemPtrs = this.ReadItemPtrs(itemsPtr, itemCount);
 
             object[] items = new object[itemCount];
             for (int i = 0; i < itemCount; i++)
             {
-                IntPtr itemPtr = CPyMarshal.ReadPtr(itemAddressPtr);
-                items[i] = this.Retrieve(itemPtr);
-                itemAddressPtr = CPyMarshal.Offset(itemAddressPtr, CPyMarshal.PtrSize);
+                items[i] = this.RetrieveItem(itemPtrs[i]);
             }
             this.incompleteObjects.Remove(ptr);
             this.map.Associate(ptr, new PythonTuple(items));
@@ -28,21 +28,21 @@ namespace Ironclad
         public override IntPtr 
         PyType_GenericAlloc(IntPtr typePtr, int nItems)
         {
-            int size = CPyMarshal.ReadIntField(typePtr, typeof(PyTypeObject), "tp_basicsize");
+            int size = PyTypeObjectRef.Basicsize(typePtr);
             if (nItems > 0)
             {
-                int itemsize = CPyMarshal.ReadIntField(typePtr, typeof(PyTypeObject), "tp_itemsize");
+                int itemsize = PyTypeObjectRef.Itemsize(typePtr);
                 size += (nItems * itemsize);
             }
             
             IntPtr newInstance = this.allocator.Alloc((uint)size);
             CPyMarshal.Zero(newInstance, size);
-            CPyMarshal.WriteUIntField(newInstance, typeof(PyObject), "ob_refcnt", 1);
-            CPyMarshal.WritePtrField(newInstance, typeof(PyObject), "ob_type", typePtr);
+            PyObjectRef.Refcnt(newInstance, 1);
+            PyObjectRef.Type(newInstance, typePtr);
 
             if (nItems > 0)
             {
-                CPyMarshal.WriteIntField(newInstance, typeof(PyVarObject), "ob_size", nItems);
+                PyVarObjectRef.Size(newInstance, nItems);
             }
 
             return newInstance;
@@ -151,7 +151,7 @@ namespace Ironclad
                     bases = (PythonTuple)this.Retrieve(basesPtr);
                 }
                 return this.Store(OldClass.__new__(this.scratchContext, 
-                    TypeCache.OldClass, (string)this.Retrieve(namePtr), bases, (PythonDictionary)this.Retrieve(dictPtr)));
+                    TypeCache.OldClass, this.RetrieveString(namePtr), bases, (PythonDictionary)this.Retrieve(dictPtr)));
             }
             catch (Exception e)
             {
@@ -172,7 +172,7 @@ namespace Ironclad
                     throw new NotImplementedException("IC_PyType_New; non-null kwargs; please submit a bug (with repro)");
                 }
                 return this.Store(new PythonType(
-                    this.scratchContext, (string)args[0], (PythonTuple)args[1], (PythonDictionary)args[2]));
+                    this.scratchContext, AsString(args[0]), (PythonTuple)args[1], (PythonDictionary)args[2]));
             }
             catch (Exception e)
             {
@@ -287,8 +287,9 @@ namespace Ironclad
 
             this.scratchModule.Get__dict__()["_ironclad_bases"] = tp_bases;
             this.scratchModule.Get__dict__()["_ironclad_metaclass"] = ob_type;
-            this.ExecInModule(CodeSnippets.CLASS_STUB_CODE, this.scratchModule);
+            this.ExecCachedInModule(CodeSnippets.CLASS_STUB_CODE, this.scratchModule);
             this.classStubs[typePtr] = this.scratchModule.Get__dict__()["_ironclad_class_stub"];
+            this.actualisationKinds[typePtr] = this.GetActualisationKind(_type);
 
             this.actualisableTypes[typePtr] = new ActualiseDelegate(this.ActualiseArbitraryObject);
             this.map.Associate(typePtr, _type);
@@ -354,34 +355,74 @@ namespace Ironclad
             this.IncRef(typePtr);
         }
         
-        private void
-        ActualiseArbitraryObject(IntPtr ptr)
+        private ActualisationKind
+        GetActualisationKind(PythonType type_)
         {
-            IntPtr typePtr = CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type");
-            PythonType type_ = (PythonType)this.Retrieve(typePtr);
-            
-            object[] args = new object[]{};
-            if (Builtin.issubclass(this.scratchContext, type_, TypeCache.Int32))
+            // worked out once per type, rather than once per instance
+            if (Builtin.issubclass(this.scratchContext, type_, TypeCache.PythonType))
             {
-                args = new object[] { CPyMarshal.ReadIntField(ptr, typeof(PyIntObject), "ob_ival") };
+                return ActualisationKind.Type;
+            }
+            if (Builtin.issubclass(this.scratchContext, type_, TypeCache.String))
+            {
+                return ActualisationKind.String;
             }
             if (Builtin.issubclass(this.scratchContext, type_, TypeCache.Double))
             {
-                args = new object[] { CPyMarshal.ReadDoubleField(ptr, typeof(PyFloatObject), "ob_fval") };
+                return ActualisationKind.Float;
             }
-            if (Builtin.issubclass(this.scratchContext, type_, TypeCache.String))
+            if (Builtin.issubclass(this.scratchContext, type_, TypeCache.Int32))
             {
-                args = new object[] { this.ReadPyString(ptr) };
+                return ActualisationKind.Int;
             }
-            if (Builtin.issubclass(this.scratchContext, type_, TypeCache.PythonType))
+            return ActualisationKind.Object;
+        }
+        
+        private object
+        NewBridgeInstance(IntPtr ptr, IntPtr typePtr, PythonType type_)
+        {
+            ActualisationKind kind = this.actualisationKinds[typePtr];
+            if (kind == ActualisationKind.Object)
+            {
+                // all the stub would do is call object.__new__, and then we'd have to
+                // change its __class__; but we can make the real thing in one go
+                return ObjectOps.__new__(this.scratchContext, type_);
+            }
+            
+            object[] args = null;
+            switch (kind)
             {
-                string name = CPyMarshal.ReadCStringField(ptr, typeof(PyTypeObject), "tp_name");
-                PythonTuple tp_bases = this.ExtractBases(typePtr);
-                args = new object[] { name, tp_bases, new PythonDictionary() };
+                case ActualisationKind.Int:
+                    args = new object[] { CPyMarshal.ReadIntField(ptr, typeof(PyIntObject), "ob_ival") };
+                    break;
+                
+                case ActualisationKind.Float:
+                    args = new object[] { CPyMarshal.ReadDoubleField(ptr, typeof(PyFloatObject), "ob_fval") };
+                    break;
+                
+                case ActualisationKind.String:
+                    args = new object[] { this.ReadPyString(ptr) };
+                    break;
+                
+                case ActualisationKind.Type:
+                    string name = CPyMarshal.ReadCStringField(ptr, typeof(PyTypeObject), "tp_name");
+                    PythonTuple tp_bases = this.ExtractBases(typePtr);
+                    args = new object[] { name, tp_bases, new PythonDictionary() };
+                    break;
             }
             
             object obj = PythonCalls.Call(this.classStubs[typePtr], args);
             Builtin.setattr(this.scratchContext, obj, "__class__", type_);
+            return obj;
+        }
+        
+        private void
+        ActualiseArbitraryObject(IntPtr ptr)
+        {
+            IntPtr typePtr = CPyMarshal.ReadPtrField(ptr, typeof(PyObject), "ob_type");
+            PythonType type_ = (PythonType)this.Retrieve(typePtr);
+            
+            object obj = this.NewBridgeInstance(ptr, typePtr, type_);
             this.StoreBridge(ptr, obj);
             this.IncRef(ptr);
             GC.KeepAlive(obj); // TODO: please test me, if you can work out how to
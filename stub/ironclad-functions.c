@@ -70,3 +70,35 @@ int fstat(int fd, struct stat* buffer)
 	return _fstat32(fd, buffer);
 }
 
+
+
+// Deallocation queue: when the mapper is asked to QueueDeallocs, the tp_deallocs of
+// ints, floats, complexes and plain objects point here instead of into managed code,
+// so dropping the last reference to one of them is just a push. The mapper drains the
+// queue in bulk whenever it releases the GIL, or whenever the queue fills up; it's
+// responsible for skipping anything which got resurrected while it was waiting.
+
+#define IC_DEALLOC_QUEUE_SIZE 4096
+
+typedef void (*drainfunc)(void);
+
+typedef struct {
+	destructor enqueue;
+	drainfunc drain;
+	int count;
+	int size;
+	PyObject *items[IC_DEALLOC_QUEUE_SIZE];
+} IC_DeallocQueue;
+
+static void IC_EnqueueDealloc(PyObject *op);
+
+IC_DeallocQueue _IC_DeallocQueue = { IC_EnqueueDealloc, NULL, 0, IC_DEALLOC_QUEUE_SIZE };
+
+static void
+IC_EnqueueDealloc(PyObject *op)
+{
+	if (_IC_DeallocQueue.count == _IC_DeallocQueue.size)
+		_IC_DeallocQueue.drain();
+	op->ob_refcnt = 0;
+	_IC_DeallocQueue.items[_IC_DeallocQueue.count++] = op;
+}
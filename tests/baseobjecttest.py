@@ -4,6 +4,7 @@ import operator
 from tests.utils.runtest import makesuite, run
 
 from tests.utils.allocators import GetAllocatingTestAllocator
+from tests.utils.benchmark import elapsed, report
 from tests.utils.cpython import MakeTypePtr
 from tests.utils.gc import gcwait
 from tests.utils.memory import CreateTypes
@@ -223,6 +224,54 @@ class ObjectFunctionsTest(TestCase):
         self.assertEquals(mapper.PyObject_HasAttr(objPtr, mapper.Store("jim")), 0)
 
 
+    @WithMapper
+    def testAttrStringFunctionsTakeNativeNames(self, mapper, addToCleanUp):
+        class Thingum(object):
+            def __init__(self, bob):
+                self.bob = bob
+        obj = Thingum("Poe")
+        objPtr = mapper.Store(obj)
+        namePtr = Marshal.StringToHGlobalAnsi("bob")
+        addToCleanUp(lambda: Marshal.FreeHGlobal(namePtr))
+        
+        self.assertEquals(mapper.Retrieve(mapper.PyObject_GetAttrString(objPtr, namePtr)), "Poe")
+        self.assertEquals(mapper.PyObject_HasAttrString(objPtr, namePtr), 1)
+        self.assertEquals(mapper.PyObject_SetAttrString(objPtr, namePtr, mapper.Store(123)), 0)
+        self.assertEquals(obj.bob, 123)
+        self.assertEquals(mapper.Retrieve(mapper.PyObject_GetAttrString(objPtr, namePtr)), 123)
+        
+        # same buffer, different name
+        CPyMarshal.WriteByte(namePtr, ord('j'))
+        self.assertEquals(mapper.PyObject_HasAttrString(objPtr, namePtr), 0)
+        self.assertEquals(mapper.PyObject_SetAttrString(objPtr, namePtr, mapper.Store(456)), 0)
+        self.assertEquals(obj.job, 456)
+
+
+    @WithMapper
+    def testPyObject_GetAttrString_GetterRaises(self, mapper, _):
+        class Thingum(object):
+            @property
+            def bob(self):
+                raise ValueError("no")
+        
+        objPtr = mapper.Store(Thingum())
+        self.assertEquals(mapper.PyObject_GetAttrString(objPtr, "bob"), IntPtr.Zero)
+        self.assertMapperHasError(mapper, ValueError)
+        mapper.LastException = None
+        self.assertEquals(mapper.PyObject_HasAttrString(objPtr, "bob"), 0)
+        self.assertMapperHasError(mapper, None)
+
+
+    @WithMapper
+    def testPyObject_GetAttr_NonStringName(self, mapper, _):
+        objPtr = mapper.Store(object())
+        self.assertEquals(mapper.PyObject_GetAttr(objPtr, mapper.Store(123)), IntPtr.Zero)
+        self.assertMapperHasError(mapper, TypeError)
+        mapper.LastException = None
+        self.assertEquals(mapper.PyObject_HasAttr(objPtr, mapper.Store(123)), 0)
+        self.assertMapperHasError(mapper, None)
+
+
     @WithMapper
     def testPyObject_GetItem(self, mapper, _):
         result = object()
@@ -564,7 +613,38 @@ class NewInitFunctionsTest(TestCase):
         
         mapper.Dispose()
         deallocTypes()
-        
+
+
+class GetAttrBenchmark(TestCase):
+
+    def testGetAttrStringLoop(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        namePtr = Marshal.StringToHGlobalAnsi("bob")
+        try:
+            class Thingum(object):
+                def __init__(self):
+                    self.bob = 1
+            objPtr = mapper.Store(Thingum())
+            namePyPtr = mapper.Store("bob")
+            count = 100000
+            def GetAttrString():
+                mapper.EnsureGIL()
+                for _ in xrange(count):
+                    mapper.PyObject_GetAttrString(objPtr, namePtr)
+                mapper.ReleaseGIL()
+            def GetAttr():
+                mapper.EnsureGIL()
+                for _ in xrange(count):
+                    mapper.PyObject_GetAttr(objPtr, namePyPtr)
+                mapper.ReleaseGIL()
+            report('PyObject_GetAttrString from C', count / elapsed(GetAttrString), 'gets/s')
+            report('PyObject_GetAttr from C', count / elapsed(GetAttr), 'gets/s')
+        finally:
+            mapper.Dispose()
+            Marshal.FreeHGlobal(namePtr)
+            deallocTypes()
+
 
 suite = makesuite(
     ObjectFunctionsTest,
@@ -8,7 +8,10 @@ from System import IntPtr, Int32, UInt32
 from System.Runtime.InteropServices import Marshal
 
 from Ironclad import CPyMarshal, dgt_int_ptrptrptr, DoubleStruct
-from Ironclad.Structs import PyObject, PyFloatObject, PyIntObject, PyListObject, PyTypeObject
+from Ironclad.Structs import (
+    PyObject, PyFloatObject, PyIntObject, PyListObject, PyTypeObject,
+    PyFloatObjectRef, PyObjectRef, PyTypeObjectRef
+)
 
 
 class CPyMarshalTest_32(TestCase):
@@ -325,6 +328,62 @@ class CPyMarshalTest_32(TestCase):
         Marshal.FreeHGlobal(data)
 
 
+    def testStrlen(self):
+        data = Marshal.AllocHGlobal(8)
+        for i in range(8):
+            Marshal.WriteByte(OffsetPtr(data, i), 255)
+        
+        Marshal.WriteByte(OffsetPtr(data, 5), 0)
+        self.assertEquals(CPyMarshal.Strlen(data), 5, "wrong")
+        
+        Marshal.WriteByte(data, 0)
+        self.assertEquals(CPyMarshal.Strlen(data), 0, "wrong")
+        
+        Marshal.FreeHGlobal(data)
+
+
+    def testReadLatin1String(self):
+        data = Marshal.AllocHGlobal(256)
+        for i in range(256):
+            Marshal.WriteByte(OffsetPtr(data, i), i)
+        
+        self.assertEquals(CPyMarshal.ReadLatin1String(data, 256), ''.join(map(chr, range(256))), "wrong")
+        self.assertEquals(CPyMarshal.ReadLatin1String(OffsetPtr(data, 65), 3), 'ABC', "wrong")
+        self.assertEquals(CPyMarshal.ReadLatin1String(data, 0), '', "wrong")
+        
+        Marshal.FreeHGlobal(data)
+
+
+    def testWriteLatin1String(self):
+        data = Marshal.AllocHGlobal(257)
+        Marshal.WriteByte(OffsetPtr(data, 256), 123)
+        
+        CPyMarshal.WriteLatin1String(data, ''.join(map(chr, range(256))))
+        for i in range(256):
+            self.assertEquals(CPyMarshal.ReadByte(OffsetPtr(data, i)), i, "wrong")
+        self.assertEquals(CPyMarshal.ReadByte(OffsetPtr(data, 256)), 123, "wrote too much")
+        
+        Marshal.FreeHGlobal(data)
+
+
+    def testStructRefs(self):
+        self.assertEquals(PyObjectRef.RefcntOffset, Marshal.OffsetOf(PyObject, "ob_refcnt").ToInt32())
+        self.assertEquals(PyObjectRef.TypeOffset, Marshal.OffsetOf(PyObject, "ob_type").ToInt32())
+        self.assertEquals(PyFloatObjectRef.FvalOffset, Marshal.OffsetOf(PyFloatObject, "ob_fval").ToInt32())
+        self.assertEquals(PyTypeObjectRef.DeallocOffset, Marshal.OffsetOf(PyTypeObject, "tp_dealloc").ToInt32())
+        
+        data = Marshal.AllocHGlobal(Marshal.SizeOf(PyFloatObject()))
+        PyFloatObjectRef.Refcnt(data, 3)
+        PyFloatObjectRef.Type(data, IntPtr(123))
+        PyFloatObjectRef.Fval(data, 1.5)
+        self.assertEquals(CPyMarshal.ReadIntField(data, PyFloatObject, "ob_refcnt"), 3)
+        self.assertEquals(CPyMarshal.ReadPtrField(data, PyFloatObject, "ob_type"), IntPtr(123))
+        self.assertEquals(CPyMarshal.ReadDoubleField(data, PyFloatObject, "ob_fval"), 1.5)
+        self.assertEquals(PyObjectRef.Refcnt(data), 3)
+        self.assertEquals(PyObjectRef.Type(data), IntPtr(123))
+        self.assertEquals(PyFloatObjectRef.Fval(data), 1.5)
+        
+        Marshal.FreeHGlobal(data)
 
 
 suite = makesuite(CPyMarshalTest_32)
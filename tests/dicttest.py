@@ -2,6 +2,7 @@
 from tests.utils.runtest import makesuite, run
 
 from tests.utils.allocators import GetAllocatingTestAllocator
+from tests.utils.benchmark import elapsed, report
 from tests.utils.cpython import MakeTypePtr
 from tests.utils.memory import CreateTypes
 from tests.utils.testcase import TestCase, WithMapper
@@ -276,6 +277,108 @@ class DictTest(TestCase):
         self.assertMapperHasError(mapper, TypeError)
 
 
+class NativeDictTest(TestCase):
+
+    def getNativeDictMapper(self, allocs=None, frees=None):
+        mapper = PythonMapper(GetAllocatingTestAllocator(
+            allocs if allocs is not None else [], frees if frees is not None else []))
+        deallocTypes = CreateTypes(mapper)
+        mapper.PreferNativeDicts = True
+        mapper.EnsureGIL()
+        def Cleanup():
+            mapper.ReleaseGIL()
+            mapper.Dispose()
+            deallocTypes()
+        return mapper, Cleanup
+
+
+    def testPyDict_New(self):
+        allocs = []
+        mapper, cleanup = self.getNativeDictMapper(allocs)
+        try:
+            del allocs[:]
+            dictPtr = mapper.PyDict_New()
+            self.assertEquals(allocs, [(dictPtr, Marshal.SizeOf(PyObject()))], "did not allocate as expected")
+            self.assertEquals(mapper.RefCount(dictPtr), 1, "bad refcount")
+            self.assertEquals(CPyMarshal.ReadPtrField(dictPtr, PyObject, "ob_type"), mapper.PyDict_Type, "wrong type")
+            self.assertEquals(mapper.PyDict_Size(dictPtr), 0)
+        finally:
+            cleanup()
+
+
+    def testGetSetDelStayUnmanaged(self):
+        mapper, cleanup = self.getNativeDictMapper()
+        try:
+            dictPtr = mapper.PyDict_New()
+            itemPtr = mapper.Store(123)
+            self.assertEquals(mapper.PyDict_SetItemString(dictPtr, 'blob', itemPtr), 0)
+            self.assertEquals(mapper.RefCount(itemPtr), 2, "dict should own a reference")
+            self.assertEquals(mapper.PyDict_GetItemString(dictPtr, 'blob'), itemPtr, "should get same ptr")
+            self.assertEquals(mapper.RefCount(itemPtr), 2, "reference should be borrowed")
+            self.assertEquals(mapper.PyDict_GetItemString(dictPtr, 'nope'), IntPtr.Zero)
+            self.assertEquals(mapper.PyDict_GetItem(dictPtr, mapper.Store('blob')), itemPtr)
+            self.assertEquals(mapper.PyDict_Size(dictPtr), 1)
+            
+            otherPtr = mapper.Store(456)
+            self.assertEquals(mapper.PyDict_SetItem(dictPtr, mapper.Store('blob'), otherPtr), 0)
+            self.assertEquals(mapper.RefCount(itemPtr), 1, "replaced item should be released")
+            self.assertEquals(mapper.RefCount(otherPtr), 2)
+            
+            self.assertEquals(mapper.PyDict_DelItemString(dictPtr, 'blob'), 0)
+            self.assertEquals(mapper.RefCount(otherPtr), 1, "deleted item should be released")
+            self.assertEquals(mapper.PyDict_DelItemString(dictPtr, 'blob'), -1)
+            self.assertMapperHasError(mapper, None)
+            self.assertEquals(mapper.PyDict_Size(dictPtr), 0)
+        finally:
+            cleanup()
+
+
+    def testRetrieveActualises(self):
+        mapper, cleanup = self.getNativeDictMapper()
+        try:
+            dictPtr = mapper.PyDict_New()
+            itemPtr = mapper.Store(123)
+            mapper.PyDict_SetItemString(dictPtr, 'blob', itemPtr)
+            mapper.DecRef(itemPtr)
+            
+            _dict = mapper.Retrieve(dictPtr)
+            self.assertEquals(_dict, {'blob': 123})
+            self.assertEquals(mapper.Retrieve(dictPtr) is _dict, True, "should only actualise once")
+            self.assertEquals(mapper.PyDict_GetItemString(dictPtr, 'blob') != IntPtr.Zero, True)
+            
+            mapper.PyDict_SetItemString(dictPtr, 'other', mapper.Store(456))
+            self.assertEquals(_dict, {'blob': 123, 'other': 456}, "should now use managed dict")
+        finally:
+            cleanup()
+
+
+    def testNonStrKeyActualises(self):
+        mapper, cleanup = self.getNativeDictMapper()
+        try:
+            dictPtr = mapper.PyDict_New()
+            mapper.PyDict_SetItemString(dictPtr, 'blob', mapper.Store(123))
+            self.assertEquals(mapper.PyDict_SetItem(dictPtr, mapper.Store(1), mapper.Store(2)), 0)
+            self.assertEquals(mapper.Retrieve(dictPtr), {'blob': 123, 1: 2})
+        finally:
+            cleanup()
+
+
+    def testDeallocReleasesItems(self):
+        frees = []
+        mapper, cleanup = self.getNativeDictMapper(frees=frees)
+        try:
+            dictPtr = mapper.PyDict_New()
+            itemPtr = mapper.Store(object())
+            mapper.PyDict_SetItemString(dictPtr, 'blob', itemPtr)
+            mapper.DecRef(itemPtr)
+            
+            mapper.DecRef(dictPtr)
+            self.assertEquals(dictPtr in frees, True, "did not free dict")
+            self.assertEquals(itemPtr in frees, True, "did not release item")
+        finally:
+            cleanup()
+
+
 class PyDict_Next_Test(TestCase):
 
     @WithMapper
@@ -357,12 +460,121 @@ class PyDict_Next_Test(TestCase):
         self.assertEquals(mapper.RefCount(keyPtr), 1)
         self.assertEquals(mapper.RefCount(valuePtr), 1)
 
+    @WithMapper
+    def testCanSetExistingKeysDuringIteration(self, mapper, addDealloc):
+        posPtr = Marshal.AllocHGlobal(CPyMarshal.PtrSize * 3)
+        keyPtrPtr = CPyMarshal.Offset(posPtr, CPyMarshal.PtrSize)
+        valuePtrPtr = CPyMarshal.Offset(keyPtrPtr, CPyMarshal.PtrSize)
+        addDealloc(lambda: Marshal.FreeHGlobal(posPtr))
+        CPyMarshal.WriteInt(posPtr, 0)
+        
+        d = dict((i, i) for i in range(100))
+        dPtr = mapper.Store(d)
+        keys = []
+        while mapper.PyDict_Next(dPtr, posPtr, keyPtrPtr, valuePtrPtr) != 0:
+            keyPtr = CPyMarshal.ReadPtr(keyPtrPtr)
+            keys.append(mapper.Retrieve(keyPtr))
+            self.assertEquals(mapper.PyDict_SetItem(dPtr, keyPtr, mapper.Store(-1)), 0)
+        
+        self.assertEquals(sorted(keys), range(100))
+        self.assertEquals(set(d.values()), set([-1]))
+        self.assertMapperHasError(mapper, None)
+
+    @WithMapper
+    def testNoticesResizedDict(self, mapper, addDealloc):
+        posPtr = Marshal.AllocHGlobal(CPyMarshal.PtrSize * 3)
+        keyPtrPtr = CPyMarshal.Offset(posPtr, CPyMarshal.PtrSize)
+        valuePtrPtr = CPyMarshal.Offset(keyPtrPtr, CPyMarshal.PtrSize)
+        addDealloc(lambda: Marshal.FreeHGlobal(posPtr))
+        CPyMarshal.WriteInt(posPtr, 0)
+        
+        d = dict(a=1, b=2, c=3)
+        dPtr = mapper.Store(d)
+        self.assertEquals(mapper.PyDict_Next(dPtr, posPtr, keyPtrPtr, valuePtrPtr), 1)
+        
+        # changing a dict's size while iterating is undefined, but we shouldn't produce stale keys
+        d.clear()
+        d.update(dict(x=1, y=2))
+        while mapper.PyDict_Next(dPtr, posPtr, keyPtrPtr, valuePtrPtr) != 0:
+            self.assertEquals(mapper.Retrieve(CPyMarshal.ReadPtr(keyPtrPtr)) in d, True)
+        self.assertMapperHasError(mapper, None)
+
+    @WithMapper
+    def testIteratesAcrossGILRelease(self, mapper, addDealloc):
+        posPtr = Marshal.AllocHGlobal(CPyMarshal.PtrSize * 3)
+        keyPtrPtr = CPyMarshal.Offset(posPtr, CPyMarshal.PtrSize)
+        valuePtrPtr = CPyMarshal.Offset(keyPtrPtr, CPyMarshal.PtrSize)
+        addDealloc(lambda: Marshal.FreeHGlobal(posPtr))
+        CPyMarshal.WriteInt(posPtr, 0)
+        
+        d = dict(a=1, b=2, c=3)
+        dPtr = mapper.Store(d)
+        result = {}
+        while mapper.PyDict_Next(dPtr, posPtr, keyPtrPtr, valuePtrPtr) != 0:
+            key = mapper.Retrieve(CPyMarshal.ReadPtr(keyPtrPtr))
+            result[key] = mapper.Retrieve(CPyMarshal.ReadPtr(valuePtrPtr))
+            mapper.ReleaseGIL()
+            mapper.EnsureGIL()
+        
+        self.assertEquals(result, d)
+
+
+class PyDict_NextBenchmark(TestCase):
+
+    def testIterateBigDict(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        posPtr = Marshal.AllocHGlobal(CPyMarshal.PtrSize * 3)
+        keyPtrPtr = CPyMarshal.Offset(posPtr, CPyMarshal.PtrSize)
+        valuePtrPtr = CPyMarshal.Offset(keyPtrPtr, CPyMarshal.PtrSize)
+        try:
+            count = 100000
+            dPtr = mapper.Store(dict((str(i), i) for i in xrange(count)))
+            def Iterate():
+                mapper.EnsureGIL()
+                CPyMarshal.WriteInt(posPtr, 0)
+                while mapper.PyDict_Next(dPtr, posPtr, keyPtrPtr, valuePtrPtr) != 0:
+                    pass
+                mapper.ReleaseGIL()
+            report('PyDict_Next over %d keys' % count, count / elapsed(Iterate), 'items/s')
+        finally:
+            mapper.Dispose()
+            Marshal.FreeHGlobal(posPtr)
+            deallocTypes()
 
 
+class PyDict_GetItemStringBenchmark(TestCase):
+
+    def testGetItemString(self):
+        for native in (False, True):
+            mapper = PythonMapper()
+            deallocTypes = CreateTypes(mapper)
+            mapper.PreferNativeDicts = native
+            try:
+                count = 100000
+                keys = ['key%d' % i for i in xrange(100)]
+                mapper.EnsureGIL()
+                dictPtr = mapper.PyDict_New()
+                for i, key in enumerate(keys):
+                    itemPtr = mapper.Store(i)
+                    mapper.PyDict_SetItemString(dictPtr, key, itemPtr)
+                    mapper.DecRef(itemPtr)
+                mapper.ReleaseGIL()
+                def Lookup():
+                    mapper.EnsureGIL()
+                    for i in xrange(count):
+                        mapper.PyDict_GetItemString(dictPtr, keys[i % 100])
+                    mapper.ReleaseGIL()
+                kind = native and 'native' or 'managed'
+                report('PyDict_GetItemString on %s dict' % kind, count / elapsed(Lookup), 'lookups/s')
+            finally:
+                mapper.Dispose()
+                deallocTypes()
 
 
 suite = makesuite(
     DictTest,
+    NativeDictTest,
     PyDict_Next_Test,
 )
 
@@ -208,6 +208,26 @@ class NumpyTest(FunctionalTestCase):
             """), insert_args='-X:Frames -X:Debug')
 
 
+class NumpyScalarBenchmark(FunctionalTestCase):
+
+    def testScalarsIntoArrays(self):
+        # filling an array from a list of scalars converts each one with
+        # PyFloat_AsDouble or PyInt_AsLong
+        exit_code, output, error = self.runCode(dedent("""
+            import numpy as np
+            from System.Diagnostics import Stopwatch
+            count = 100000
+            for name, dtype in (('float64', np.float64), ('int32', np.int32)):
+                scalars = [dtype(7)] * count
+                watch = Stopwatch.StartNew()
+                np.array(scalars, dtype=dtype)
+                watch.Stop()
+                print '%-50s %14.1f %s' % ('numpy %s scalars into array' % name, count / watch.Elapsed.TotalSeconds, 'items/s')
+            """))
+        self.assertEquals(exit_code, 0, "Execution failed: >>>%s<<<\n>>>%s<<<" % (output, error))
+        print output,
+
+
 class BZ2Test(ModuleTestCase('bz2')):
 
     def testFunctionsAndDocstringsExist(self):
@@ -498,7 +518,7 @@ PySVNTest = TrivialModuleTestCase('pysvn') # test misleading names passed to Py_
 MMapTest = TrivialModuleTestCase('mmap')
 CsvTest = TrivialModuleTestCase('csv')
 
-suite = automakesuite(locals())
+suite = automakesuite(locals(), excludes=[NumpyScalarBenchmark])
 if __name__ == '__main__':
     run(suite)
 
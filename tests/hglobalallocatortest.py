@@ -61,6 +61,16 @@ class HGlobalAllocatorTest(TestCase):
             i = i + 1
             if i > 5:
                 self.fail("failed to convince allocator to reallocate into a new block")
+    
+    
+    def testReallocRepeatedly(self):
+        allocator = HGlobalAllocator()
+        ptr = allocator.Alloc(REASONABLE_SIZE)
+        for size in range(REASONABLE_SIZE, REASONABLE_SIZE * 2, 64):
+            ptr = allocator.Realloc(ptr, size)
+            self.assertEquals(allocator.Contains(ptr), True)
+        allocator.Free(ptr)
+        self.assertEquals(allocator.Contains(ptr), False)
         
     
 
@@ -2,9 +2,11 @@
 from tests.utils.runtest import makesuite, run
 from tests.utils.testcase import TestCase
 
+from tests.utils.benchmark import managed_bytes, rate, report
 from tests.utils.gc import gcwait
 
-from System import NullReferenceException, WeakReference
+from System import IntPtr, NullReferenceException, WeakReference
+from System.Collections.Generic import Dictionary
 from System.Runtime.InteropServices import Marshal
 
 
@@ -131,6 +133,47 @@ class InterestingPtrMapTest(TestCase):
         self.assertEquals(ref.IsAlive, True, "unexpected GC")
     
     
+    def testTryIncRefDecRefSimple(self):
+        map, ptr, obj, _ = self.getVars()
+        self.assertEquals(map.TryIncRef(ptr), False, "unmapped")
+        self.assertEquals(map.TryDecRef(ptr), False, "unmapped")
+        self.assertEquals(CPyMarshal.ReadIntField(ptr, PyObject, 'ob_refcnt'), 1)
+        
+        map.Associate(ptr, obj)
+        self.assertEquals(map.TryIncRef(ptr), True)
+        self.assertEquals(CPyMarshal.ReadIntField(ptr, PyObject, 'ob_refcnt'), 2)
+        self.assertEquals(map.TryDecRef(ptr), True)
+        self.assertEquals(CPyMarshal.ReadIntField(ptr, PyObject, 'ob_refcnt'), 1)
+        self.assertEquals(map.TryDecRef(ptr), False, "should leave dealloc to caller")
+        self.assertEquals(CPyMarshal.ReadIntField(ptr, PyObject, 'ob_refcnt'), 1)
+    
+    
+    def testTryIncRefDecRefBridge(self):
+        def do():
+            # see NOTE
+            map, ptr, obj, ref = self.getVars()
+            self.keepalive = map
+            map.BridgeAssociate(ptr, obj)
+            map.UpdateStrength(ptr)
+            
+            # weak now; TryIncRef to 2 should strengthen
+            self.assertEquals(map.TryIncRef(ptr), True)
+            del obj
+            return map, ptr, ref
+        map, ptr, ref = do()
+        gcwait()
+        self.assertEquals(ref.IsAlive, True, "unexpected GC")
+        
+        def do2():
+            # see NOTE
+            self.assertEquals(map.TryDecRef(ptr), True)
+            self.assertEquals(CPyMarshal.ReadIntField(ptr, PyObject, 'ob_refcnt'), 1)
+        do2()
+        gcwait()
+        self.assertEquals(ref.IsAlive, False, "failed to weaken")
+        map.Release(ptr)
+    
+    
     def testCheckBridgePtrsShouldUpdateAll(self):
         def do():
             # see NOTE
@@ -154,6 +197,75 @@ class InterestingPtrMapTest(TestCase):
         self.assertEquals(ref2.IsAlive, False, "failed to GC")
     
     
+    def testCheckBridgePtrsWorksInSlices(self):
+        def do():
+            # see NOTE
+            map = InterestingPtrMap()
+            map.GCThreshold = 2
+            refs = []
+            for _ in range(4):
+                _, ptr, obj, ref = self.getVars()
+                map.BridgeAssociate(ptr, obj)
+                refs.append(ref)
+            del obj
+            
+            # all ptrs have refcnt 1; a full pass should take 2 calls
+            map.CheckBridgePtrs(False)
+            return map, refs
+        map, refs = do()
+        gcwait()
+        self.assertEquals(len([r for r in refs if r.IsAlive]), 2, "wrong number of objects GCed")
+        
+        map.CheckBridgePtrs(False)
+        gcwait()
+        self.assertEquals(len([r for r in refs if r.IsAlive]), 0, "failed to GC")
+        self.assertEquals(map.SweepCounters.Slices, 2)
+        self.assertEquals(map.SweepCounters.EntriesChecked, 4)
+    
+    
+    def testLongLivedBridgePtrsArePromotedAndDemoted(self):
+        map, ptr, obj, _ = self.getVars()
+        map.BridgeAssociate(ptr, obj)
+        CPyMarshal.WriteIntField(ptr, PyObject, 'ob_refcnt', 2)
+        
+        for _ in range(3):
+            self.assertEquals((map.YoungBridgeCount, map.OldBridgeCount), (1, 0))
+            map.CheckBridgePtrs(True)
+        self.assertEquals((map.YoungBridgeCount, map.OldBridgeCount), (0, 1))
+        self.assertEquals(map.SweepCounters.Promotions, 1)
+        
+        CPyMarshal.WriteIntField(ptr, PyObject, 'ob_refcnt', 1)
+        map.UpdateStrength(ptr)
+        map.CheckBridgePtrs(False)
+        self.assertEquals((map.YoungBridgeCount, map.OldBridgeCount), (1, 0))
+        self.assertEquals(map.SweepCounters.Demotions, 1)
+        
+        map.Release(ptr)
+        self.assertEquals((map.YoungBridgeCount, map.OldBridgeCount), (0, 0))
+        # dirty list should have been drained already, but make sure a stale entry wouldn't hurt
+        map.CheckBridgePtrs(False)
+    
+    
+    def testSweepCounters(self):
+        map, ptr, obj, _ = self.getVars()
+        counters = map.SweepCounters
+        map.CheckBridgePtrs(False)
+        self.assertEquals(counters.Slices, 0, "nothing to do, should not have counted")
+        
+        map.BridgeAssociate(ptr, obj)
+        map.CheckBridgePtrs(False)
+        map.CheckBridgePtrs(True)
+        self.assertEquals(counters.Slices, 1)
+        self.assertEquals(counters.FullSweeps, 1)
+        self.assertEquals(counters.EntriesChecked, 2)
+        self.assertTrue(counters.TotalPauseMilliseconds >= counters.MaxPauseMilliseconds >= counters.LastPauseMilliseconds >= 0)
+        
+        counters.Reset()
+        self.assertEquals((counters.Slices, counters.FullSweeps, counters.EntriesChecked), (0, 0, 0))
+        self.assertEquals(counters.TotalPauseMilliseconds, 0)
+        map.Release(ptr)
+    
+    
     def testMapOverBridgePtrs(self):
         map, ptr1, obj1, _ = self.getVars()
         __, ptr2, obj2, ___ = self.getVars()
@@ -166,8 +278,175 @@ class InterestingPtrMapTest(TestCase):
         map.MapOverBridgePtrs(PtrFunc(MapFunc))
         self.assertEquals(len(ptrs), 2)
         self.assertEquals(set(ptrs), set([ptr1, ptr2]))
+    
+    
+    def testAssociateOverwritesPtr(self):
+        map, ptr, obj1, _ = self.getVars()
+        obj2 = object()
+        map.BridgeAssociate(ptr, obj1)
+        map.Associate(ptr, obj2)
+        
+        self.assertEquals(map.GetObj(ptr), obj2)
+        self.assertEquals(map.GetPtr(obj2), ptr)
+        # the old obj->ptr mapping is deliberately left alone (see ReadyBuiltinTypes)
+        self.assertEquals(map.GetPtr(obj1), ptr)
+        
+        ptrs = []
+        map.MapOverBridgePtrs(PtrFunc(ptrs.append))
+        self.assertEquals(ptrs, [])
+    
+    
+    def testReleaseLeavesOtherPtrForSameObj(self):
+        map, ptr1, obj, _ = self.getVars()
+        _, ptr2, __, ___ = self.getVars()
+        map.Associate(ptr1, obj)
+        map.Associate(ptr2, obj)
+        self.assertEquals(map.GetPtr(obj), ptr2)
         
+        map.Release(ptr1)
+        self.assertEquals(map.HasPtr(ptr1), False)
+        self.assertEquals(map.GetObj(ptr2), obj)
+        self.assertEquals(map.GetPtr(obj), ptr2)
+    
+    
+    def testAssociateValue(self):
+        map, ptr, _, __ = self.getVars()
+        value = 12345
+        map.AssociateValue(ptr, value)
+        self.assertEquals(map.GetObj(ptr), value)
+        self.assertEquals(map.TryGetSimpleObj(ptr), (True, value))
+        self.assertEquals(map.HasObj(value), False, "shouldn't be findable by identity")
+        
+        map.Release(ptr)
+        self.assertEquals(map.HasPtr(ptr), False)
+        self.assertEquals(map.TryGetSimpleObj(ptr), (False, None))
+    
+    
+    def testTryGetSimpleObjIgnoresBridgePtrs(self):
+        map, ptr, obj, _ = self.getVars()
+        map.BridgeAssociate(ptr, obj)
+        self.assertEquals(map.TryGetSimpleObj(ptr), (False, None))
+    
+    
+    def testAssociateWithIdAndTryGetPtr(self):
+        map, ptr, obj, _ = self.getVars()
+        self.assertEquals(map.TryGetPtr(id(obj)), (False, IntPtr.Zero))
+        map.Associate(ptr, obj, id(obj))
+        self.assertEquals(map.TryGetPtr(id(obj)), (True, ptr))
+        self.assertEquals(map.GetPtr(obj), ptr)
+        self.assertEquals(map.GetObj(ptr), obj)
+    
+    
+    def testReserve(self):
+        map = InterestingPtrMap()
+        map.Reserve(20000)
+        objs = {}
+        for i in range(1, 20001):
+            ptr = IntPtr(i * 16)
+            objs[ptr] = object()
+            map.Associate(ptr, objs[ptr])
+        self.assertEquals(map.Count, 20000)
+        for ptr, obj in objs.items():
+            self.assertEquals(map.GetObj(ptr), obj)
+    
+    
+    def testManyMappings(self):
+        # enough to force several resizes, and plenty of collisions on removal
+        map = InterestingPtrMap()
+        objs = {}
+        for i in range(1, 20001):
+            ptr = IntPtr(i * 16)
+            objs[ptr] = object()
+            if i % 3:
+                map.Associate(ptr, objs[ptr])
+            else:
+                map.BridgeAssociate(ptr, objs[ptr])
+        self.assertEquals(map.Count, 20000)
+        
+        for ptr in list(objs)[::2]:
+            map.Release(ptr)
+            del objs[ptr]
+        self.assertEquals(map.Count, 10000)
+        self.assertRaisesClr(BadMappingException, map.Release, IntPtr(8))
         
+        for ptr, obj in objs.items():
+            self.assertEquals(map.HasPtr(ptr), True)
+            self.assertEquals(map.GetObj(ptr), obj)
+            self.assertEquals(map.GetPtr(obj), ptr)
+        for ptr in objs:
+            map.Release(ptr)
+        self.assertEquals(map.Count, 0)
+        self.assertEquals((map.YoungBridgeCount, map.OldBridgeCount), (0, 0))
+
+
+MAPPINGS = 100000
+
+class InterestingPtrMapBenchmark(TestCase):
+    
+    def setUp(self):
+        TestCase.setUp(self)
+        self.objs = [object() for _ in xrange(MAPPINGS)]
+        self.ptrs = [IntPtr((i + 1) * 16) for i in xrange(MAPPINGS)]
+    
+    
+    def fill(self, map):
+        for ptr, obj in zip(self.ptrs, self.objs):
+            map.Associate(ptr, obj)
+        return map
+    
+    
+    def fillLegacyLayout(self):
+        # same contents as the dictionaries the map used to keep for simple mappings
+        ptr2id = Dictionary[IntPtr, long]()
+        id2ptr = Dictionary[long, IntPtr]()
+        id2obj = Dictionary[long, object]()
+        for ptr, obj in zip(self.ptrs, self.objs):
+            ptr2id[ptr] = long(id(obj))
+            id2ptr[long(id(obj))] = ptr
+            id2obj[long(id(obj))] = obj
+        return ptr2id, id2ptr, id2obj, Dictionary[long, WeakReference](), Dictionary[long, object]()
+    
+    
+    def testBytesPerMapping(self):
+        # ids are allocated lazily, so make sure we don't count them against either layout
+        [id(obj) for obj in self.objs]
+        report('InterestingPtrMap bytes per mapping',
+            float(managed_bytes(lambda: self.fill(InterestingPtrMap()))) / MAPPINGS, 'B')
+        report('five-dictionary layout bytes per mapping',
+            float(managed_bytes(self.fillLegacyLayout)) / MAPPINGS, 'B')
+    
+    
+    def testLookups(self):
+        map = self.fill(InterestingPtrMap())
+        ptrs, objs = self.ptrs, self.objs
+        report('GetObj', rate(lambda i: map.GetObj(ptrs[i]), MAPPINGS), 'lookups/s')
+        report('GetPtr', rate(lambda i: map.GetPtr(objs[i]), MAPPINGS), 'lookups/s')
+        report('HasPtr (miss)', rate(lambda i: map.HasPtr(IntPtr(i * 16 + 8)), MAPPINGS), 'lookups/s')
+        report('Associate + Release', rate(lambda i: (map.Release(ptrs[i]), map.Associate(ptrs[i], objs[i])), MAPPINGS), 'pairs/s')
+    
+    
+    def testSweepPauses(self):
+        block = Marshal.AllocHGlobal(MAPPINGS * 16)
+        try:
+            map = InterestingPtrMap()
+            for i, obj in enumerate(self.objs):
+                ptr = IntPtr(block.ToInt64() + i * 16)
+                CPyMarshal.WriteIntField(ptr, PyObject, 'ob_refcnt', 2)
+                map.BridgeAssociate(ptr, obj)
+            counters = map.SweepCounters
+            
+            map.CheckBridgePtrs(True)
+            report('full sweep pause', counters.LastPauseMilliseconds, 'ms')
+            
+            counters.Reset()
+            map.GCThreshold = 1000
+            rate(lambda i: map.CheckBridgePtrs(False), 10000)
+            report('max slice pause (threshold 1000)', counters.MaxPauseMilliseconds, 'ms')
+            report('mean slice pause (threshold 1000)', counters.TotalPauseMilliseconds / counters.Slices, 'ms')
+            report('old generation after 10 young passes', map.OldBridgeCount, 'ptrs')
+        finally:
+            Marshal.FreeHGlobal(block)
+
 
 suite = makesuite(InterestingPtrMapTest)
 if __name__ == '__main__':
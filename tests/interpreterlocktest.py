@@ -0,0 +1,129 @@
+from tests.utils.runtest import makesuite, run
+from tests.utils.testcase import TestCase
+
+from System.Threading import Thread, ThreadStart
+
+from Ironclad import InterpreterLock, LockException
+
+
+class InterpreterLockTest(TestCase):
+    
+    def testSingleThreaded(self):
+        lock = InterpreterLock()
+        self.assertEquals(lock.IsAcquired, False)
+        self.assertEquals(lock.CountAcquired, 0)
+        
+        self.assertEquals(lock.Acquire(), 1)
+        self.assertEquals(lock.IsAcquired, True)
+        self.assertEquals(lock.CountAcquired, 1)
+        
+        self.assertEquals(lock.Acquire(), 2)
+        self.assertEquals(lock.TryAcquire(), True)
+        self.assertEquals(lock.CountAcquired, 3)
+
+        lock.Release()
+        lock.Release()
+        self.assertEquals(lock.IsAcquired, True)
+        self.assertEquals(lock.CountAcquired, 1)
+
+        lock.Release()
+        self.assertEquals(lock.IsAcquired, False)
+        self.assertEquals(lock.CountAcquired, 0)
+        self.assertRaises(LockException, lock.Release)
+
+
+    def testMultiThreaded(self):
+        lock = InterpreterLock()
+        
+        def TestCanAcquire():
+            self.assertEquals(lock.Acquire(), 1)
+            self.assertEquals(lock.IsAcquired, True)
+            lock.Release()
+        t = Thread(ThreadStart(TestCanAcquire))
+        t.Start()
+        t.Join()
+        
+        lock.Acquire()
+        
+        def TestCannotAcquire():
+            self.assertEquals(lock.TryAcquire(), False)
+            self.assertEquals(lock.IsAcquired, False)
+            self.assertRaises(LockException, lock.Release)
+        t = Thread(ThreadStart(TestCannotAcquire))
+        t.Start()
+        t.Join()
+        
+        lock.Release()
+
+
+    def testBlockedAcquireWakesOnRelease(self):
+        lock = InterpreterLock()
+        lock.Acquire()
+        lock.Acquire()
+        
+        acquired = []
+        def Acquire():
+            lock.Acquire()
+            acquired.append(True)
+            lock.Release()
+        t = Thread(ThreadStart(Acquire))
+        t.Start()
+        Thread.CurrentThread.Join(100)
+        self.assertEquals(acquired, [])
+        
+        lock.Release()
+        Thread.CurrentThread.Join(100)
+        self.assertEquals(acquired, [])
+        
+        lock.Release()
+        t.Join()
+        self.assertEquals(acquired, [True])
+        self.assertEquals(lock.TryAcquire(), True)
+        lock.Release()
+
+
+    def testSwitchIntervalHandsOffToWaiter(self):
+        lock = InterpreterLock()
+        self.assertEquals(lock.SwitchInterval, 0)
+        lock.SwitchInterval = 0.001
+        self.assertAlmostEquals(lock.SwitchInterval, 0.001)
+        lock.Acquire()
+        
+        acquired = []
+        def Acquire():
+            lock.Acquire()
+            acquired.append(Thread.CurrentThread.ManagedThreadId)
+            lock.Release()
+        t = Thread(ThreadStart(Acquire))
+        t.Start()
+        Thread.CurrentThread.Join(100)
+        
+        lock.Release()
+        t.Join()
+        self.assertEquals(lock.Handoffs, 1)
+        self.assertEquals(len(acquired), 1)
+        
+        histograms = lock.GetWaitHistograms()
+        self.assertEquals(list(histograms.Keys), acquired)
+        histogram = histograms[acquired[0]]
+        self.assertEquals(len(histogram), len(lock.WaitBucketLimits) + 1)
+        self.assertEquals(sum(histogram), 1)
+        
+        lock.ResetWaitHistograms()
+        self.assertEquals(lock.GetWaitHistograms().Count, 0)
+        self.assertEquals(lock.Handoffs, 0)
+
+
+    def testDispose(self):
+        lock = InterpreterLock()
+        lock.Acquire()
+        lock.Acquire()
+        lock.Dispose()
+        self.assertEquals(lock.IsAcquired, False)
+        
+
+suite = makesuite(
+    InterpreterLockTest,
+)
+if __name__ == '__main__':
+    run(suite)
@@ -2,6 +2,7 @@
 from tests.utils.runtest import makesuite, run
 
 from tests.utils.allocators import GetAllocatingTestAllocator
+from tests.utils.benchmark import elapsed, rate, report
 from tests.utils.gc import gcwait
 from tests.utils.memory import CreateTypes, OffsetPtr, PtrToStructure
 from tests.utils.testcase import TestCase, WithMapper
@@ -107,6 +108,34 @@ class PyList_Type_Test(TypeTestCase):
             self.assertEquals(mapper.RefCount(CPyMarshal.ReadPtr(dataStore)), 1, "bad refcount for items")
             dataStore = OffsetPtr(dataStore, CPyMarshal.PtrSize)
 
+    
+    
+    @WithMapper
+    def testStoreRetrieveMixedList(self, mapper, _):
+        obj = object()
+        s = 'hello'
+        list_ = [1, 123456789, 2.5, s, s, None, obj, [7]]
+        listPtr = mapper.Store(list_)
+        
+        dataStore = CPyMarshal.ReadPtrField(listPtr, PyListObject, "ob_item")
+        itemPtrs = [CPyMarshal.ReadPtr(OffsetPtr(dataStore, i * CPyMarshal.PtrSize)) for i in range(len(list_))]
+        types = [CPyMarshal.ReadPtrField(ptr, PyObject, "ob_type") for ptr in itemPtrs[:4]]
+        self.assertEquals(types, [mapper.PyInt_Type, mapper.PyInt_Type, mapper.PyFloat_Type, mapper.PyString_Type])
+        self.assertEquals(itemPtrs[3], itemPtrs[4], "same str should be stored once")
+        self.assertEquals(mapper.RefCount(itemPtrs[3]), 2, "bad refcount for repeated str")
+        self.assertEquals(itemPtrs[5], mapper._Py_NoneStruct)
+        self.assertEquals([mapper.Retrieve(ptr) for ptr in itemPtrs], list_, "contents not stored")
+        
+        copyPtr = mapper.PyList_New(len(list_))
+        copyStore = CPyMarshal.ReadPtrField(copyPtr, PyListObject, "ob_item")
+        for i, ptr in enumerate(itemPtrs):
+            mapper.IncRef(ptr)
+            CPyMarshal.WritePtr(OffsetPtr(copyStore, i * CPyMarshal.PtrSize), ptr)
+        copy = mapper.Retrieve(copyPtr)
+        self.assertEquals(copy, list_, "retrieved wrong list")
+        self.assertEquals(copy[6] is obj, True, "lost identity")
+        self.assertEquals(copy[7] is list_[7], True, "lost identity")
+
 
 class ListFunctionsTest(TestCase):
     
@@ -179,25 +208,25 @@ class ListFunctionsTest(TestCase):
         self.assertEquals(len(allocs), 4, "didn't allocate memory for data store (list; item1; item2; data store comes 4th)")
 
         dataPtrAfterFirstAppend = CPyMarshal.ReadPtrField(listPtr, PyListObject, "ob_item")
-        self.assertEquals(allocs[3], (dataPtrAfterFirstAppend, CPyMarshal.PtrSize), "allocated wrong amount of memory")
+        self.assertEquals(allocs[3], (dataPtrAfterFirstAppend, CPyMarshal.PtrSize * 4), "allocated wrong amount of memory")
+        self.assertEquals(CPyMarshal.ReadIntField(listPtr, PyListObject, "allocated"), 4, "bad allocated")
+        self.assertEquals(CPyMarshal.ReadIntField(listPtr, PyListObject, "ob_size"), 1, "bad ob_size")
         self.assertEquals(CPyMarshal.ReadPtr(dataPtrAfterFirstAppend), itemPtr1, "failed to fill memory")
         self.assertEquals(mapper.RefCount(itemPtr1), 2, "failed to incref new contents")
         self.assertEquals(mapper.Retrieve(listPtr), [item1], "retrieved wrong list")
         
-        # make refcount 1, to prove that references are not lost when reallocing data
         mapper.DecRef(itemPtr1)
 
         self.assertEquals(mapper.PyList_Append(listPtr, itemPtr2), 0, "failed to report success")
-        self.assertEquals(len(allocs), 5, "didn't allocate memory for new, larger data store")
-        self.assertEquals(deallocs, [dataPtrAfterFirstAppend])
+        self.assertEquals(len(allocs), 4, "shouldn't have needed a bigger data store yet")
+        self.assertEquals(deallocs, [])
 
-        dataPtrAfterSecondAppend = CPyMarshal.ReadPtrField(listPtr, PyListObject, "ob_item")
-        self.assertEquals(allocs[4], (dataPtrAfterSecondAppend, (CPyMarshal.PtrSize * 2)), 
-                          "allocated wrong amount of memory")
-        self.assertEquals(CPyMarshal.ReadPtr(dataPtrAfterSecondAppend), itemPtr1, 
-                          "failed to keep reference to first item")
-        self.assertEquals(CPyMarshal.ReadPtr(OffsetPtr(dataPtrAfterSecondAppend, CPyMarshal.PtrSize)), itemPtr2, 
+        self.assertEquals(CPyMarshal.ReadPtrField(listPtr, PyListObject, "ob_item"), dataPtrAfterFirstAppend)
+        self.assertEquals(CPyMarshal.ReadIntField(listPtr, PyListObject, "ob_size"), 2, "bad ob_size")
+        self.assertEquals(CPyMarshal.ReadPtr(dataPtrAfterFirstAppend), itemPtr1, 
                           "failed to keep reference to first item")
+        self.assertEquals(CPyMarshal.ReadPtr(OffsetPtr(dataPtrAfterFirstAppend, CPyMarshal.PtrSize)), itemPtr2, 
+                          "failed to add second item")
         self.assertEquals(mapper.RefCount(itemPtr1), 1, "wrong refcount for item existing only in list")
         self.assertEquals(mapper.RefCount(itemPtr2), 2, "wrong refcount newly-added item")
         self.assertEquals(mapper.Retrieve(listPtr), [item1, item2], "retrieved wrong list")
@@ -206,6 +235,78 @@ class ListFunctionsTest(TestCase):
         deallocTypes()
     
     
+    def testPyList_AppendOverAllocates(self):
+        allocs = []
+        deallocs = []
+        mapper = PythonMapper(GetAllocatingTestAllocator(allocs, deallocs))
+        deallocTypes = CreateTypes(mapper)
+        
+        listPtr = mapper.PyList_New(0)
+        items = [object() for _ in range(100)]
+        itemPtrs = map(mapper.Store, items)
+        del allocs[:]
+        allocateds = []
+        for itemPtr in itemPtrs:
+            mapper.PyList_Append(listPtr, itemPtr)
+            allocated = CPyMarshal.ReadIntField(listPtr, PyListObject, "allocated")
+            if allocated not in allocateds:
+                allocateds.append(allocated)
+        
+        # same growth pattern as CPython
+        self.assertEquals(allocateds, [4, 8, 16, 25, 35, 46, 58, 72, 88, 106])
+        self.assertEquals([size for (_, size) in allocs], [a * CPyMarshal.PtrSize for a in allocateds], 
+                          "reallocated wrong")
+        self.assertEquals(mapper.Retrieve(listPtr), items, "retrieved wrong list")
+        
+        mapper.Dispose()
+        deallocTypes()
+    
+    
+    @WithMapper
+    def testPyList_Append_Deferred(self, mapper, _):
+        mapper.DeferListAppends = True
+        listPtr = mapper.PyList_New(0)
+        list_ = mapper.Retrieve(listPtr)
+        
+        mapper.PyList_Append(listPtr, mapper.Store(1))
+        mapper.PyList_Append(listPtr, mapper.Store(2))
+        self.assertEquals(list_, [], "should have deferred appends")
+        self.assertEquals(CPyMarshal.ReadIntField(listPtr, PyListObject, "ob_size"), 2, "bad ob_size")
+        
+        self.assertEquals(mapper.Retrieve(listPtr) is list_, True, "retrieved wrong object")
+        self.assertEquals(list_, [1, 2], "failed to catch up on Retrieve")
+        
+        mapper.PyList_Append(listPtr, mapper.Store(3))
+        mapper.EnsureGIL()
+        mapper.ReleaseGIL()
+        self.assertEquals(list_, [1, 2, 3], "failed to catch up on ReleaseGIL")
+        
+        mapper.PyList_Append(listPtr, mapper.Store(4))
+        mapper.DeferListAppends = False
+        self.assertEquals(list_, [1, 2, 3, 4], "failed to catch up when deferral turned off")
+        
+        mapper.PyList_Append(listPtr, mapper.Store(5))
+        self.assertEquals(list_, [1, 2, 3, 4, 5], "failed to append immediately")
+    
+    
+    @WithMapper
+    def testPyList_Append_Deferred_SetItem(self, mapper, _):
+        mapper.DeferListAppends = True
+        list_ = [1]
+        listPtr = mapper.Store(list_)
+        mapper.PyList_Append(listPtr, mapper.Store(2))
+        mapper.PyList_SetItem(listPtr, 1, mapper.Store(3))
+        self.assertEquals(list_, [1, 3])
+    
+    
+    @WithMapper
+    def testPyList_Append_PartlyFilledNewList(self, mapper, _):
+        listPtr = mapper.PyList_New(1)
+        mapper.PyList_SetItem(listPtr, 0, mapper.Store(1))
+        mapper.PyList_Append(listPtr, mapper.Store(2))
+        self.assertEquals(mapper.Retrieve(listPtr), [1, 2])
+    
+    
     @WithMapper
     def testPyList_Append_NotList(self, mapper, _):
         notListPtr = mapper.Store(object())
@@ -387,6 +488,67 @@ class ListFunctionsTest(TestCase):
         tPtr = mapper.PyList_AsTuple(mapper.Store([1, 2, 3]))
         self.assertEquals(mapper.Retrieve(tPtr), (1, 2, 3))
         
+
+
+class PyList_AppendBenchmark(TestCase):
+    
+    COUNT = 1000000
+    
+    def testAppend(self):
+        for defer in (False, True):
+            mapper = PythonMapper()
+            deallocTypes = CreateTypes(mapper)
+            try:
+                mapper.DeferListAppends = defer
+                listPtr = mapper.PyList_New(0)
+                list_ = mapper.Retrieve(listPtr)
+                itemPtr = mapper.Store(object())
+                def Append(_):
+                    mapper.PyList_Append(listPtr, itemPtr)
+                report('PyList_Append (defer=%s)' % defer, rate(Append, self.COUNT), 'calls/s')
+                report('  then catch up (defer=%s)' % defer, elapsed(lambda: mapper.Retrieve(listPtr)), 's')
+                self.assertEquals(len(list_), self.COUNT)
+            finally:
+                mapper.Dispose()
+                deallocTypes()
+    
+
+
+class ListMarshallingBenchmark(TestCase):
+    
+    COUNT = 100000
+    
+    def testRoundTrip(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        try:
+            for name, list_ in (('ints', range(1000, 1000 + self.COUNT)),
+                                ('floats', [i + 0.5 for i in xrange(self.COUNT)])):
+                listPtrs = []
+                def Store():
+                    listPtrs.append(mapper.Store(list(list_)))
+                seconds = elapsed(Store)
+                report('Store(list of %d %s)' % (self.COUNT, name), self.COUNT / seconds, 'items/s')
+                
+                # as though C had built a new list from the items and returned it
+                listPtr = listPtrs[0]
+                copyPtr = mapper.PyList_New(self.COUNT)
+                items = CPyMarshal.ReadPtrField(listPtr, PyListObject, "ob_item")
+                copyItems = CPyMarshal.ReadPtrField(copyPtr, PyListObject, "ob_item")
+                for i in xrange(self.COUNT):
+                    itemPtr = CPyMarshal.ReadPtr(OffsetPtr(items, i * CPyMarshal.PtrSize))
+                    mapper.IncRef(itemPtr)
+                    CPyMarshal.WritePtr(OffsetPtr(copyItems, i * CPyMarshal.PtrSize), itemPtr)
+                seconds = elapsed(lambda: mapper.Retrieve(copyPtr))
+                report('Retrieve(list of %d %s)' % (self.COUNT, name), self.COUNT / seconds, 'items/s')
+                self.assertEquals(mapper.Retrieve(copyPtr), list_)
+                
+                mapper.DecRef(copyPtr)
+                mapper.DecRef(listPtr)
+        finally:
+            mapper.Dispose()
+            deallocTypes()
+    
         
 suite = makesuite(
     PyList_Type_Test,
@@ -1,6 +1,10 @@
+import os
+import shutil
 import sys
+import tempfile
 from tests.utils.runtest import makesuite, run
 
+from tests.utils.benchmark import rate, report
 from tests.utils.cpython import MakeItemsTablePtr, MakeMethodDef, MakeTypePtr
 from tests.utils.memory import CreateTypes
 from tests.utils.pythonmapper import MakeAndAddEmptyModule
@@ -22,6 +26,17 @@ class Py_InitModule4_SetupTest(TestCase):
         
         self.assertEquals(isinstance(_dispatcher, Dispatcher), True, "wrong dispatcher class")
         self.assertEquals(_dispatcher.mapper, mapper, "dispatcher had wrong mapper")
+
+
+    @WithMapper
+    def testUsefulImportsAreOnlyCompiledOnce(self, mapper, _):
+        cache = mapper.CodeCache
+        MakeAndAddEmptyModule(mapper)
+        count, hits, misses = cache.Count, cache.Hits, cache.Misses
+        
+        module = mapper.Retrieve(MakeAndAddEmptyModule(mapper))
+        self.assertEquals(module.IntPtr, IntPtr)
+        self.assertEquals((cache.Count, cache.Hits, cache.Misses), (count, hits + 1, misses))
         
 
 MODULE_PTR = IntPtr(54321)
@@ -55,13 +70,18 @@ class Py_InitModule4_Test(TestCase):
         method, deallocMethod = MakeMethodDef(
             "harold", lambda _, __: IntPtr.Zero, METH.VARARGS, "harold's documentation")
         
-        def testModule(test_module, _):
+        def testModule(test_module, mapper):
             self.assertEquals(test_module.__doc__, 'test_docstring',
                               'module docstring not remembered')
             self.assertTrue(callable(test_module.harold),
                             'function not remembered')
             self.assertTrue(callable(test_module._dispatcher.table['harold']),
                             'delegate not remembered')
+            slots = test_module._dispatcher.slots
+            self.assertEquals(slots is mapper.DispatchTable, True, 'dispatcher had wrong slots')
+            names = [slots.GetName(i) for i in range(slots.Count)]
+            self.assertEquals(slots.GetDelegate(names.index('harold')), test_module._dispatcher.table['harold'],
+                              'delegate not given a slot')
             self.assertEquals(test_module.harold.__doc__, "harold's documentation",
                               'function docstring not remembered')
 
@@ -201,6 +221,69 @@ class Py_InitModule4_Test(TestCase):
         deallocTypes()
         
         
+class Py_InitModule4_CodeCacheTest(TestCase):
+    
+    def makeMethods(self, mapper, result, addToCleanUp):
+        resultPtr = mapper.Store(result)
+        def func(_, __):
+            mapper.IncRef(resultPtr)
+            return resultPtr
+        method, deallocMethod = MakeMethodDef("func", func, METH.NOARGS, "it's\na doc")
+        addToCleanUp(deallocMethod)
+        methods, deallocMethods = MakeItemsTablePtr([method])
+        addToCleanUp(deallocMethods)
+        return methods
+    
+    
+    @WithMapper
+    def testIdenticalModulesShareCompiledCode(self, mapper, addToCleanUp):
+        first, second = object(), object()
+        cache = mapper.CodeCache
+        module1 = mapper.Retrieve(mapper.Py_InitModule4(
+            "cached_module_1", self.makeMethods(mapper, first, addToCleanUp), "", IntPtr.Zero, 12345))
+        count, misses = cache.Count, cache.Misses
+        
+        module2 = mapper.Retrieve(mapper.Py_InitModule4(
+            "cached_module_2", self.makeMethods(mapper, second, addToCleanUp), "", IntPtr.Zero, 12345))
+        self.assertEquals((cache.Count, cache.Misses), (count, misses))
+        
+        self.assertEquals(module1.func(), first)
+        self.assertEquals(module2.func(), second)
+        self.assertEquals((module2.func.__module__, module2.func.__doc__), ("cached_module_2", "it's\na doc"))
+    
+    
+    def testCachesCompiledCodeOnDisk(self):
+        testDir = tempfile.mkdtemp()
+        pydPath = os.path.join(testDir, 'fake.pyd')
+        open(pydPath, 'w').close()
+        cacheDir = os.path.join(testDir, 'cache')
+        
+        def importFake(expectDiskHit):
+            mapper = PythonMapper()
+            deallocs = [mapper.Dispose, CreateTypes(mapper)]
+            try:
+                result = object()
+                methods = self.makeMethods(mapper, result, deallocs.append)
+                cache = mapper.CodeCache
+                cache.Directory = cacheDir
+                mapper.importFiles.Push(pydPath)
+                module = mapper.Retrieve(mapper.Py_InitModule4("fake", methods, "", IntPtr.Zero, 12345))
+                mapper.importFiles.Pop()
+                self.assertEquals((cache.DiskHits, cache.DiskMisses), (int(expectDiskHit), int(not expectDiskHit)))
+                self.assertEquals(module.func(), result)
+            finally:
+                for dealloc in deallocs:
+                    dealloc()
+        try:
+            importFake(False)
+            bucket, = os.listdir(cacheDir)
+            self.assertEquals(len([f for f in os.listdir(os.path.join(cacheDir, bucket)) if f.endswith('.dll')]), 1)
+            importFake(True)
+        finally:
+            # the cached dll is still loaded, so it may not go away yet
+            shutil.rmtree(testDir, ignore_errors=True)
+        
+        
 class PyModule_Functions_Test(TestCase):
     
     @WithMapper
@@ -355,6 +438,17 @@ class ImportTest(TestCase):
         self.assertEquals(mapper.PyImport_ImportModule('this_module_does_not_exist'), IntPtr.Zero)
         self.assertMapperHasError(mapper, ImportError)
 
+    @WithMapper
+    def testImportsShareOneCompiledSnippet(self, mapper, _):
+        cache = mapper.CodeCache
+        self.assertEquals(mapper.PyImport_ImportModule('this_module_does_not_exist'), IntPtr.Zero)
+        self.assertMapperHasError(mapper, ImportError)
+        count, misses = cache.Count, cache.Misses
+        
+        self.assertEquals(mapper.PyImport_ImportModule('nor_does_this_one'), IntPtr.Zero)
+        self.assertMapperHasError(mapper, ImportError)
+        self.assertEquals((cache.Count, cache.Misses), (count, misses))
+
 
 
 class NastyImportDetailsTest(TestCase):
@@ -412,6 +506,39 @@ class NastyImportDetailsTest(TestCase):
 
 
 
+CALLS = 100000
+
+class Py_InitModule4_Benchmark(TestCase):
+
+    def testNoArgsFunctionCalls(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        resultPtr = mapper.Store(None)
+        def func(_, __):
+            mapper.IncRef(resultPtr)
+            return resultPtr
+        method, deallocMethod = MakeMethodDef("func", func, METH.NOARGS)
+        methods, deallocMethods = MakeItemsTablePtr([method])
+        try:
+            mapper.Py_InitModule4("bench_module", methods, "", MODULE_PTR, 12345)
+            bench_module = sys.modules['bench_module']
+            report('METH_NOARGS function calls', rate(lambda _: bench_module.func(), CALLS), 'calls/s')
+
+            def noop():
+                pass
+            report('python function calls, for comparison', rate(lambda _: noop(), CALLS), 'calls/s')
+            
+            # every dispatcher call does one of these when it returns
+            report('HasPendingError checks (no error)', rate(lambda _: mapper.HasPendingError, CALLS), 'checks/s')
+            report('LastException checks (no error), for comparison', rate(lambda _: mapper.LastException, CALLS), 'checks/s')
+        finally:
+            del sys.modules['bench_module']
+            mapper.Dispose()
+            deallocMethods()
+            deallocMethod()
+            deallocTypes()
+
+
 # not sure this is the right place for these tests
 class BuiltinsTest(TestCase):
     
@@ -1,6 +1,7 @@
 
 
 from tests.utils.runtest import makesuite, run
+from tests.utils.benchmark import rate, report
 from tests.utils.testcase import TestCase
 from tests.utils.numbers import NumberI, NumberL, NumberF, NUMBER_VALUE
 
@@ -34,6 +35,74 @@ class NumberMakerTest(TestCase):
 
         self.assertRaises(TypeError, lambda: NumberMaker.MakeFloat(object()))
 
+    def testBuiltinTypes(self):
+        for value in (True, False, 0, -7, 123L, 2 ** 70, 1.5, -2.75):
+            self.assertEquals(NumberMaker.MakeBigInteger(value), long(value))
+            if value != 2 ** 70:
+                self.assertEquals(NumberMaker.MakeFloat(value), float(value))
+        self.assertRaises(ValueError, lambda: NumberMaker.MakeBigInteger(float('nan')))
+        self.assertRaises(OverflowError, lambda: NumberMaker.MakeBigInteger(float('inf')))
+
+    def testRepeatedConversions(self):
+        # fallbacks are remembered per type; make sure they keep working
+        class Both(object):
+            def __int__(self):
+                return 1
+            def __float__(self):
+                return 2.5
+        for _ in range(3):
+            for cls in (NumberI, NumberL, NumberF):
+                self.assertEquals(NumberMaker.MakeBigInteger(cls()), NUMBER_VALUE)
+                self.assertEquals(NumberMaker.MakeFloat(cls()), NUMBER_VALUE)
+            self.assertEquals(NumberMaker.MakeBigInteger(Both()), 1)
+            self.assertEquals(NumberMaker.MakeFloat(Both()), 2.5)
+            self.assertRaises(TypeError, lambda: NumberMaker.MakeBigInteger(object()))
+            self.assertRaises(TypeError, lambda: NumberMaker.MakeFloat(object()))
+
+    def testTypeGainsFallbackAfterFailedConversion(self):
+        class Late(object):
+            pass
+        self.assertRaises(TypeError, lambda: NumberMaker.MakeBigInteger(Late()))
+        self.assertRaises(TypeError, lambda: NumberMaker.MakeFloat(Late()))
+        
+        Late.__int__ = lambda self: 5
+        self.assertEquals(NumberMaker.MakeBigInteger(Late()), 5)
+        self.assertEquals(NumberMaker.MakeFloat(Late()), 5.0)
+
+    def testOldStyleInstances(self):
+        class OldI:
+            def __int__(self):
+                return 3
+        class OldF:
+            def __float__(self):
+                return 4.0
+        for _ in range(2):
+            self.assertEquals(NumberMaker.MakeBigInteger(OldI()), 3)
+            self.assertEquals(NumberMaker.MakeBigInteger(OldF()), 4)
+            self.assertEquals(NumberMaker.MakeFloat(OldI()), 3.0)
+            self.assertEquals(NumberMaker.MakeFloat(OldF()), 4.0)
+
+
+class NumberMakerBenchmark(TestCase):
+
+    def testScalarConversions(self):
+        # stand-ins for numpy's float64 (a float subclass) and int32 (which isn't an
+        # int subclass, but has the number methods) -- see NumpyScalarBenchmark in
+        # functionalitytest for the real thing
+        class float64(float):
+            pass
+        class int32(object):
+            def __init__(self, value):
+                self.value = value
+            def __int__(self):
+                return self.value
+            def __float__(self):
+                return float(self.value)
+        count = 100000
+        for name, value in (('int', 123), ('float', 1.5), ('float64', float64(1.5)), ('int32', int32(123))):
+            report('MakeBigInteger(%s)' % name, rate(lambda _: NumberMaker.MakeBigInteger(value), count), 'calls/s')
+            report('MakeFloat(%s)' % name, rate(lambda _: NumberMaker.MakeFloat(value), count), 'calls/s')
+
 
 
 suite = makesuite(NumberMakerTest)
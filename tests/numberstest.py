@@ -1,6 +1,8 @@
 
 import operator
 
+from tests.utils.allocators import GetAllocatingTestAllocator
+from tests.utils.memory import CreateTypes
 from tests.utils.runtest import makesuite, run
 from tests.utils.testcase import TestCase, WithMapper
 from tests.utils.numbers import NumberI, NumberL, NumberF, NUMBER_VALUE
@@ -626,6 +628,97 @@ class PyNumber_Test(TestCase):
             mapper.DecRef(ptr)
         
     
+class NumberCache_Test(TestCase):
+    
+    @WithMapper
+    def testSmallIntCache(self, mapper, _):
+        mapper.SetSmallIntCacheRange(-5, 10)
+        self.assertEquals((mapper.SmallIntCacheMin, mapper.SmallIntCacheMax), (-5, 10))
+        
+        ptr = mapper.PyInt_FromLong(3)
+        self.assertEquals((mapper.SmallIntCacheHits, mapper.SmallIntCacheMisses), (0, 1))
+        self.assertEquals(mapper.PyInt_FromLong(3), ptr)
+        self.assertEquals((mapper.SmallIntCacheHits, mapper.SmallIntCacheMisses), (1, 1))
+        self.assertEquals(mapper.RefCount(ptr), 2)
+        
+        mapper.DecRef(ptr)
+        mapper.DecRef(ptr)
+        self.assertEquals(mapper.HasPtr(ptr), True, "cached int should be immortal")
+        self.assertEquals(mapper.RefCount(ptr), 0)
+        self.assertEquals(mapper.PyInt_FromLong(3), ptr)
+        self.assertEquals(mapper.RefCount(ptr), 1)
+        self.assertEquals(mapper.Retrieve(ptr), 3)
+        
+        for value in (-6, 11):
+            ptr = mapper.PyInt_FromLong(value)
+            self.assertNotEquals(mapper.PyInt_FromLong(value), ptr)
+        self.assertEquals((mapper.SmallIntCacheHits, mapper.SmallIntCacheMisses), (2, 1))
+        
+        mapper.ResetNumberCacheCounters()
+        self.assertEquals((mapper.SmallIntCacheHits, mapper.SmallIntCacheMisses), (0, 0))
+
+
+    def testChangingSmallIntCacheRangeFreesUnreferencedInts(self):
+        frees = []
+        mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
+        deallocTypes = CreateTypes(mapper)
+        mapper.SetSmallIntCacheRange(0, 10)
+        unreferenced = mapper.PyInt_FromLong(3)
+        mapper.DecRef(unreferenced)
+        referenced = mapper.PyInt_FromLong(4)
+        
+        mapper.SetSmallIntCacheRange(0, -1)
+        self.assertEquals(frees, [unreferenced])
+        self.assertEquals(mapper.HasPtr(unreferenced), False)
+        
+        mapper.DecRef(referenced)
+        self.assertEquals(frees, [unreferenced, referenced])
+        self.assertEquals(mapper.HasPtr(referenced), False)
+        mapper.Dispose()
+        deallocTypes()
+
+
+    def testFreeLists(self):
+        frees = []
+        mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
+        deallocTypes = CreateTypes(mapper)
+        for freelist, values in ((mapper.IntFreeList, (12345, 54321)), 
+                                 (mapper.FloatFreeList, (1.5, 2.5)),
+                                 (mapper.ComplexFreeList, (1 + 2j, 3 + 4j))):
+            freelist.Capacity = 1
+            ptr1 = mapper.Store(values[0])
+            mapper.DecRef(ptr1)
+            self.assertEquals(mapper.HasPtr(ptr1), False)
+            self.assertEquals(freelist.Count, 1)
+            
+            ptr2 = mapper.Store(values[1])
+            self.assertEquals(ptr2, ptr1, "did not reuse memory")
+            self.assertEquals(mapper.Retrieve(ptr2), values[1])
+            self.assertEquals(mapper.RefCount(ptr2), 1)
+            self.assertEquals((freelist.Hits, freelist.Misses), (1, 1))
+            
+            mapper.DecRef(ptr2)
+            self.assertEquals(frees, [])
+            freelist.Capacity = 0
+            self.assertEquals(frees, [ptr2])
+            del frees[:]
+        mapper.Dispose()
+        deallocTypes()
+
+
+    def testDeallocNonExactTypeCallsTpFree(self):
+        frees = []
+        mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
+        deallocTypes = CreateTypes(mapper)
+        mapper.IntFreeList.Capacity = 10
+        ptr = mapper.Store(12345)
+        CPyMarshal.WritePtrField(ptr, PyObject, "ob_type", mapper.PyBool_Type)
+        mapper.IC_PyInt_Dealloc(ptr)
+        self.assertEquals(frees, [ptr])
+        self.assertEquals(mapper.IntFreeList.Count, 0)
+        mapper.Dispose()
+        deallocTypes()
+    
 
 suite = makesuite(
     PyBool_Test,
@@ -634,6 +727,7 @@ suite = makesuite(
     PyFloat_Test,
     PyComplex_Test,
     PyNumber_Test,
+    NumberCache_Test,
 )
 
 if __name__ == '__main__':
@@ -1,22 +1,27 @@
 import os
+import shutil
 import sys
+import tempfile
 
 from tests.utils.runtest import makesuite, run
 
 from tests.utils.allocators import GetAllocatingTestAllocator, GetDoNothingTestAllocator
+from tests.utils.benchmark import rate, report
 from tests.utils.cpython import MakeTypePtr
 from tests.utils.gc import gcwait
-from tests.utils.memory import CreateTypes, PtrToStructure
+from tests.utils.memory import CreateTypes, OffsetPtr, PtrToStructure
 from tests.utils.pythonmapper import MakeAndAddEmptyModule
 from tests.utils.testcase import TestCase, WithMapper
 
-from System import Int32, IntPtr, InvalidOperationException, NullReferenceException, Type, WeakReference
-from System.Collections.Generic import Stack, List
+from System import (
+    Int32, IntPtr, InvalidOperationException, NotSupportedException, NullReferenceException, Type, WeakReference
+)
 from System.Runtime.InteropServices import Marshal
+from System.Threading import Thread, ThreadStart
 
 from Ironclad import (
     BadRefCountException, CannotInterpretException, CPyMarshal, dgt_void_ptr, dgt_void_void,
-    HGlobalAllocator, PythonMapper, Unmanaged, UnmanagedDataMarker
+    HGlobalAllocator, PtrCountFunc, PythonMapper, TempObjects, Unmanaged, UnmanagedDataMarker
 )
 from Ironclad.Structs import PyObject, PyTypeObject
 
@@ -82,6 +87,68 @@ class PythonMapper_CreateDestroy_Test(TestCase):
             mapper.Dispose()
     
     
+    def testImportHookIndexesPydDirectories(self):
+        mapper = PythonMapper(DLL_PATH)
+        testDir = tempfile.mkdtemp()
+        try:
+            importer = sys.meta_path[-1]
+            pyd = os.path.join(testDir, 'fake.pyd')
+            open(pyd, 'w').close()
+            
+            self.assertEquals(importer.find_module('fake', [testDir]).path, pyd)
+            entry = importer.index.dirs[testDir]
+            self.assertEquals(importer.find_module('some.package.fake', [testDir]).path, pyd)
+            self.assertEquals(importer.find_module('other', [testDir]), None)
+            self.assertTrue(importer.index.dirs[testDir] is entry, "listed directory again")
+            
+            # a changed mtime means the directory gets listed again
+            otherPyd = os.path.join(testDir, 'other.pyd')
+            open(otherPyd, 'w').close()
+            mtime, pyds = importer.index.dirs[testDir]
+            importer.index.dirs[testDir] = (mtime - 1, pyds)
+            self.assertEquals(importer.find_module('other', [testDir]).path, otherPyd)
+        finally:
+            mapper.Dispose()
+            shutil.rmtree(testDir)
+    
+    
+    def testImportHookMatchesNamesCaseInsensitively(self):
+        mapper = PythonMapper(DLL_PATH)
+        testDir = tempfile.mkdtemp()
+        try:
+            importer = sys.meta_path[-1]
+            pyd = os.path.join(testDir, 'fake.pyd')
+            open(pyd, 'w').close()
+            
+            self.assertEquals(importer.find_module('FAKE', [testDir]).path, pyd)
+            self.assertEquals(importer.find_module('Fake', [testDir]).path, pyd)
+        finally:
+            mapper.Dispose()
+            shutil.rmtree(testDir)
+    
+    
+    def testImportHookReusesPydLoadedElsewhere(self):
+        mapper = PythonMapper(DLL_PATH)
+        testDir = tempfile.mkdtemp()
+        try:
+            importer = sys.meta_path[-1]
+            pyd = os.path.join(testDir, 'fake.pyd')
+            open(pyd, 'w').close()
+            
+            # as if it had been loaded by mapper.LoadModule, under another name; the
+            # empty .pyd would blow up if the loader tried to load it again
+            module = type(sys)('some.other.name')
+            module.__file__ = pyd
+            sys.modules['some.other.name'] = module
+            try:
+                self.assertTrue(importer.find_module('fake', [testDir]).load_module('fake') is module)
+            finally:
+                del sys.modules['some.other.name']
+        finally:
+            mapper.Dispose()
+            shutil.rmtree(testDir)
+    
+    
     def testFreesObjectsOnDispose(self):
         frees = []
         mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
@@ -509,7 +576,7 @@ class PythonMapper_References_Test(TestCase):
     def testReleaseGilDoesntExplodeIfTempObjectsEmpty(self):
         frees = []
         mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
-        mapper.tempObjects = Stack[List[IntPtr]]()
+        self.assertEquals(mapper.TempObjects.Depth, 0)
         try:
             mapper.ReleaseGIL()
         except InvalidOperationException:
@@ -520,44 +587,141 @@ class PythonMapper_References_Test(TestCase):
             mapper.Dispose()
 
 
-    def testReleaseGilDoesntExplodeIfTempObjectsContainsNull(self):
-        frees = []
-        mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
-        mapper.tempObjects = Stack[List[IntPtr]]()
-        mapper.tempObjects.Push(None)
-        try:
-            mapper.ReleaseGIL()
-        except SystemError:
-            self.fail('ReleaseGIL should not throw NullReference if tempObjects contains None')
-        except Exception:
-            pass
-        finally:
-            mapper.Dispose()
-
-
     def testDecRefLaterSurvivesEmptyStack(self):
         frees = []
         mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
-        mapper.tempObjects = Stack[List[IntPtr]]()
+        self.assertEquals(mapper.TempObjects.Depth, 0)
         try:
             mapper.DecRefLater(IntPtr.Zero)
+            self.assertEquals(mapper.TempObjects.Count, 0)
         except InvalidOperationException:
             self.fail('DecRefLater should not throw StackEmpty if tempObjects is empty')
         finally:
             mapper.Dispose()
 
 
-    def testDecRefLaterSurvivesNoneOnStack(self):
+    @WithMapper
+    def testDecRefLaterCoalescesRepeatedPtrs(self, mapper, _):
+        mapper.ResetTempObjectCounters()
+        ptr = mapper.Store(object())
+        other = mapper.Store(object())
+        for _ in range(3):
+            mapper.IncRef(ptr)
+            mapper.DecRefLater(ptr)
+            mapper.IncRef(other)
+            mapper.DecRefLater(other)
+        self.assertEquals(mapper.TempObjects.Count, 2)
+        self.assertEquals(mapper.TempObjects.Coalesced, 4)
+        
+        mapper.ReleaseGIL()
+        self.assertEquals(mapper.RefCount(ptr), 1)
+        self.assertEquals(mapper.RefCount(other), 1)
+        counters = mapper.GetTempObjectCounters()
+        self.assertEquals(counters.TempsReleased, 6)
+        self.assertEquals(counters.MaxTemps, 6)
+        self.assertEquals(counters.Coalesced, 4)
+        self.assertEquals(mapper.TempObjects.Coalesced, 0, "added to the mapper's counters")
+        self.assertEquals(mapper.TempObjects.Count, 0)
+        mapper.EnsureGIL()
+
+
+    @WithMapper
+    def testNestedTempObjectScopes(self, mapper, _):
+        mapper.ResetTempObjectCounters()
+        outer = mapper.Store(object())
+        inner = mapper.Store(object())
+        mapper.IncRef(outer)
+        mapper.DecRefLater(outer)
+        
+        mapper.EnsureGIL()
+        mapper.IncRef(inner)
+        mapper.DecRefLater(inner)
+        mapper.IncRef(outer)
+        mapper.DecRefLater(outer)
+        self.assertEquals(mapper.TempObjects.Count, 3, "coalesced across scopes")
+        mapper.ReleaseGIL()
+        self.assertEquals(mapper.RefCount(inner), 1)
+        self.assertEquals(mapper.RefCount(outer), 2)
+        
+        mapper.ReleaseGIL()
+        self.assertEquals(mapper.RefCount(outer), 1)
+        self.assertEquals(mapper.GetTempObjectCounters().ScopesReleased, 2)
+        mapper.EnsureGIL()
+
+
+    @WithMapper
+    def testTempObjectScopesArePerThread(self, mapper, _):
+        mapper.ResetTempObjectCounters()
+        mine = mapper.Store(object())
+        theirs = mapper.Store(object())
+        mapper.IncRef(mine)
+        mapper.DecRefLater(mine)
+        myTemps = mapper.TempObjects
+        
+        results = []
+        def Other():
+            mapper.EnsureGIL()
+            temps = mapper.TempObjects
+            mapper.IncRef(theirs)
+            mapper.DecRefLater(theirs)
+            results.append((temps is myTemps, temps.Depth, temps.Count))
+            mapper.ReleaseGIL()
+            results.append((temps.Depth, temps.Count, mapper.RefCount(theirs)))
+        t = Thread(ThreadStart(Other))
+        t.Start()
+        
+        self.assertEquals(myTemps.Depth, 1, "waiting thread must not push a scope onto ours")
+        self.assertEquals(myTemps.Count, 1)
+        mapper.ReleaseGIL()
+        t.Join()
+        mapper.EnsureGIL()
+        
+        self.assertEquals(mapper.RefCount(mine), 1)
+        self.assertEquals(results, [(False, 1, 1), (0, 0, 1)])
+        
+        # both threads' counters were added to the mapper's when their last scope ended
+        counters = mapper.GetTempObjectCounters()
+        self.assertEquals((counters.ScopesReleased, counters.TempsReleased), (2, 2))
+
+
+    def testDecRefLaterDuringReleaseGoesToEnclosingScope(self):
+        released = []
+        def Release(ptr, count):
+            released.append((ptr, count))
+            if ptr == IntPtr(1):
+                temps.Add(IntPtr(1))
+                temps.Add(IntPtr(2))
+        temps = TempObjects(PtrCountFunc(Release))
+        temps.Push()
+        temps.Push()
+        temps.Add(IntPtr(1))
+        temps.Pop()
+        self.assertEquals(released, [(IntPtr(1), 1)])
+        self.assertEquals(temps.Count, 2, "added ptrs were coalesced into released ones")
+        
+        temps.Pop()
+        self.assertEquals(released, [(IntPtr(1), 1), (IntPtr(1), 1), (IntPtr(2), 1)])
+        self.assertEquals(temps.Count, 0)
+
+
+    def testDecRefTimes(self):
         frees = []
         mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
-        mapper.tempObjects = Stack[List[IntPtr]]()
-        mapper.tempObjects.Push(None)
+        deallocTypes = CreateTypes(mapper)
         try:
-            mapper.DecRefLater(IntPtr.Zero)
-        except SystemError:
-            self.fail('DecRefLater should not throw NullReference if tempObjects contains None')
+            ptr = mapper.Store(object())
+            for _ in range(3):
+                mapper.IncRef(ptr)
+            mapper.DecRef(ptr, 3)
+            self.assertEquals(mapper.RefCount(ptr), 1)
+            self.assertEquals(frees, [])
+            
+            mapper.IncRef(ptr)
+            mapper.DecRef(ptr, 2)
+            self.assertEquals(frees, [ptr])
         finally:
             mapper.Dispose()
+            deallocTypes()
 
 
     @WithMapper
@@ -612,6 +776,9 @@ class PythonMapper_GetFuncPtr_NonApi_Test(TestCase):
             "IC_PyString_Concat_Core",
             
             "IC_PyBaseObject_Dealloc",
+            "IC_PyComplex_Dealloc",
+            "IC_PyFloat_Dealloc",
+            "IC_PyInt_Dealloc",
             "IC_PyList_Dealloc",
             "IC_PySlice_Dealloc",
             "IC_PyTuple_Dealloc",
@@ -672,6 +839,221 @@ class PythonMapper_Py_OptimizeFlag_Test(TestCase):
         self.assertEquals(CPyMarshal.ReadInt(flagPtr), 2)
 
 
+# _IC_DeallocQueue is laid out as { enqueue, drain, count, size, items[size] }
+QUEUE_DRAIN = CPyMarshal.PtrSize
+QUEUE_COUNT = CPyMarshal.PtrSize * 2
+QUEUE_SIZE = QUEUE_COUNT + CPyMarshal.IntSize
+QUEUE_ITEMS = QUEUE_SIZE + CPyMarshal.IntSize
+
+class PythonMapper_DeallocQueue_Test(TestCase):
+    
+    def getMapperWithQueue(self, frees, size):
+        # stands in for python27.dll's _IC_DeallocQueue and IC_EnqueueDealloc
+        mapper = PythonMapper(GetAllocatingTestAllocator([], frees))
+        deallocTypes = CreateTypes(mapper)
+        queue = Marshal.AllocHGlobal(QUEUE_ITEMS + (size * CPyMarshal.PtrSize))
+        def Enqueue(ptr):
+            count = CPyMarshal.ReadInt(OffsetPtr(queue, QUEUE_COUNT))
+            if count == size:
+                drain = Marshal.GetDelegateForFunctionPointer(CPyMarshal.ReadPtr(OffsetPtr(queue, QUEUE_DRAIN)), dgt_void_void)
+                drain()
+                count = CPyMarshal.ReadInt(OffsetPtr(queue, QUEUE_COUNT))
+            CPyMarshal.WriteIntField(ptr, PyObject, "ob_refcnt", 0)
+            CPyMarshal.WritePtr(OffsetPtr(queue, QUEUE_ITEMS + (count * CPyMarshal.PtrSize)), ptr)
+            CPyMarshal.WriteInt(OffsetPtr(queue, QUEUE_COUNT), count + 1)
+        self.enqueueDgt = dgt_void_ptr(Enqueue)
+        CPyMarshal.WritePtr(queue, Marshal.GetFunctionPointerForDelegate(self.enqueueDgt))
+        CPyMarshal.WriteInt(OffsetPtr(queue, QUEUE_COUNT), 0)
+        CPyMarshal.WriteInt(OffsetPtr(queue, QUEUE_SIZE), size)
+        mapper.RegisterData("_IC_DeallocQueue", queue)
+        
+        def Cleanup():
+            mapper.Dispose()
+            deallocTypes()
+            Marshal.FreeHGlobal(queue)
+        return mapper, queue, Cleanup
+    
+    
+    def testQueueDeallocsNeedsStub(self):
+        mapper = PythonMapper()
+        try:
+            self.assertEquals(mapper.QueueDeallocs, False)
+            def Set():
+                mapper.QueueDeallocs = True
+            self.assertRaises(NotSupportedException, Set)
+        finally:
+            mapper.Dispose()
+    
+    
+    def testQueueDeallocsSwapsDeallocs(self):
+        mapper, queue, cleanup = self.getMapperWithQueue([], 4)
+        try:
+            enqueue = CPyMarshal.ReadPtr(queue)
+            types = (mapper.PyInt_Type, mapper.PyFloat_Type, mapper.PyComplex_Type, mapper.PyBaseObject_Type)
+            deallocs = ("IC_PyInt_Dealloc", "IC_PyFloat_Dealloc", "IC_PyComplex_Dealloc", "IC_PyBaseObject_Dealloc")
+            mapper.QueueDeallocs = True
+            for typePtr in types:
+                self.assertEquals(CPyMarshal.ReadPtrField(typePtr, PyTypeObject, "tp_dealloc"), enqueue)
+            
+            mapper.QueueDeallocs = False
+            for typePtr, dealloc in zip(types, deallocs):
+                self.assertEquals(CPyMarshal.ReadPtrField(typePtr, PyTypeObject, "tp_dealloc"), mapper.GetFuncPtr(dealloc))
+        finally:
+            cleanup()
+    
+    
+    def testDeallocsFreedOnReleaseGIL(self):
+        frees = []
+        mapper, queue, cleanup = self.getMapperWithQueue(frees, 4)
+        try:
+            mapper.QueueDeallocs = True
+            ptrs = map(mapper.Store, (12345, 1.5, 1 + 2j, object()))
+            for ptr in ptrs:
+                mapper.DecRef(ptr)
+                self.assertEquals(mapper.RefCount(ptr), 0)
+                self.assertEquals(mapper.HasPtr(ptr), True)
+            self.assertEquals(frees, [])
+            
+            mapper.EnsureGIL()
+            mapper.ReleaseGIL()
+            self.assertEquals(frees, ptrs)
+            for ptr in ptrs:
+                self.assertEquals(mapper.HasPtr(ptr), False)
+            self.assertEquals(CPyMarshal.ReadInt(OffsetPtr(queue, QUEUE_COUNT)), 0)
+        finally:
+            cleanup()
+    
+    
+    def testDrainsWhenQueueFills(self):
+        frees = []
+        mapper, queue, cleanup = self.getMapperWithQueue(frees, 2)
+        try:
+            mapper.QueueDeallocs = True
+            ptrs = map(mapper.Store, (1.5, 2.5, 3.5))
+            for ptr in ptrs:
+                mapper.DecRef(ptr)
+            self.assertEquals(frees, ptrs[:2])
+            
+            mapper.QueueDeallocs = False
+            self.assertEquals(frees, ptrs)
+        finally:
+            cleanup()
+    
+    
+    def testDrainsInheritedQueueAfterItsTurnedOff(self):
+        frees = []
+        mapper, queue, cleanup = self.getMapperWithQueue(frees, 4)
+        typePtr, deallocType = MakeTypePtr(mapper, {
+            'tp_name': 'sub', 'tp_base': mapper.PyBaseObject_Type, 'tp_dealloc': None})
+        try:
+            mapper.QueueDeallocs = True
+            mapper.PyType_Ready(typePtr)
+            self.assertEquals(CPyMarshal.ReadPtrField(typePtr, PyTypeObject, "tp_dealloc"), CPyMarshal.ReadPtr(queue))
+            mapper.QueueDeallocs = False
+            
+            # the subtype still queues its instances, as C code's Py_DECREF would
+            ptr = mapper.PyType_GenericAlloc(typePtr, 0)
+            dealloc = Marshal.GetDelegateForFunctionPointer(
+                CPyMarshal.ReadPtrField(typePtr, PyTypeObject, "tp_dealloc"), dgt_void_ptr)
+            dealloc(ptr)
+            self.assertEquals(ptr in frees, False)
+            
+            mapper.EnsureGIL()
+            mapper.ReleaseGIL()
+            self.assertEquals(ptr in frees, True)
+            self.assertEquals(CPyMarshal.ReadInt(OffsetPtr(queue, QUEUE_COUNT)), 0)
+        finally:
+            cleanup()
+            deallocType()
+    
+    
+    def testSkipsResurrectedObjects(self):
+        frees = []
+        mapper, queue, cleanup = self.getMapperWithQueue(frees, 4)
+        try:
+            mapper.QueueDeallocs = True
+            obj = object()
+            ptr = mapper.Store(obj)
+            mapper.DecRef(ptr)
+            self.assertEquals(mapper.Store(obj), ptr)
+            self.assertEquals(mapper.RefCount(ptr), 1)
+            
+            mapper.DrainDeallocQueue()
+            self.assertEquals(frees, [])
+            self.assertEquals(mapper.Retrieve(ptr), obj)
+            
+            mapper.DecRef(ptr)
+            mapper.DrainDeallocQueue()
+            self.assertEquals(frees, [ptr])
+        finally:
+            cleanup()
+    
+    
+    def testSkipsObjectsQueuedTwice(self):
+        frees = []
+        mapper, queue, cleanup = self.getMapperWithQueue(frees, 4)
+        try:
+            mapper.QueueDeallocs = True
+            obj = object()
+            ptr = mapper.Store(obj)
+            mapper.DecRef(ptr)
+            mapper.Store(obj)
+            mapper.DecRef(ptr)
+            self.assertEquals(CPyMarshal.ReadInt(OffsetPtr(queue, QUEUE_COUNT)), 2)
+            
+            mapper.DrainDeallocQueue()
+            self.assertEquals(frees, [ptr])
+        finally:
+            cleanup()
+
+
+
+class RefCountBenchmark(TestCase):
+    
+    COUNT = 1000000
+    
+    def testIncRefDecRef(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        try:
+            for name, obj in (('object', object()), ('float', 1.5), ('list', [])):
+                ptr = mapper.Store(obj)
+                def IncRefDecRef(_):
+                    mapper.IncRef(ptr)
+                    mapper.DecRef(ptr)
+                report('IncRef/DecRef pairs (%s)' % name, rate(IncRefDecRef, self.COUNT), 'pairs/s')
+                mapper.DecRef(ptr)
+        finally:
+            mapper.Dispose()
+            deallocTypes()
+
+
+class TempObjectsBenchmark(TestCase):
+    
+    COUNT = 1000000
+    
+    def testEnsureReleaseGIL(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        try:
+            ptr = mapper.Store(object())
+            def EmptyScope(_):
+                mapper.EnsureGIL()
+                mapper.ReleaseGIL()
+            report('EnsureGIL/ReleaseGIL pairs (no temps)', rate(EmptyScope, self.COUNT), 'pairs/s')
+            
+            def RepeatedTemps(_):
+                mapper.EnsureGIL()
+                for _ in range(4):
+                    mapper.IncRef(ptr)
+                    mapper.DecRefLater(ptr)
+                mapper.ReleaseGIL()
+            report('EnsureGIL/ReleaseGIL pairs (4 repeated temps)', rate(RepeatedTemps, self.COUNT), 'pairs/s')
+            mapper.DecRef(ptr)
+        finally:
+            mapper.Dispose()
+            deallocTypes()
+
 
 suite = makesuite(
     PythonMapper_CreateDestroy_Test,
@@ -680,6 +1062,7 @@ suite = makesuite(
     PythonMapper_NoneTest,
     PythonMapper_NotImplementedTest,
     PythonMapper_Py_OptimizeFlag_Test,
+    PythonMapper_DeallocQueue_Test,
 )
 
 if __name__ == '__main__':
@@ -3,6 +3,7 @@ import sys
 
 from tests.utils.runtest import automakesuite, run
     
+from tests.utils.benchmark import elapsed, rate, report
 from tests.utils.cpython import MakeGetSetDef, MakeMethodDef, MakeMemberDef, MakeNumSeqMapMethods, MakeTypePtr
 from tests.utils.gc import gcwait
 from tests.utils.memory import CreateTypes
@@ -11,7 +12,7 @@ from tests.utils.testcase import TestCase, WithMapper
 from System import IntPtr, Int32, UInt32, WeakReference
 from System.Runtime.InteropServices import Marshal
 
-from Ironclad import CPyMarshal, HGlobalAllocator, PythonMapper
+from Ironclad import ClassEngine, CPyMarshal, HGlobalAllocator, PythonMapper
 from Ironclad.Structs import (
     MemberT, METH, PyMemberDef, PyNumberMethods, PyStringObject, 
     PyIntObject, PyObject, PyMappingMethods, PySequenceMethods, PyTypeObject
@@ -74,6 +75,35 @@ class LifetimeTest(TestCase):
         self.assertEquals(objref.IsAlive, False, "object didn't die")
 
 
+class ActualiseInstanceTest(TestCase):
+    
+    @WithMapper
+    def testInstanceHasRealClass(self, mapper, addToCleanUp):
+        typePtr, deallocType = MakeTypePtr(mapper, {'tp_name': 'klass'})
+        addToCleanUp(deallocType)
+        klass = mapper.Retrieve(typePtr)
+        
+        objPtr = mapper.PyType_GenericNew(typePtr, IntPtr.Zero, IntPtr.Zero)
+        obj = mapper.Retrieve(objPtr)
+        self.assertEquals(type(obj) is klass, True)
+        self.assertEquals(isinstance(obj, klass), True)
+        self.assertEquals(mapper.Retrieve(objPtr) is obj, True)
+        self.assertEquals(mapper.Store(obj), objPtr)
+    
+    
+    @WithMapper
+    def testSubclassInstancesHaveRealClass(self, mapper, addToCleanUp):
+        superPtr, deallocSuper = MakeTypePtr(mapper, {'tp_name': 'super'})
+        addToCleanUp(deallocSuper)
+        subPtr, deallocSub = MakeTypePtr(mapper, {'tp_name': 'sub', 'tp_base': superPtr})
+        addToCleanUp(deallocSub)
+        sub = mapper.Retrieve(subPtr)
+        
+        objs = [mapper.Retrieve(mapper.PyType_GenericNew(subPtr, IntPtr.Zero, IntPtr.Zero)) for _ in range(3)]
+        self.assertEquals([type(obj) is sub for obj in objs], [True, True, True])
+        self.assertEquals(isinstance(objs[0], mapper.Retrieve(superPtr)), True)
+
+
 class InheritanceTest(TestCase):
     
     @WithMapper
@@ -1368,6 +1398,145 @@ class CollisionsTest(TestCase):
         # wrong connections would have called Raise
 
 
-suite = automakesuite(locals())
+class DirectEngineTestCase(object):
+    # mix in before a TestCase to rerun its tests against ClassEngine.Direct
+    
+    def setUp(self):
+        self.oldClassEngine = PythonMapper.DefaultClassEngine
+        PythonMapper.DefaultClassEngine = ClassEngine.Direct
+        super(DirectEngineTestCase, self).setUp()
+    
+    def tearDown(self):
+        PythonMapper.DefaultClassEngine = self.oldClassEngine
+        super(DirectEngineTestCase, self).tearDown()
+
+
+class DirectEngineActualiseInstanceTest(DirectEngineTestCase, ActualiseInstanceTest): pass
+class DirectEngineInheritanceTest(DirectEngineTestCase, InheritanceTest): pass
+class DirectEngineTypeDictTest(DirectEngineTestCase, TypeDictTest): pass
+class DirectEngineFieldsTest(DirectEngineTestCase, FieldsTest): pass
+class DirectEngineMethodsTest(DirectEngineTestCase, MethodsTest): pass
+class DirectEngineGetsetsTest(DirectEngineTestCase, GetsetsTest): pass
+class DirectEngineTypeMethodsTest(DirectEngineTestCase, TypeMethodsTest): pass
+class DirectEngineNumberMethodsTest(DirectEngineTestCase, NumberMethodsTest): pass
+class DirectEngineSequenceMethodsTest(DirectEngineTestCase, SequenceMethodsTest): pass
+class DirectEngineMappingMethodsTest(DirectEngineTestCase, MappingMethodsTest): pass
+class DirectEngineCollisionsTest(DirectEngineTestCase, CollisionsTest): pass
+
+
+class ClassEngineTest(TestCase):
+    
+    def testMapperEngineStartsAsDefault(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        try:
+            self.assertEquals(mapper.ClassEngine, PythonMapper.DefaultClassEngine)
+        finally:
+            mapper.Dispose()
+            deallocTypes()
+    
+    @WithMapper
+    def testDirectEngineReusesCompiledCode(self, mapper, addToCleanUp):
+        mapper.ClassEngine = ClassEngine.Direct
+        def Length(_):
+            return 123
+        seq, deallocSeq = MakeNumSeqMapMethods(PySequenceMethods, {'sq_length': Length})
+        addToCleanUp(deallocSeq)
+        typeSpec = {'tp_name': 'klass', 'tp_as_sequence': seq}
+        
+        typePtr, deallocType = MakeTypePtr(mapper, typeSpec)
+        addToCleanUp(deallocType)
+        self.assertEquals(len(mapper.Retrieve(typePtr)()), 123)
+        snippets = mapper.CodeCache.Count
+        
+        typePtr, deallocType = MakeTypePtr(mapper, typeSpec)
+        addToCleanUp(deallocType)
+        self.assertEquals(len(mapper.Retrieve(typePtr)()), 123)
+        self.assertEquals(mapper.CodeCache.Count, snippets)
+
+    @WithMapper
+    def testGeneratedEngineReusesClassFactory(self, mapper, addToCleanUp):
+        mapper.ClassEngine = ClassEngine.Generated
+        doc = "a doc with ''' quotes and a \\ backslash"
+        typePtr, deallocType = MakeTypePtr(mapper, {'tp_name': 'mod.klass', 'tp_doc': doc})
+        addToCleanUp(deallocType)
+        klass = mapper.Retrieve(typePtr)
+        self.assertEquals((klass.__name__, klass.__module__, klass.__doc__), ('klass', 'mod', doc))
+        snippets, misses = mapper.CodeCache.Count, mapper.CodeCache.Misses
+        
+        typePtr, deallocType = MakeTypePtr(mapper, {'tp_name': 'mod.other', 'tp_doc': doc})
+        addToCleanUp(deallocType)
+        self.assertEquals(mapper.Retrieve(typePtr).__name__, 'other')
+        self.assertEquals((mapper.CodeCache.Count, mapper.CodeCache.Misses), (snippets, misses))
+
+    @WithMapper
+    def testGeneratedEngineSharesCodeBetweenIdenticalTypes(self, mapper, addToCleanUp):
+        mapper.ClassEngine = ClassEngine.Generated
+        closures = []
+        def MakeClass(closure):
+            def Getter(_, closurePtr):
+                closures.append(closurePtr)
+                return mapper.Store(None)
+            getsetDef, deallocGetset = MakeGetSetDef("attr", Getter, None, "it's\na doc", closure)
+            addToCleanUp(deallocGetset)
+            typePtr, deallocType = MakeTypePtr(mapper, {'tp_name': 'mod.klass', 'tp_getset': [getsetDef]})
+            addToCleanUp(deallocType)
+            return mapper.Retrieve(typePtr)
+        
+        klass1 = MakeClass(IntPtr(111))
+        snippets, misses = mapper.CodeCache.Count, mapper.CodeCache.Misses
+        klass2 = MakeClass(IntPtr(222))
+        self.assertEquals((mapper.CodeCache.Count, mapper.CodeCache.Misses), (snippets, misses))
+        
+        klass1().attr, klass2().attr
+        self.assertEquals(closures, [IntPtr(111), IntPtr(222)])
+        self.assertEquals(klass2.attr.__doc__, "it's\na doc")
+
+
+TYPES = 200
+CALLS = 100000
+
+class ClassEngineBenchmark(TestCase):
+    
+    def runEngine(self, engine):
+        mapper = PythonMapper()
+        mapper.ClassEngine = engine
+        deallocTypes = CreateTypes(mapper)
+        resultPtr = mapper.Store(None)
+        def NoArgs(_, __):
+            mapper.IncRef(resultPtr)
+            return resultPtr
+        methodDef, deallocMethod = MakeMethodDef("method", NoArgs, METH.NOARGS)
+        getsetDef, deallocGetset = MakeGetSetDef("attr", NoArgs, None, "doc")
+        typeSpec = {"tp_methods": [methodDef], "tp_getset": [getsetDef]}
+        typePtrs, deallocs = zip(*[MakeTypePtr(mapper, typeSpec) for _ in xrange(TYPES)])
+        try:
+            def build():
+                for typePtr in typePtrs:
+                    mapper.Retrieve(typePtr)
+            report('%s: build %d classes' % (engine, TYPES), elapsed(build), 's')
+            
+            klass = mapper.Retrieve(typePtrs[0])
+            report('%s: instances created' % engine, rate(lambda _: klass(), CALLS), 'instances/s')
+            
+            instance = klass()
+            report('%s: METH_NOARGS method calls' % engine, rate(lambda _: instance.method(), CALLS), 'calls/s')
+            report('%s: getset property gets' % engine, rate(lambda _: instance.attr, CALLS), 'gets/s')
+        finally:
+            mapper.Dispose()
+            for dealloc in deallocs:
+                dealloc()
+            deallocGetset()
+            deallocMethod()
+            deallocTypes()
+    
+    def testGeneratedEngine(self):
+        self.runEngine(ClassEngine.Generated)
+    
+    def testDirectEngine(self):
+        self.runEngine(ClassEngine.Direct)
+
+
+suite = automakesuite(locals(), excludes=[ClassEngineBenchmark])
 if __name__ == '__main__':
     run(suite)
@@ -0,0 +1,136 @@
+from tests.utils.runtest import makesuite, run
+from tests.utils.testcase import TestCase
+
+from tests.utils.benchmark import native_bytes, rate, report
+
+from Ironclad import CPyMarshal, HGlobalAllocator, PythonMapper, SlabAllocator
+
+
+SMALL_SIZE = 20
+LARGE_SIZE = 8192
+
+class SlabAllocatorTest(TestCase):
+    
+    def testAllocFree(self):
+        allocator = SlabAllocator()
+        for size in (0, 1, SMALL_SIZE, 512, LARGE_SIZE):
+            ptr = allocator.Alloc(size)
+            self.assertEquals(allocator.Contains(ptr), True)
+            CPyMarshal.WriteInt(ptr, 123)
+            
+            allocator.Free(ptr)
+            self.assertEquals(allocator.Contains(ptr), False)
+            self.assertRaises(KeyError, allocator.Free, ptr)
+        allocator.FreeAll()
+    
+    
+    def testSmallAllocsShareArenas(self):
+        allocator = SlabAllocator()
+        ptrs = [allocator.Alloc(SMALL_SIZE) for _ in range(1000)]
+        self.assertEquals(len(set(ptrs)), 1000)
+        self.assertEquals(allocator.ArenaCount, 1)
+        
+        interior = CPyMarshal.Offset(ptrs[0], 4)
+        self.assertEquals(allocator.Contains(interior), False)
+        self.assertRaises(KeyError, allocator.Free, interior)
+        
+        allocator.Alloc(LARGE_SIZE)
+        self.assertEquals(allocator.ArenaCount, 1)
+        allocator.Alloc(SMALL_SIZE * 2)
+        self.assertEquals(allocator.ArenaCount, 2)
+        allocator.FreeAll()
+    
+    
+    def testFreedBlocksAreReused(self):
+        allocator = SlabAllocator()
+        ptr1 = allocator.Alloc(SMALL_SIZE)
+        ptr2 = allocator.Alloc(SMALL_SIZE)
+        allocator.Free(ptr1)
+        allocator.Free(ptr2)
+        self.assertEquals(allocator.Alloc(SMALL_SIZE), ptr2)
+        self.assertEquals(allocator.Alloc(SMALL_SIZE), ptr1)
+        allocator.FreeAll()
+    
+    
+    def testAllocFreeAll(self):
+        allocator = SlabAllocator()
+        ptr1 = allocator.Alloc(SMALL_SIZE)
+        ptr2 = allocator.Alloc(SMALL_SIZE)
+        ptr3 = allocator.Alloc(LARGE_SIZE)
+        
+        allocator.Free(ptr1)
+        self.assertEquals(allocator.Contains(ptr1), False)
+        
+        allocator.FreeAll()
+        self.assertEquals(allocator.ArenaCount, 0)
+        for ptr in (ptr2, ptr3):
+            self.assertEquals(allocator.Contains(ptr), False)
+            self.assertRaises(KeyError, allocator.Free, ptr)
+    
+    
+    def testRealloc(self):
+        allocator = SlabAllocator()
+        ptr1 = allocator.Alloc(SMALL_SIZE)
+        CPyMarshal.WriteInt(ptr1, 12345)
+        self.assertEquals(allocator.Realloc(ptr1, SMALL_SIZE + 4), ptr1, "should have fit in same block")
+        
+        ptr2 = allocator.Realloc(ptr1, 200)
+        self.assertNotEquals(ptr2, ptr1)
+        self.assertEquals(CPyMarshal.ReadInt(ptr2), 12345)
+        self.assertEquals(allocator.Contains(ptr1), False)
+        self.assertEquals(allocator.Contains(ptr2), True)
+        
+        ptr3 = allocator.Realloc(ptr2, LARGE_SIZE)
+        self.assertEquals(CPyMarshal.ReadInt(ptr3), 12345)
+        self.assertEquals(allocator.Contains(ptr2), False)
+        self.assertEquals(allocator.Contains(ptr3), True)
+        
+        allocator.FreeAll()
+        self.assertEquals(allocator.Contains(ptr3), False)
+    
+    
+    def testWorksWithMapper(self):
+        allocator = SlabAllocator()
+        mapper = PythonMapper(allocator)
+        ptrs = [mapper.Store(x) for x in (1, 2.5, 'three', (4,), [5])]
+        for ptr in ptrs:
+            self.assertEquals(allocator.Contains(ptr), True)
+        self.assertEquals(map(mapper.Retrieve, ptrs), [1, 2.5, 'three', (4,), [5]])
+        mapper.Dispose()
+
+
+STORES = 200000
+
+class SlabAllocatorBenchmark(TestCase):
+    
+    def churn(self, allocator):
+        mapper = PythonMapper(allocator)
+        try:
+            def StoreAndDecRef(i):
+                mapper.DecRef(mapper.Store(i + 1000000))
+            return rate(StoreAndDecRef, STORES)
+        finally:
+            mapper.Dispose()
+    
+    
+    def testStoreHeavy(self):
+        for name, cls in (('HGlobalAllocator', HGlobalAllocator), ('SlabAllocator', SlabAllocator)):
+            report('%s Store+DecRef int' % name, self.churn(cls()), 'pairs/s')
+            
+            allocator = cls()
+            report('%s raw allocs' % name, rate(lambda i: allocator.Alloc(SMALL_SIZE), STORES), 'allocs/s')
+            allocator.FreeAll()
+            
+            mapper = PythonMapper(cls())
+            values = [float(i) for i in xrange(STORES)]
+            try:
+                report('%s native bytes per stored float' % name,
+                    float(native_bytes(lambda: [mapper.Store(v) for v in values])) / STORES, 'B')
+            finally:
+                mapper.Dispose()
+
+
+suite = makesuite(SlabAllocatorTest)
+
+if __name__ == '__main__':
+    run(suite)
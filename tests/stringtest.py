@@ -1,6 +1,7 @@
 
 from tests.utils.runtest import automakesuite, run
 
+from tests.utils.benchmark import rate, report
 from tests.utils.allocators import GetAllocatingTestAllocator
 from tests.utils.memory import OffsetPtr, CreateTypes, PtrToStructure
 from tests.utils.testcase import TestCase, WithMapper
@@ -8,7 +9,7 @@ from tests.utils.typetestcase import TypeTestCase
 
 from System import Array, Byte, Char, IntPtr, Type, UInt32
 from System.Runtime.InteropServices import Marshal
-from Ironclad import CPyMarshal, dgt_int_ptrintptr, dgt_int_ptrptr, dgt_ptr_ptrptr, PythonMapper
+from Ironclad import CPyMarshal, NativeString, dgt_int_ptrintptr, dgt_int_ptrptr, dgt_ptr_ptrptr, PythonMapper
 from Ironclad.Structs import PyStringObject, PyTypeObject, PyBufferProcs, PySequenceMethods, Py_TPFLAGS
 
 
@@ -337,6 +338,96 @@ class PyString_FromStringAndSize_Test(PyString_TestCase):
             deallocTypes()
 
 
+class LazyStringTest(PyString_TestCase):
+    
+    def getNativeString(self, mapper, testString):
+        strPtr = mapper.PyString_FromStringAndSize(IntPtr.Zero, len(testString))
+        self.fillStringDataWithBytes(strPtr, self.byteArrayFromString(testString))
+        return strPtr, mapper.Retrieve(strPtr)
+    
+    
+    @WithMapper
+    def testShortStringsAreStillStrings(self, mapper, _):
+        mapper.LazyStringThreshold = 100
+        strPtr, result = self.getNativeString(mapper, 'x' * 99)
+        self.assertEquals(type(result), str)
+        mapper.DecRef(strPtr)
+    
+    
+    @WithMapper
+    def testLongStringsStayNative(self, mapper, _):
+        mapper.LazyStringThreshold = 100
+        testString = 'abcdefghij' * 10 + self.getStringWithValues(0, 256)
+        strPtr, result = self.getNativeString(mapper, testString)
+        self.assertEquals(type(result), NativeString)
+        self.assertEquals(mapper.RefCount(strPtr), 2, "did not take a reference")
+        
+        self.assertEquals(len(result), len(testString))
+        self.assertEquals(result[3], 'd')
+        self.assertEquals(result[-1], chr(255))
+        self.assertEquals(result[12:15], 'cde')
+        self.assertEquals(result[:-256], testString[:-256])
+        self.assertEquals(result[10:2:-3], testString[10:2:-3])
+        self.assertEquals(result.IsMaterialised, False, "read too much")
+        
+        self.assertEquals(mapper.Store(result), strPtr, "copied string back into C")
+        self.assertEquals(mapper.RefCount(strPtr), 3, "did not incref on store")
+        mapper.DecRef(strPtr)
+        self.assertEquals(mapper.PyString_AsString(strPtr), self.dataPtrFromStrPtr(strPtr))
+        self.assertEquals(result.IsMaterialised, False, "read too much")
+        
+        self.assertEquals(result, testString)
+        self.assertEquals(testString, result)
+        self.assertEquals(hash(result), hash(testString))
+        self.assertEquals(result + 'x', testString + 'x')
+        self.assertEquals('x' + result, 'x' + testString)
+        self.assertEquals(str(result), testString)
+        self.assertEquals(result.upper(), testString.upper())
+        self.assertEquals(result.IsMaterialised, True)
+        mapper.DecRef(strPtr)
+    
+    
+    @WithMapper
+    def testNativeStringsWorkWhereStrsAreNeeded(self, mapper, _):
+        mapper.LazyStringThreshold = 1
+        namePtr, name = self.getNativeString(mapper, 'klass')
+        self.assertEquals(type(name), NativeString)
+        klass = mapper.Retrieve(mapper.PyClass_New(IntPtr.Zero, mapper.Store({}), namePtr))
+        self.assertEquals(klass.__name__, 'klass')
+        
+        attrPtr, _ = self.getNativeString(mapper, '__name__')
+        self.assertEquals(mapper.Retrieve(mapper.PyObject_GetAttr(mapper.Store(klass), attrPtr)), 'klass')
+        self.assertEquals(mapper.PyObject_SetAttr(mapper.Store(klass), attrPtr, mapper.Store('other')), 0)
+        self.assertEquals(klass.__name__, 'other')
+        
+        modulePtr = mapper.Py_InitModule4("test_module", IntPtr.Zero, "test_docstring", IntPtr.Zero, 12345)
+        moduleNamePtr, _ = self.getNativeString(mapper, 'test_module')
+        self.assertEquals(mapper.PyImport_Import(moduleNamePtr), modulePtr)
+        self.assertMapperHasError(mapper, None)
+        
+        keyPtr, _ = self.getNativeString(mapper, 'key')
+        d = {}
+        self.assertEquals(mapper.PyDict_SetItem(mapper.Store(d), keyPtr, mapper.Store(1)), 0)
+        self.assertEquals(map(type, d.keys()), [str])
+        
+        class New(object):
+            pass
+        self.assertEquals(mapper.PyDict_SetItem(mapper.Store(New.__dict__), keyPtr, mapper.Store(2)), 0)
+        self.assertEquals(New.key, 2)
+    
+    
+    def testDisposeDetachesNativeStrings(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        mapper.LazyStringThreshold = 1
+        testString = "would you like to buy some grease?"
+        strPtr, result = self.getNativeString(mapper, testString)
+        mapper.Dispose()
+        deallocTypes()
+        self.assertEquals(result.IsMaterialised, True)
+        self.assertEquals(result, testString)
+        
+
 class _PyString_Resize_Test(PyString_TestCase):
 
     def testErrorHandling(self):
@@ -595,7 +686,44 @@ class PyStringStoreTest(PyString_TestCase):
             mapper.Dispose()
             deallocTypes()
 
-suite = automakesuite(locals())
+MB = 1024.0 * 1024.0
+
+class StringMarshallingBenchmark(PyString_TestCase):
+    
+    SIZES = (16, 4 * 1024, 16 * 1024 * 1024)
+    
+    def calls(self, size):
+        # roughly 64MB each way, within reason
+        return max(4, min(100000, int(64 * MB / size)))
+    
+    def testThroughput(self):
+        mapper = PythonMapper()
+        deallocTypes = CreateTypes(mapper)
+        try:
+            for size in self.SIZES:
+                testString = 'x' * size
+                testData = self.ptrFromByteArray(self.byteArrayFromString(testString))
+                calls = self.calls(size)
+                try:
+                    def FromString(_):
+                        mapper.DecRef(mapper.PyString_FromString(testData))
+                    seconds = calls / rate(FromString, calls)
+                    report('PyString_FromString, %d bytes' % size, size * calls / MB / seconds, 'MB/s')
+                    
+                    # Store remembers strings by identity, so give it new ones every time
+                    strings = ['x' * size for _ in xrange(calls)]
+                    def Store(i):
+                        mapper.DecRef(mapper.Store(strings[i]))
+                    seconds = calls / rate(Store, calls)
+                    report('Store(str), %d bytes' % size, size * calls / MB / seconds, 'MB/s')
+                finally:
+                    Marshal.FreeHGlobal(testData)
+        finally:
+            mapper.Dispose()
+            deallocTypes()
+
+
+suite = automakesuite(locals(), excludes=[StringMarshallingBenchmark])
 
 if __name__ == '__main__':
     run(suite)
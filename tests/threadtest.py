@@ -1,4 +1,5 @@
 
+from tests.utils.benchmark import elapsed, report
 from tests.utils.runtest import makesuite, run
 from tests.utils.testcase import TestCase, WithMapper
 
@@ -6,7 +7,7 @@ from System import IntPtr
 from System.Reflection import BindingFlags
 from System.Threading import AutoResetEvent, Thread, ThreadStart
 
-from Ironclad import CPyMarshal
+from Ironclad import CPyMarshal, InterpreterLock, Lock
 from Ironclad.Structs import PyThreadState
 
 def GetGIL(mapper):    
@@ -131,6 +132,53 @@ class PyThreadExceptionTest(TestCase):
         self.assertEquals(isinstance(mapper.LastException, TypeError), True)
 
 
+    @WithMapper
+    def testHasPendingError(self, mapper, _):
+        otherPending = []
+        def CheckOtherThread():
+            otherPending.append(mapper.HasPendingError)
+
+        self.assertEquals(mapper.HasPendingError, False)
+        mapper.LastException = TypeError('bar')
+        self.assertEquals(mapper.HasPendingError, True)
+        thread = Thread(ThreadStart(CheckOtherThread))
+        thread.Start()
+        thread.Join()
+        self.assertEquals(otherPending, [False])
+        
+        mapper.LastException = None
+        self.assertEquals(mapper.HasPendingError, False)
+        
+        # C code sets curexc_type directly
+        ts = CPyMarshal.ReadPtr(mapper._PyThreadState_Current)
+        typePtr = mapper.Store(ValueError)
+        CPyMarshal.WritePtrField(ts, PyThreadState, "curexc_type", typePtr)
+        self.assertEquals(mapper.HasPendingError, True)
+        self.assertEquals(mapper.LastException.__class__, ValueError)
+        mapper.LastException = None
+        self.assertEquals(mapper.HasPendingError, False)
+
+
+    @WithMapper
+    def testFetchError(self, mapper, _):
+        self.assertEquals(mapper.FetchError(), None)
+        
+        mapper.LastException = ValueError('foo')
+        ts = CPyMarshal.ReadPtr(mapper._PyThreadState_Current)
+        valuePtr = CPyMarshal.ReadPtrField(ts, PyThreadState, "curexc_value")
+        mapper.IncRef(valuePtr)
+        
+        error = mapper.FetchError()
+        self.assertEquals(mapper.HasPendingError, False)
+        for field in ("curexc_type", "curexc_value", "curexc_traceback"):
+            self.assertEquals(CPyMarshal.ReadPtrField(ts, PyThreadState, field), IntPtr.Zero)
+        self.assertEquals(mapper.RefCount(valuePtr), 1)
+        
+        def Raise():
+            raise error
+        self.assertRaises(ValueError, Raise)
+
+
 class PyThreadStateTest(TestCase):
     
     @WithMapper
@@ -167,6 +215,17 @@ class PyThreadStateTest(TestCase):
 
 class PyEvalGILThreadTest(TestCase):
 
+    @WithMapper
+    def testSwitchInterval(self, mapper, _):
+        lock = GetGIL(mapper)
+        self.assertEquals(mapper.SwitchInterval, 0)
+        mapper.SwitchInterval = 0.005
+        self.assertEquals(lock.SwitchInterval, mapper.SwitchInterval)
+        self.assertEquals(mapper.GILHandoffs, 0)
+        self.assertEquals(mapper.GetGILWaitHistograms().Count, 0)
+        self.assertEquals(list(mapper.GILWaitBucketLimits), list(lock.WaitBucketLimits))
+
+
     @WithMapper
     def testMultipleSaveRestoreOneThread(self, mapper, _):
         mapper.ReleaseGIL()
@@ -269,6 +328,32 @@ class PyEvalGILThreadTest(TestCase):
 
 
 
+ACQUISITIONS = 100000
+
+class LockContentionBenchmark(TestCase):
+    
+    def contend(self, lock, threadCount):
+        def Hammer():
+            for _ in xrange(ACQUISITIONS):
+                lock.Acquire()
+                lock.Release()
+        def RunThreads():
+            threads = [Thread(ThreadStart(Hammer)) for _ in range(threadCount)]
+            for t in threads:
+                t.Start()
+            for t in threads:
+                t.Join()
+        return (ACQUISITIONS * threadCount) / elapsed(RunThreads)
+    
+    
+    def testAcquisitionRates(self):
+        for name, cls in (('Lock', Lock), ('InterpreterLock', InterpreterLock)):
+            for threadCount in (1, 2, 4, 8):
+                lock = cls()
+                report('%s, %d threads' % (name, threadCount), self.contend(lock, threadCount), 'acquisitions/s')
+                lock.Dispose()
+
+
 suite = makesuite(
     PyThread_functions_Test,
     PyThreadExceptionTest,
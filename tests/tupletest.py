@@ -190,6 +190,26 @@ class TupleTest(TestCase):
         Marshal.FreeHGlobal(typeBlock)
 
 
+    @WithMapper
+    def testStoreRetrieveMixedTuple(self, mapper, _):
+        obj = object()
+        tuple_ = (1, 123456789, 2.5, 'hello', None, obj)
+        tuplePtr = mapper.Store(tuple_)
+        
+        dataPtr = OffsetPtr(tuplePtr, Marshal.OffsetOf(PyTupleObject, "ob_item"))
+        itemPtrs = [CPyMarshal.ReadPtr(OffsetPtr(dataPtr, i * CPyMarshal.PtrSize)) for i in range(len(tuple_))]
+        self.assertEquals([mapper.Retrieve(ptr) for ptr in itemPtrs], list(tuple_), "contents not stored")
+        
+        copyPtr = mapper.PyTuple_New(len(tuple_))
+        copyData = OffsetPtr(copyPtr, Marshal.OffsetOf(PyTupleObject, "ob_item"))
+        for i, ptr in enumerate(itemPtrs):
+            mapper.IncRef(ptr)
+            CPyMarshal.WritePtr(OffsetPtr(copyData, i * CPyMarshal.PtrSize), ptr)
+        copy = mapper.Retrieve(copyPtr)
+        self.assertEquals(copy, tuple_, "retrieved wrong tuple")
+        self.assertEquals(copy[5] is obj, True, "lost identity")
+
+
     @WithMapper
     def testPyTuple_GetSlice(self, mapper, _):
         def TestSlice(originalTuplePtr, start, stop):
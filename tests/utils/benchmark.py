@@ -0,0 +1,64 @@
+
+# Benchmarks live alongside the tests for the code they measure, in TestCase
+# subclasses whose names end with 'Benchmark'. They are deliberately left out
+# of each module's suite, so a normal test run doesn't pay for them; run one
+# by name instead, for example:
+#
+# ipy runtests.py tests.interestingptrmaptest.InterestingPtrMapBenchmark
+
+from System import GC
+from System.Diagnostics import Process, Stopwatch
+
+
+def gccollect():
+    GC.Collect()
+    GC.WaitForPendingFinalizers()
+    GC.Collect()
+
+
+def rate(func, count):
+    """Call func(i) for i in xrange(count); return calls per second."""
+    gccollect()
+    watch = Stopwatch.StartNew()
+    for i in xrange(count):
+        func(i)
+    watch.Stop()
+    seconds = watch.Elapsed.TotalSeconds
+    if seconds == 0:
+        return float('inf')
+    return count / seconds
+
+
+def elapsed(func):
+    """Call func(); return elapsed seconds."""
+    gccollect()
+    watch = Stopwatch.StartNew()
+    func()
+    watch.Stop()
+    return watch.Elapsed.TotalSeconds
+
+
+def managed_bytes(func):
+    """Call func(); return the growth in the managed heap, keeping func's result alive while measuring."""
+    gccollect()
+    before = GC.GetTotalMemory(True)
+    result = func()
+    after = GC.GetTotalMemory(True)
+    GC.KeepAlive(result)
+    return after - before
+
+
+def native_bytes(func):
+    """Call func(); return the growth in the process's private memory, keeping func's result alive while measuring."""
+    gccollect()
+    process = Process.GetCurrentProcess()
+    before = process.PrivateMemorySize64
+    result = func()
+    process.Refresh()
+    after = process.PrivateMemorySize64
+    GC.KeepAlive(result)
+    return after - before
+
+
+def report(name, value, unit):
+    print '%-50s %14.1f %s' % (name, value, unit)
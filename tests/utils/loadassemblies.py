@@ -1,3 +1,4 @@
+import os
 import clr
 clr.AddReferenceToFileAndPath("build/ironclad/ironclad.dll")
 
@@ -10,4 +11,11 @@ clr.AddReferenceToFileAndPath("build/ironclad/ironclad.dll")
 # doesn't explode when this file is not found.
 
 from Ironclad import Unmanaged
-Unmanaged.LoadLibrary("tests\data\implicit-load-msvcr90.dll")
\ No newline at end of file
+Unmanaged.LoadLibrary("tests\data\implicit-load-msvcr90.dll")
+# Set IRONCLAD_CLASS_ENGINE to Direct to run the tests (and benchmarks) against the
+# direct class-building engine instead of generated code.
+
+from Ironclad import ClassEngine, PythonMapper
+_engine = os.environ.get("IRONCLAD_CLASS_ENGINE")
+if _engine:
+    PythonMapper.DefaultClassEngine = getattr(ClassEngine, _engine)
@@ -42,7 +42,7 @@ def _tweak_args(base_mgd_args, arg_tweak=None):
 #==========================================================================
 
 def _get_mgd_arglist(spec):
-    arglist = '%s key' % ICTYPE_2_MGDTYPE['str']
+    arglist = '%s slot' % ICTYPE_2_MGDTYPE['int']
     arglist_rest = spec.mgd_arglist
     if arglist_rest:
         arglist = ', '.join((arglist, arglist_rest))
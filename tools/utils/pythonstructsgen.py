@@ -9,26 +9,62 @@ from tools.utils.platform import ICTYPE_2_MGDTYPE
 
 #==========================================================================
 
-def _generate_field_code(fieldspec):
-    name, ictype = fieldspec
+def _get_field_mgdtype(ictype):
     if ictype not in VALID_ICTYPES:
         # FIXME: this is not necessarily a function ptr
         # ...but it has been in all the cases we've seen
         ictype = 'ptr'
-    
+    return ICTYPE_2_MGDTYPE[native_ictype(ictype)]
+
+def _generate_field_code(fieldspec):
+    name, ictype = fieldspec
     return STRUCT_FIELD_TEMPLATE % {
         'name': name,
-        'type': ICTYPE_2_MGDTYPE[native_ictype(ictype)], 
+        'type': _get_field_mgdtype(ictype), 
+    }
+
+
+#==========================================================================
+
+def _get_accessor_name(name):
+    for prefix in STRUCT_REF_FIELD_PREFIXES:
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+            break
+    return ''.join(part.capitalize() for part in name.split('_') if part)
+
+def _generate_ref_code(structspec):
+    struct, fields = structspec
+    offsets = []
+    accessors = []
+    for (name, ictype) in fields:
+        info = {
+            'struct': struct,
+            'name': name,
+            'accessor': _get_accessor_name(name),
+            'type': _get_field_mgdtype(ictype),
+        }
+        offsets.append(STRUCT_REF_OFFSET_TEMPLATE % info)
+        if info['type'] in STRUCT_REF_ACCESSOR_SUFFIXES:
+            info['suffix'] = STRUCT_REF_ACCESSOR_SUFFIXES[info['type']]
+            accessors.append(STRUCT_REF_ACCESSOR_TEMPLATE % info)
+    return STRUCT_REF_TEMPLATE % {
+        'name': struct,
+        'offsets': '\n'.join(offsets),
+        'accessors': '\n'.join(accessors),
     }
 
 def _generate_struct_code(structspec):
     name, fields = structspec
     fields_code = '\n'.join(
         map(_generate_field_code, fields))
-    return STRUCT_TEMPLATE % {
-        'name': name, 
-        'fields': fields_code
-    }
+    return '\n\n'.join((
+        STRUCT_TEMPLATE % {
+            'name': name, 
+            'fields': fields_code
+        },
+        _generate_ref_code(structspec),
+    ))
     
 
 #==========================================================================